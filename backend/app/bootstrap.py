@@ -0,0 +1,132 @@
+"""
+데이터베이스 초기화 (테이블/검색 인덱스 생성, 샘플 데이터, 토폴로지 연결 캐시)
+
+import 시에는 아무 I/O도 하지 않으며 명시적으로 호출한다.
+- 배포당 한 번: python -m app.bootstrap [--no-seed]
+- 개발 환경: INIT_DB_ON_STARTUP이 켜져 있으면 애플리케이션 lifespan에서 호출
+"""
+
+from contextlib import contextmanager
+from typing import Iterator
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+
+from app import config
+from sqlalchemy import inspect, text
+
+from app.database import Base, SessionLocal, engine
+from app.models.topology_change import TopologyChange
+from app.models.topology_connection import TopologyConnection
+from app.seed_data import seed_database
+from app.services.graph_layout import refresh_segment_layout
+from app.services.search_index import create_search_index
+from app.services.topology_service import rebuild_topology_connections
+from app.services.topology_version import ensure_version_counter
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def init_database(seed: bool = config.SEED_SAMPLE_DATA, reset_cache: bool = True) -> None:
+    """
+    테이블과 검색 인덱스를 만들고 (이미 있으면 유지) 토폴로지 연결 캐시와 노드 좌표를 구성
+
+    Args:
+        seed: 비어 있는 데이터베이스에 샘플 데이터 생성
+        reset_cache: 연결 캐시 테이블을 삭제 후 다시 생성.
+            False이면 캐시가 비어 있을 때만 구성하므로, 이미 요청을 처리 중인
+            다른 워커의 캐시를 건드리지 않는다. 단, 테이블 컬럼이 모델과 다르면
+            (이전 버전에서 만든 테이블) 항상 다시 생성한다.
+
+    같은 호스트의 여러 프로세스 (uvicorn --workers N)가 동시에 호출해도 파일 잠금으로
+    한 번에 하나씩 실행된다.
+    """
+    with _init_lock():
+        # 토폴로지 연결 캐시는 규칙으로부터 언제든 재구성 가능
+        if reset_cache or _connection_cache_outdated():
+            TopologyConnection.__table__.drop(bind=engine, checkfirst=True)
+
+        _upgrade_change_log()
+        Base.metadata.create_all(bind=engine)
+        create_search_index(engine)
+
+        db = SessionLocal()
+        try:
+            ensure_version_counter(db)
+            db.commit()
+            if seed:
+                seed_database(db)
+            if reset_cache or db.query(TopologyConnection.id).first() is None:
+                rebuild_topology_connections(db)
+                db.commit()
+            # 좌표는 캐시와 달리 유지하고, 아직 배치되지 않은 세그먼트만 배치
+            refresh_segment_layout(db)
+            db.commit()
+        finally:
+            db.close()
+
+
+def _connection_cache_outdated() -> bool:
+    """기존 연결 캐시 테이블의 컬럼이 모델과 다른지 확인 (테이블이 없으면 False)"""
+    table = TopologyConnection.__table__
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return False
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    return existing != {column.name for column in table.columns}
+
+
+def _upgrade_change_log() -> None:
+    """
+    version 컬럼이 없는 기존 변경 이력 테이블에 컬럼 추가
+
+    이전에는 변경 ID가 곧 버전이었으므로 기존 행은 ID를 버전으로 사용한다.
+    """
+    table = TopologyChange.__table__
+    if not inspect(engine).has_table(table.name):
+        return
+    if any(column["name"] == "version" for column in inspect(engine).get_columns(table.name)):
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN version INTEGER"))
+        conn.execute(text(f"UPDATE {table.name} SET version = id"))
+        for index in table.indexes:
+            if "version" in index.columns:
+                index.create(bind=conn)
+
+
+@contextmanager
+def _init_lock() -> Iterator[None]:
+    """DATABASE_URL별 프로세스 간 잠금 (fcntl이 없으면 잠그지 않음)"""
+    if fcntl is None:
+        yield
+        return
+
+    digest = hashlib.sha1(config.DATABASE_URL.encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(tempfile.gettempdir(), f"firewall-topology-init-{digest}.lock")
+    with open(path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create tables and indexes, seed sample data and build the topology cache")
+    parser.add_argument("--no-seed", action="store_true", help="do not create sample data")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    init_database(seed=not args.no_seed)
+    engine.dispose()
+    print(f"Database initialized in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
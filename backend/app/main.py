@@ -1,24 +1,28 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine, Base, SessionLocal
+from app import config, metrics
+from app.bootstrap import init_database
+from app.database import async_engine
 from app.routers import examples, network_segments, firewalls, firewall_rules, topology
-from app.seed_data import seed_database
 
-# Import models to register with Base
-from app.models import topology_connection  # noqa: F401
+# import 시에는 I/O를 하지 않는다. 테이블 생성/샘플 데이터는 app.bootstrap에서 수행하며,
+# INIT_DB_ON_STARTUP이 켜져 있으면 (개발 환경 기본값) lifespan에서 호출한다.
+
 
-# 데이터베이스 테이블 생성
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.INIT_DB_ON_STARTUP:
+        # 이미 요청을 처리 중인 다른 워커가 있을 수 있으므로 연결 캐시는 비어 있을 때만 구성
+        init_database(reset_cache=False)
+    yield
+    # 비동기 커넥션 풀 정리 (aiosqlite 연결은 종료되지 않은 스레드를 가짐)
+    await async_engine.dispose()
 
-# 초기 샘플 데이터 생성 (개발 환경)
-db = SessionLocal()
-try:
-    seed_database(db)
-finally:
-    db.close()
 
-app = FastAPI(title="Module 5 API", version="1.0.0")
+app = FastAPI(title="Module 5 API", version="1.0.0", lifespan=lifespan)
 
 # CORS 설정
 app.add_middleware(
@@ -27,8 +31,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# 요청 메트릭 (가장 바깥 미들웨어로 등록해 CORS 처리까지 포함한 지연 시간을 측정)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # 라우터 등록
 app.include_router(examples.router)
 app.include_router(network_segments.router)
@@ -40,3 +48,9 @@ app.include_router(topology.router)
 @app.get("/api/health")
 def health_check():
     return {"status": "ok", "message": "FastAPI 서버가 정상 작동 중입니다."}
+
+
+@app.get("/api/metrics")
+def get_metrics():
+    """라우트별 지연 시간/크기 히스토그램, 상태 코드별 요청 수 (Prometheus 텍스트 형식)"""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,200 @@
+"""
+요청 메트릭 수집 (ASGI 미들웨어)과 Prometheus 텍스트 형식 출력
+
+라우트(경로 템플릿)별로 지연 시간/요청 크기/응답 크기 히스토그램과 상태 코드별 요청 수,
+처리 중인 요청 수를 집계한다. 모든 갱신은 이벤트 루프 스레드에서만 일어나므로
+잠금 없이 정수 덧셈과 버킷 이분 탐색만 수행한다.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+import time
+
+# 지연 시간 버킷 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 요청/응답 크기 버킷 (바이트)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# 라우트에 매칭되지 않은 요청 (404 스캔 등)의 라벨: 경로를 그대로 쓰면 라벨 수가 무한히 늘어남
+UNMATCHED_ROUTE = "<unmatched>"
+
+# 표준 HTTP 메서드 (그 외의 메서드는 OTHER로 묶어 라벨 수를 제한)
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "DELETE", "CONNECT", "OPTIONS", "TRACE", "PATCH"})
+OTHER_METHOD = "OTHER"
+
+# Response가 charset=utf-8을 덧붙인다
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+class Histogram:
+    """누적하지 않은 버킷별 개수와 합계 (출력할 때 누적)"""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{_format_value(bound)}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class RouteStats:
+    """한 (method, route)의 집계"""
+
+    __slots__ = ("latency", "request_size", "response_size", "statuses", "exceptions")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.request_size = Histogram(SIZE_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.statuses: Dict[int, int] = {}
+        self.exceptions = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.started_at = time.time()
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.in_flight: Dict[str, int] = {}
+
+    def stats(self, method: str, route: str) -> RouteStats:
+        key = (method, route)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = RouteStats()
+        return stats
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식 (exposition format 0.0.4)"""
+        routes = sorted(self.routes.items())
+        lines = [
+            "# HELP process_start_time_seconds Start time of the process since unix epoch in seconds.",
+            "# TYPE process_start_time_seconds gauge",
+            f"process_start_time_seconds {_format_value(self.started_at)}",
+            "# HELP http_requests_in_flight Requests currently being processed.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        for method, count in sorted(self.in_flight.items()):
+            lines.append(f'http_requests_in_flight{{method="{_escape(method)}"}} {count}')
+
+        lines += [
+            "# HELP http_requests_total Completed requests by route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), stats in routes:
+            labels = _labels(method, route)
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'http_requests_total{{{labels},status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_request_exceptions_total Requests that raised an unhandled exception.",
+            "# TYPE http_request_exceptions_total counter",
+        ]
+        for (method, route), stats in routes:
+            if stats.exceptions:
+                lines.append(f"http_request_exceptions_total{{{_labels(method, route)}}} {stats.exceptions}")
+
+        for name, attribute, help_text in (
+            ("http_request_duration_seconds", "latency", "Request latency until the last response byte is sent."),
+            ("http_request_size_bytes", "request_size", "Request body size in bytes."),
+            ("http_response_size_bytes", "response_size", "Response body size in bytes."),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), stats in routes:
+                lines.extend(getattr(stats, attribute).samples(name, _labels(method, route)))
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """
+    요청마다 registry에 지연 시간, 요청/응답 크기, 상태 코드를 기록하는 순수 ASGI 미들웨어
+
+    BaseHTTPMiddleware와 달리 응답 본문을 감싸지 않고 send/receive 메시지만 세므로
+    스트리밍 응답(CSV 내보내기, SSE)도 그대로 흘려보낸다. 라우트 라벨은 라우팅이 끝난 뒤
+    scope에 남는 경로 템플릿 (예: /api/firewall-rules/{rule_id})을 사용한다.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        if method not in HTTP_METHODS:
+            method = OTHER_METHOD
+        in_flight = self.registry.in_flight
+        in_flight[method] = in_flight.get(method, 0) + 1
+        started = time.perf_counter()
+        request_bytes = 0
+        response_bytes = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal response_bytes, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        failed = False
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            in_flight[method] -= 1
+            route = scope.get("route")
+            stats = self.registry.stats(method, getattr(route, "path", UNMATCHED_ROUTE))
+            stats.latency.observe(time.perf_counter() - started)
+            stats.request_size.observe(request_bytes)
+            stats.response_size.observe(response_bytes)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if failed:
+                stats.exceptions += 1
+
+
+def _labels(method: str, route: str) -> str:
+    return f'method="{_escape(method)}",route="{_escape(route)}"'
+
+
+def _escape(value: str) -> str:
+    """라벨 값 이스케이프 (역슬래시, 큰따옴표, 줄바꿈)"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
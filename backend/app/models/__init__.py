@@ -2,5 +2,18 @@ from app.models.example import Example
 from app.models.network_segment import NetworkSegment
 from app.models.firewall import Firewall
 from app.models.firewall_rule import FirewallRule
+# 캐시/이력 테이블: 패키지 import만으로 Base.metadata.create_all 대상에 등록되도록 함께 import
+from app.models.segment_position import SegmentPosition
+from app.models.topology_change import TopologyChange, TopologyVersion
+from app.models.topology_connection import TopologyConnection
 
-__all__ = ["Example", "NetworkSegment", "Firewall", "FirewallRule"]
+__all__ = [
+    "Example",
+    "NetworkSegment",
+    "Firewall",
+    "FirewallRule",
+    "SegmentPosition",
+    "TopologyChange",
+    "TopologyVersion",
+    "TopologyConnection"
+]
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Float, Integer, String
+
+from app.database import Base
+
+
+class SegmentPosition(Base):
+    """
+    서버에서 계산한 토폴로지 그래프 노드 좌표 (세그먼트당 한 행)
+
+    처음에는 전체 레이아웃을 한 번 계산하고, 이후에는 세그먼트 변경 트랜잭션에서 새로 생겼거나
+    zone이 바뀐 세그먼트만 빈 자리에 배치하므로 다른 노드의 좌표는 바뀌지 않는다
+    (app.services.graph_layout 참고).
+    """
+    __tablename__ = "segment_position"
+
+    segment_id = Column(Integer, primary_key=True)
+    # 배치 당시의 zone (zone이 바뀌면 해당 zone 블록으로 다시 배치)
+    zone_type = Column(String(50), nullable=False)
+    x = Column(Float, nullable=False)
+    y = Column(Float, nullable=False)
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class TopologyVersion(Base):
+    """
+    토폴로지 버전 카운터 (id = 1인 한 행)
+
+    세그먼트/규칙을 변경하는 트랜잭션이 UPDATE ... SET version = version + 1로 증가시킨다.
+    행 잠금 때문에 쓰기 트랜잭션이 이 행에서 직렬화되므로 버전은 커밋 순서대로 증가한다
+    (PostgreSQL의 시퀀스 ID는 커밋 순서와 다를 수 있음). 여러 워커 프로세스가 메모리 캐시의
+    유효성을 이 값으로 판단한다.
+    """
+    __tablename__ = "topology_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    # 마지막 세그먼트 변경의 버전 (세그먼트만 참조하는 캐시용)
+    segment_version = Column(Integer, nullable=False, default=0)
+
+
+class TopologyChange(Base):
+    """
+    토폴로지 변경 이력
+    각 행은 변경을 수행한 트랜잭션의 토폴로지 버전(version)을 가진다.
+    """
+    __tablename__ = "topology_changes"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, index=True)
+    entity = Column(String(20), nullable=False)  # segment/rule
+    operation = Column(String(20), nullable=False)  # create/update/delete
+    entity_id = Column(Integer, nullable=False)
+    # 규칙 변경 시 영향받는 세그먼트 쌍
+    source_segment_id = Column(Integer, nullable=True)
+    destination_segment_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_topology_change_entity', 'entity', 'entity_id'),
+        # 변경 이력 순서가 유지되도록 id 재사용 방지
+        {'sqlite_autoincrement': True},
+    )
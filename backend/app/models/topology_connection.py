@@ -8,6 +8,9 @@ class TopologyConnection(Base):
     """
     미리 계산된 토폴로지 연결 정보를 캐싱
     대규모 규칙 세트에서 성능 최적화용
+
+    (source, destination) 세그먼트 쌍마다 한 행이며, 규칙 생성/수정/삭제 시
+    해당 쌍만 다시 계산된다 (app.services.topology_service 참고).
     """
     __tablename__ = "topology_connection"
 
@@ -20,6 +23,9 @@ class TopologyConnection(Base):
     protocols = Column(Text, nullable=False)  # '["TCP", "UDP"]'
     ports = Column(Text, nullable=False)  # '["80", "443"]'
     actions = Column(Text, nullable=False)  # '["ALLOW"]'
+    descriptions = Column(Text, nullable=False)  # '["Web traffic"]'
+    # 필터 적용 시 재병합용 규칙별 정보: '[[id, protocol, port_range, action, description], ...]'
+    rule_details = Column(Text, nullable=False)
 
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
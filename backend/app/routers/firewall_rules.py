@@ -1,14 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from typing import List, Union
 from pydantic import BaseModel
 import io
-import csv
 
-from app.database import get_db
+import orjson
+
+from app.database import get_db, get_async_db
 from app.models.firewall_rule import FirewallRule as FirewallRuleModel
-from app.schemas.firewall_rule import FirewallRuleCreate, FirewallRule
+from app.models.network_segment import NetworkSegment as NetworkSegmentModel
+from app.schemas.firewall_rule import (
+    FirewallRuleCreate,
+    FirewallRule,
+    FirewallRulePage,
+    FirewallRuleBulkCreate,
+    FirewallRuleBulkPatch,
+    BulkRuleResult,
+    RuleAnomalyReport
+)
+from app.services.csv_export import iter_csv
+from app.services.csv_import import import_rules
+from app.services.pagination import decode_cursor, next_cursor
+from app.services.rule_anomalies import find_rule_anomalies
+from app.services.rule_bulk import bulk_create_rules, bulk_update_rules
+from app.services.topology_service import refresh_topology_connections
+from app.services.topology_version import record_rule_changes
 
 router = APIRouter(prefix="/api/firewall-rules", tags=["firewall-rules"])
 
@@ -17,55 +36,115 @@ class BulkDeleteRequest(BaseModel):
     ids: List[int]
 
 
-@router.get("/", response_model=List[FirewallRule])
-def get_firewall_rules(
+_source_segment = aliased(NetworkSegmentModel)
+_destination_segment = aliased(NetworkSegmentModel)
+
+# Columns of the FirewallRule response model in its field order, selected directly (no ORM objects)
+_RULE_COLUMNS = (
+    FirewallRuleModel.firewall_id,
+    FirewallRuleModel.rule_name,
+    FirewallRuleModel.source_segment_id,
+    FirewallRuleModel.destination_segment_id,
+    FirewallRuleModel.protocol,
+    FirewallRuleModel.port_range,
+    FirewallRuleModel.action,
+    FirewallRuleModel.description,
+    FirewallRuleModel.id,
+    FirewallRuleModel.created_at,
+    FirewallRuleModel.updated_at,
+    _source_segment.ip_range.label("source_segment_ip"),
+    _source_segment.name.label("source_segment_name"),
+    _destination_segment.ip_range.label("destination_segment_ip"),
+    _destination_segment.name.label("destination_segment_name"),
+)
+_RULE_KEYS = tuple(column.key for column in _RULE_COLUMNS)
+
+
+def _rule_projection():
+    """SELECT of the response columns with segment names/IPs joined in"""
+    return select(*_RULE_COLUMNS).outerjoin(
+        _source_segment, _source_segment.id == FirewallRuleModel.source_segment_id
+    ).outerjoin(
+        _destination_segment, _destination_segment.id == FirewallRuleModel.destination_segment_id
+    )
+
+
+def _json_response(payload, headers: dict | None = None) -> Response:
+    """
+    Serialize straight to bytes with orjson
+
+    Rows built from the projection already have the response model's shape, so
+    returning a Response skips FastAPI's response_model validation pass.
+    Aware UTC datetimes end in "Z", matching pydantic's encoding.
+    """
+    return Response(
+        content=orjson.dumps(payload, option=orjson.OPT_UTC_Z),
+        media_type="application/json",
+        headers=headers
+    )
+
+
+@router.get("/", response_model=Union[List[FirewallRule], FirewallRulePage])
+async def get_firewall_rules(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = Query(None, description="Opaque cursor from X-Next-Cursor (replaces skip)"),
+    include_total: bool = Query(False, description="Return {items, total, next_cursor} instead of a list"),
     firewall_id: int | None = Query(None, description="Filter by firewall ID"),
     protocol: str | None = Query(None, description="Filter by protocol"),
     action: str | None = Query(None, description="Filter by action"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get list of firewall rules with pagination and filters
+    Get list of firewall rules with pagination and filters (async session)
+
+    Rules are ordered by id. When a full page is returned, the X-Next-Cursor
+    response header holds a cursor for the next page; passing it back as
+    ``cursor`` seeks past the last id instead of skipping rows, so deep pages
+    cost the same as the first one.
+
+    With ``include_total`` the page and the total count of the filtered rules
+    come back from a single statement (the count is an uncorrelated scalar
+    subquery), replacing a separate call to /count.
+
+    Rows are read as a column projection joined to the segment names/IPs (no ORM
+    objects) and encoded directly with orjson.
     """
-    query = db.query(FirewallRuleModel).options(
-        joinedload(FirewallRuleModel.source_segment),
-        joinedload(FirewallRuleModel.destination_segment)
-    )
+    filters = _rule_filters(firewall_id, protocol, action)
 
-    if firewall_id:
-        query = query.filter(FirewallRuleModel.firewall_id == firewall_id)
-    if protocol:
-        query = query.filter(FirewallRuleModel.protocol == protocol.upper())
-    if action:
-        query = query.filter(FirewallRuleModel.action == action.upper())
-
-    rules = query.offset(skip).limit(limit).all()
-
-    # Add IP and name info to response
-    result = []
-    for rule in rules:
-        rule_dict = {
-            "id": rule.id,
-            "firewall_id": rule.firewall_id,
-            "rule_name": rule.rule_name,
-            "source_segment_id": rule.source_segment_id,
-            "destination_segment_id": rule.destination_segment_id,
-            "protocol": rule.protocol,
-            "port_range": rule.port_range,
-            "action": rule.action,
-            "description": rule.description,
-            "created_at": rule.created_at,
-            "updated_at": rule.updated_at,
-            "source_segment_ip": rule.source_segment.ip_range if rule.source_segment else None,
-            "source_segment_name": rule.source_segment.name if rule.source_segment else None,
-            "destination_segment_ip": rule.destination_segment.ip_range if rule.destination_segment else None,
-            "destination_segment_name": rule.destination_segment.name if rule.destination_segment else None,
-        }
-        result.append(rule_dict)
-
-    return result
+    query = _rule_projection().where(*filters)
+
+    if include_total:
+        query = query.add_columns(
+            select(func.count(FirewallRuleModel.id)).where(*filters).scalar_subquery()
+        )
+
+    query = query.order_by(FirewallRuleModel.id)
+    if cursor:
+        try:
+            query = query.where(FirewallRuleModel.id > decode_cursor(cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        query = query.offset(skip)
+
+    rows = (await db.execute(query.limit(limit))).all()
+    result = [dict(zip(_RULE_KEYS, row)) for row in rows]
+
+    if include_total:
+        if rows:
+            total = rows[0][-1]
+        elif skip or cursor:
+            total = await db.scalar(select(func.count(FirewallRuleModel.id)).where(*filters))
+        else:
+            total = 0
+
+    cursor_value = next_cursor(result, limit)
+    headers = {"X-Next-Cursor": cursor_value} if cursor_value else None
+
+    if include_total:
+        return _json_response({"items": result, "total": total, "next_cursor": cursor_value}, headers)
+    return _json_response(result, headers)
 
 
 @router.get("/count", response_model=dict)
@@ -78,90 +157,101 @@ def get_firewall_rules_count(
     """
     Get total count of firewall rules
     """
-    query = db.query(FirewallRuleModel)
-
-    if firewall_id:
-        query = query.filter(FirewallRuleModel.firewall_id == firewall_id)
-    if protocol:
-        query = query.filter(FirewallRuleModel.protocol == protocol.upper())
-    if action:
-        query = query.filter(FirewallRuleModel.action == action.upper())
+    query = db.query(FirewallRuleModel).filter(*_rule_filters(firewall_id, protocol, action))
 
     total = query.count()
     return {"total": total}
 
 
-@router.get("/export/csv")
-def export_rules_csv(db: Session = Depends(get_db)):
+@router.get("/analysis/anomalies", response_model=RuleAnomalyReport)
+def get_rule_anomalies(
+    firewall_id: int | None = Query(None, description="Analyze only this firewall's rules"),
+    type: str | None = Query(None, pattern="^(duplicate|shadowed|redundant|conflict)$", description="Only return this anomaly type"),
+    limit: int = Query(1000, ge=1, le=10000, description="Max number of anomalies to return"),
+    db: Session = Depends(get_db)
+):
     """
-    Export all firewall rules to CSV
+    Find duplicate, shadowed, redundant and conflicting rules
+
+    Rules are evaluated first-match in id order within each firewall and
+    (source, destination) segment pair. A rule is shadowed or redundant when
+    earlier rules already match all of its traffic (with a different or the
+    same action), and conflicting when part of its traffic is matched first by
+    a rule with the opposite action.
     """
-    rules = db.query(FirewallRuleModel).all()
+    return find_rule_anomalies(db, firewall_id=firewall_id, anomaly_type=type, limit=limit)
 
-    output = io.StringIO()
-    writer = csv.writer(output)
 
-    # Header
-    writer.writerow([
-        'id', 'firewall_id', 'rule_name', 'source_segment_id',
-        'destination_segment_id', 'protocol', 'port_range', 'action', 'description'
-    ])
+def _rule_filters(firewall_id: int | None, protocol: str | None, action: str | None) -> list:
+    """Filter conditions shared by the list and count endpoints"""
+    filters = []
+    if firewall_id:
+        filters.append(FirewallRuleModel.firewall_id == firewall_id)
+    if protocol:
+        filters.append(FirewallRuleModel.protocol == protocol.upper())
+    if action:
+        filters.append(FirewallRuleModel.action == action.upper())
+    return filters
 
-    # Data
-    for rule in rules:
-        writer.writerow([
-            rule.id,
-            rule.firewall_id,
-            rule.rule_name,
-            rule.source_segment_id,
-            rule.destination_segment_id,
-            rule.protocol,
-            rule.port_range or '',
-            rule.action,
-            rule.description or ''
-        ])
 
-    output.seek(0)
+@router.get("/export/csv")
+def export_rules_csv():
+    """
+    Export all firewall rules to CSV (streamed in chunks)
+    """
+    columns = [
+        FirewallRuleModel.id,
+        FirewallRuleModel.firewall_id,
+        FirewallRuleModel.rule_name,
+        FirewallRuleModel.source_segment_id,
+        FirewallRuleModel.destination_segment_id,
+        FirewallRuleModel.protocol,
+        FirewallRuleModel.port_range,
+        FirewallRuleModel.action,
+        FirewallRuleModel.description,
+    ]
 
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+        iter_csv([column.key for column in columns], select(*columns).order_by(FirewallRuleModel.id)),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=firewall_rules.csv"}
     )
 
 
+@router.post("/import/csv")
+def import_rules_csv(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Import firewall rules from CSV
+
+    CSV format: firewall_id, rule_name, source_segment_id, destination_segment_id,
+    protocol, port_range, action, description (same as the export). Firewalls and
+    segments may be referenced by name with firewall, source_segment and
+    destination_segment columns instead.
+
+    The upload is parsed as a stream and committed in chunks; invalid or duplicate
+    rows are reported per row and skipped.
+    """
+    stream = io.TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
+    try:
+        return import_rules(db, stream)
+    finally:
+        stream.detach()
+
+
 @router.get("/{rule_id}", response_model=FirewallRule)
 def get_firewall_rule(rule_id: int, db: Session = Depends(get_db)):
     """
     Get single firewall rule with relationships
     """
-    rule = db.query(FirewallRuleModel).options(
-        joinedload(FirewallRuleModel.firewall),
-        joinedload(FirewallRuleModel.source_segment),
-        joinedload(FirewallRuleModel.destination_segment)
-    ).filter(FirewallRuleModel.id == rule_id).first()
+    row = db.execute(_rule_projection().where(FirewallRuleModel.id == rule_id)).first()
 
-    if not rule:
+    if not row:
         raise HTTPException(status_code=404, detail="Rule not found")
 
-    # Add IP and name info to response
-    return {
-        "id": rule.id,
-        "firewall_id": rule.firewall_id,
-        "rule_name": rule.rule_name,
-        "source_segment_id": rule.source_segment_id,
-        "destination_segment_id": rule.destination_segment_id,
-        "protocol": rule.protocol,
-        "port_range": rule.port_range,
-        "action": rule.action,
-        "description": rule.description,
-        "created_at": rule.created_at,
-        "updated_at": rule.updated_at,
-        "source_segment_ip": rule.source_segment.ip_range if rule.source_segment else None,
-        "source_segment_name": rule.source_segment.name if rule.source_segment else None,
-        "destination_segment_ip": rule.destination_segment.ip_range if rule.destination_segment else None,
-        "destination_segment_name": rule.destination_segment.name if rule.destination_segment else None,
-    }
+    return _json_response(dict(zip(_RULE_KEYS, row)))
 
 
 @router.post("/", response_model=FirewallRule)
@@ -169,6 +259,8 @@ def create_firewall_rule(rule: FirewallRuleCreate, db: Session = Depends(get_db)
     """Create a new firewall rule"""
     db_rule = FirewallRuleModel(**rule.model_dump())
     db.add(db_rule)
+    refresh_topology_connections(db, [(db_rule.source_segment_id, db_rule.destination_segment_id)])
+    record_rule_changes(db, "create", [(db_rule.id, db_rule.source_segment_id, db_rule.destination_segment_id)])
     db.commit()
     db.refresh(db_rule)
     return db_rule
@@ -181,9 +273,13 @@ def update_firewall_rule(rule_id: int, rule: FirewallRuleCreate, db: Session = D
     if not db_rule:
         raise HTTPException(status_code=404, detail="Firewall rule not found")
 
+    old_pair = (db_rule.source_segment_id, db_rule.destination_segment_id)
     for key, value in rule.model_dump().items():
         setattr(db_rule, key, value)
 
+    new_pair = (db_rule.source_segment_id, db_rule.destination_segment_id)
+    refresh_topology_connections(db, [old_pair, new_pair])
+    record_rule_changes(db, "update", [(rule_id, *pair) for pair in {old_pair, new_pair}])
     db.commit()
     db.refresh(db_rule)
     return db_rule
@@ -197,6 +293,8 @@ def delete_firewall_rule(rule_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Firewall rule not found")
 
     db.delete(db_rule)
+    refresh_topology_connections(db, [(db_rule.source_segment_id, db_rule.destination_segment_id)])
+    record_rule_changes(db, "delete", [(rule_id, db_rule.source_segment_id, db_rule.destination_segment_id)])
     db.commit()
     return {"message": "Firewall rule deleted successfully"}
 
@@ -209,13 +307,51 @@ def bulk_delete_rules(
     """
     Delete multiple firewall rules at once
     """
+    deleted_rules = db.query(
+        FirewallRuleModel.id,
+        FirewallRuleModel.source_segment_id,
+        FirewallRuleModel.destination_segment_id
+    ).filter(FirewallRuleModel.id.in_(request.ids)).all()
+
     deleted_count = db.query(FirewallRuleModel).filter(
         FirewallRuleModel.id.in_(request.ids)
     ).delete(synchronize_session=False)
 
+    refresh_topology_connections(db, [(source_id, dest_id) for _, source_id, dest_id in deleted_rules])
+    record_rule_changes(db, "delete", deleted_rules)
     db.commit()
 
     return {
         "success": True,
         "deleted": deleted_count
     }
+
+
+@router.post("/bulk", response_model=BulkRuleResult)
+def bulk_create_firewall_rules(request: FirewallRuleBulkCreate, db: Session = Depends(get_db)):
+    """
+    Create many firewall rules in one transaction
+
+    Firewall and segment references are validated for all items at once and the
+    rules are inserted with a single executemany statement. Results are returned
+    per item in request order. With ``atomic`` (default) nothing is created when
+    any item is invalid.
+    """
+    return bulk_create_rules(db, [rule.model_dump() for rule in request.rules], atomic=request.atomic)
+
+
+@router.patch("/bulk", response_model=BulkRuleResult)
+def bulk_patch_firewall_rules(request: FirewallRuleBulkPatch, db: Session = Depends(get_db)):
+    """
+    Partially update many firewall rules in one transaction
+
+    Each item has the rule ``id`` and only the fields to change (an explicit null
+    clears ``port_range`` or ``description``). Results are returned per item in
+    request order. With ``atomic`` (default) nothing is changed when any item is
+    invalid or refers to a missing rule.
+    """
+    return bulk_update_rules(
+        db,
+        [rule.model_dump(exclude_unset=True) for rule in request.rules],
+        atomic=request.atomic
+    )
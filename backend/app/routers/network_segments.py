@@ -1,33 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File
 from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Union
 import io
-import csv
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.network_segment import NetworkSegment as NetworkSegmentModel
-from app.schemas.network_segment import NetworkSegmentCreate, NetworkSegment
+from app.schemas.network_segment import (
+    NetworkSegmentCreate,
+    NetworkSegment,
+    NetworkSegmentPage,
+    SegmentClassifyRequest,
+    SegmentClassifyResponse
+)
+from app.services.csv_export import iter_csv
+from app.services.csv_import import import_segments
+from app.services.graph_layout import refresh_segment_layout
+from app.services.pagination import decode_cursor, next_cursor
+from app.services.topology_version import record_segment_changes
 
 router = APIRouter(prefix="/api/network-segments", tags=["network-segments"])
 
 
-@router.get("/", response_model=List[NetworkSegment])
-def get_network_segments(
+@router.get("/", response_model=Union[List[NetworkSegment], NetworkSegmentPage])
+async def get_network_segments(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=500, description="Max number of records to return"),
+    cursor: str | None = Query(None, description="Opaque cursor from X-Next-Cursor (replaces skip)"),
+    include_total: bool = Query(False, description="Return {items, total, next_cursor} instead of a list"),
     zone_type: str | None = Query(None, description="Filter by zone type"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get list of network segments with pagination
-    """
-    query = db.query(NetworkSegmentModel)
 
+    Segments are ordered by id; see X-Next-Cursor for keyset pagination.
+    With ``include_total`` the page and the total count come from one statement.
+    Runs on the async session, so slow reads do not hold a threadpool worker.
+    """
+    filters = []
     if zone_type:
-        query = query.filter(NetworkSegmentModel.zone_type == zone_type)
+        filters.append(NetworkSegmentModel.zone_type == zone_type)
+
+    query = select(NetworkSegmentModel).where(*filters)
 
-    segments = query.offset(skip).limit(limit).all()
+    if include_total:
+        query = query.add_columns(
+            select(func.count(NetworkSegmentModel.id)).where(*filters).scalar_subquery()
+        )
+
+    query = query.order_by(NetworkSegmentModel.id)
+    if cursor:
+        try:
+            query = query.where(NetworkSegmentModel.id > decode_cursor(cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        query = query.offset(skip)
+
+    rows = (await db.execute(query.limit(limit))).all()
+    if include_total:
+        segments = [segment for segment, _ in rows]
+        if rows:
+            total = rows[0][1]
+        elif skip or cursor:
+            total = await db.scalar(select(func.count(NetworkSegmentModel.id)).where(*filters))
+        else:
+            total = 0
+    else:
+        segments = [segment for segment, in rows]
+
+    cursor_value = next_cursor(segments, limit)
+    if cursor_value:
+        response.headers["X-Next-Cursor"] = cursor_value
+
+    if include_total:
+        return {"items": segments, "total": total, "next_cursor": cursor_value}
     return segments
 
 
@@ -49,39 +100,41 @@ def get_network_segments_count(
 
 
 @router.get("/export/csv")
-def export_segments_csv(db: Session = Depends(get_db)):
+def export_segments_csv():
     """
-    Export all network segments to CSV
+    Export all network segments to CSV (streamed in chunks)
     """
-    segments = db.query(NetworkSegmentModel).all()
-
-    # CSV 생성
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Header
-    writer.writerow(['id', 'name', 'ip_range', 'zone_type', 'color', 'description'])
-
-    # Data
-    for seg in segments:
-        writer.writerow([
-            seg.id,
-            seg.name,
-            seg.ip_range,
-            seg.zone_type,
-            seg.color,
-            seg.description or ''
-        ])
-
-    output.seek(0)
+    columns = [
+        NetworkSegmentModel.id,
+        NetworkSegmentModel.name,
+        NetworkSegmentModel.ip_range,
+        NetworkSegmentModel.zone_type,
+        NetworkSegmentModel.color,
+        NetworkSegmentModel.description,
+    ]
 
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+        iter_csv([column.key for column in columns], select(*columns).order_by(NetworkSegmentModel.id)),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=network_segments.csv"}
     )
 
 
+@router.post("/classify", response_model=SegmentClassifyResponse)
+def classify_addresses(request: SegmentClassifyRequest, db: Session = Depends(get_db)):
+    """
+    Map IP addresses to the most specific network segment containing each one
+
+    Lookups use an in-memory sorted range index of the segment CIDRs, rebuilt
+    only when segments change. Entries that are not IP addresses are listed in
+    ``invalid_indices`` and get no segment.
+    """
+    # NumPy-backed; imported on first use to keep application import fast
+    from app.services.segment_index import classify_ips
+
+    return classify_ips(db, request.ips)
+
+
 @router.get("/{segment_id}", response_model=NetworkSegment)
 def get_network_segment(segment_id: int, db: Session = Depends(get_db)):
     """Get a specific network segment by ID"""
@@ -101,6 +154,9 @@ def create_network_segment(segment: NetworkSegmentCreate, db: Session = Depends(
 
     db_segment = NetworkSegmentModel(**segment.model_dump())
     db.add(db_segment)
+    db.flush()
+    record_segment_changes(db, "create", [db_segment.id])
+    refresh_segment_layout(db, [db_segment.id])
     db.commit()
     db.refresh(db_segment)
     return db_segment
@@ -122,6 +178,8 @@ def update_network_segment(segment_id: int, segment: NetworkSegmentCreate, db: S
     for key, value in segment.model_dump().items():
         setattr(db_segment, key, value)
 
+    record_segment_changes(db, "update", [segment_id])
+    refresh_segment_layout(db, [segment_id])
     db.commit()
     db.refresh(db_segment)
     return db_segment
@@ -135,12 +193,14 @@ def delete_network_segment(segment_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Network segment not found")
 
     db.delete(db_segment)
+    record_segment_changes(db, "delete", [segment_id])
+    refresh_segment_layout(db, [segment_id])
     db.commit()
     return {"message": "Network segment deleted successfully"}
 
 
 @router.post("/import/csv")
-async def import_segments_csv(
+def import_segments_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -148,47 +208,12 @@ async def import_segments_csv(
     Import network segments from CSV
 
     CSV format: name, ip_range, zone_type, color, description
-    """
-    content = await file.read()
-    decoded = content.decode('utf-8')
-
-    reader = csv.DictReader(io.StringIO(decoded))
-    created_count = 0
-    errors = []
-
-    for row in reader:
-        try:
-            # Validate required fields
-            if not all([row.get('name'), row.get('ip_range'), row.get('zone_type')]):
-                errors.append(f"Row missing required fields: {row}")
-                continue
-
-            # Create segment
-            segment = NetworkSegmentModel(
-                name=row['name'],
-                ip_range=row['ip_range'],
-                zone_type=row['zone_type'],
-                color=row.get('color', '#CCCCCC'),
-                description=row.get('description')
-            )
-            db.add(segment)
-            created_count += 1
-        except Exception as e:
-            errors.append(f"Error processing row {row}: {str(e)}")
 
+    The upload is parsed as a stream and committed in chunks; rows with missing
+    fields, invalid CIDRs or duplicate names are reported per row and skipped.
+    """
+    stream = io.TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
     try:
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        return {
-            "success": False,
-            "message": f"Failed to commit: {str(e)}",
-            "created": 0,
-            "errors": errors
-        }
-
-    return {
-        "success": True,
-        "created": created_count,
-        "errors": errors
-    }
+        return import_segments(db, stream)
+    finally:
+        stream.detach()
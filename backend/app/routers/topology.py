@@ -1,29 +1,57 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, AsyncIterator, Callable, List, Optional
+import asyncio
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, SessionLocal, get_db, get_async_db
 from app.schemas.topology import (
     TopologyGraph,
+    TopologyDelta,
+    FlowEvaluationRequest,
+    FlowEvaluationResponse,
     PathAnalysisRequest,
     PathAnalysisResponse,
+    PathAnalysisBatchRequest,
+    PathAnalysisBatchResponse,
+    ReachabilityMatrixResponse,
     RuleImpactRequest,
     RuleImpactResponse
 )
-from app.services.topology_service import build_topology_graph
-from app.services.path_analyzer import find_path, analyze_rule_impact
-from app.models.network_segment import NetworkSegment
-from app.models.firewall_rule import FirewallRule
+from app.services.topology_service import (
+    build_topology_delta,
+    normalize_graph_filters,
+    normalize_graph_view,
+    render_topology_graph,
+    topology_graph_etag
+)
+from app.services.topology_version import get_topology_version
+from app.services.path_analyzer import find_path, find_paths, analyze_rule_impact
+from app.services.pagination import decode_offsets, encode_offsets
+from app.services.reachability import get_reachability_matrix
+from app.services.search_index import search_topology
 
 router = APIRouter(prefix="/api/topology", tags=["topology"])
 
+# Seconds between topology version checks of an open change stream
+STREAM_POLL_INTERVAL = 1.0
+
+# Seconds of inactivity after which a keep-alive comment is sent on the stream
+STREAM_KEEPALIVE_INTERVAL = 15.0
+
 
 @router.get("/graph", response_model=TopologyGraph)
-def get_topology_graph(
+async def get_topology_graph(
     zone_types: Optional[List[str]] = Query(None, description="Filter by zone types (e.g., DMZ, Internal)"),
     protocols: Optional[List[str]] = Query(None, description="Filter by protocols (e.g., TCP, UDP)"),
     action: Optional[str] = Query(None, description="Filter by action (ALLOW or DENY)"),
-    db: Session = Depends(get_db)
+    level: str = Query("segment", pattern="^(segment|zone|cidr-supernet)$", description="Node granularity"),
+    prefix_length: int = Query(16, ge=1, le=32, description="IPv4 supernet prefix length for level=cidr-supernet"),
+    expand: Optional[str] = Query(None, description="Cluster id to show with its member segments"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get network topology graph based on firewall rules
@@ -33,15 +61,147 @@ def get_topology_graph(
     - edges: Firewall rules connecting segments
 
     Filters can be applied to show only specific zone types, protocols, or actions.
+
+    With level=zone or level=cidr-supernet segments are collapsed into one node
+    per zone type or per supernet (ids ``zone-<zone_type>`` / ``supernet-<cidr>``)
+    and edges carry aggregated rule counts, allow/deny counts and protocol sets.
+    ``expand`` shows one cluster with its member segments (nodes with ``parent``).
+
+    The response carries an ETag derived from the topology version and the
+    filters; a request whose If-None-Match still matches gets 304 Not Modified.
+    Encoded graphs are cached per version and filter combination.
     """
-    graph_data = build_topology_graph(
-        db=db,
+    filters = normalize_graph_filters(zone_types, protocols, action)
+    view = normalize_graph_view(level, prefix_length, expand)
+    version = await db.run_sync(get_topology_version)
+    etag = topology_graph_etag(version, filters, view)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    # Building and encoding the graph is CPU-bound, so it runs in the thread pool
+    # with a sync session instead of on the event loop
+    body = await run_in_threadpool(_run_with_session, render_topology_graph, version, filters, view)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _run_with_session(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Call a sync service function with a short-lived session (for run_in_threadpool)"""
+    db = SessionLocal()
+    try:
+        return func(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, so W/ prefixes added by proxies are ignored)"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+# Nodes keep the /graph shape: fields the graph builder did not set (cluster-only
+# fields on segment nodes) are omitted instead of serialized as null
+@router.get("/graph/changes", response_model=TopologyDelta, response_model_exclude_unset=True)
+async def get_topology_graph_changes(
+    since: int = Query(..., ge=0, description="Topology version the client already has"),
+    zone_types: Optional[List[str]] = Query(None, description="Filter by zone types (e.g., DMZ, Internal)"),
+    protocols: Optional[List[str]] = Query(None, description="Filter by protocols (e.g., TCP, UDP)"),
+    action: Optional[str] = Query(None, description="Filter by action (ALLOW or DENY)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the nodes and edges that changed since a topology version
+
+    Use the same filters as the graph that was loaded. The returned ``version``
+    is the value to pass as ``since`` next time.
+    """
+    version = await db.run_sync(get_topology_version)
+    if since > version:
+        raise HTTPException(status_code=409, detail="Unknown topology version; reload the full graph")
+
+    return await run_in_threadpool(
+        _run_with_session,
+        build_topology_delta,
+        since,
+        version,
         zone_types=zone_types,
         protocols=protocols,
         action=action
     )
 
-    return TopologyGraph(**graph_data)
+
+@router.get("/graph/stream")
+async def stream_topology_graph_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="Topology version the client already has (default: current)"),
+    zone_types: Optional[List[str]] = Query(None, description="Filter by zone types (e.g., DMZ, Internal)"),
+    protocols: Optional[List[str]] = Query(None, description="Filter by protocols (e.g., TCP, UDP)"),
+    action: Optional[str] = Query(None, description="Filter by action (ALLOW or DENY)"),
+    last_event_id: Optional[int] = Header(None)
+):
+    """
+    Server-Sent Events stream of topology graph changes
+
+    Each ``delta`` event carries the same payload as /graph/changes and its
+    event id is the new topology version, so a reconnecting EventSource resumes
+    from where it left off (Last-Event-ID).
+    """
+    start = last_event_id if last_event_id is not None else since
+    return StreamingResponse(
+        _delta_events(request, start, zone_types, protocols, action),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _delta_events(
+    request: Request,
+    since: Optional[int],
+    zone_types: Optional[List[str]],
+    protocols: Optional[List[str]],
+    action: Optional[str]
+) -> AsyncIterator[str]:
+    # The request-scoped session is closed before the body is streamed, so each
+    # poll uses a short-lived session of its own
+    async with AsyncSessionLocal() as db:
+        version = await db.run_sync(get_topology_version)
+    if since is None or since > version:
+        since = version
+    yield f"retry: {int(STREAM_POLL_INTERVAL * 1000)}\nevent: version\ndata: {version}\n\n"
+
+    idle = 0.0
+    while not await request.is_disconnected():
+        async with AsyncSessionLocal() as db:
+            version = await db.run_sync(get_topology_version)
+
+        if version > since:
+            payload = await run_in_threadpool(
+                _run_with_session,
+                _encode_delta,
+                since,
+                version,
+                zone_types=zone_types,
+                protocols=protocols,
+                action=action
+            )
+            since = version
+            idle = 0.0
+            yield f"id: {version}\nevent: delta\ndata: {payload}\n\n"
+        elif idle >= STREAM_KEEPALIVE_INTERVAL:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
+        idle += STREAM_POLL_INTERVAL
+
+
+def _encode_delta(db: Session, since: int, version: int, **filters) -> str:
+    """Build a topology delta and encode it as the /graph/changes JSON body"""
+    delta = build_topology_delta(db, since, version, **filters)
+    return TopologyDelta(**delta).model_dump_json(by_alias=True, exclude_unset=True)
 
 
 @router.post("/path-analysis", response_model=PathAnalysisResponse)
@@ -66,6 +226,80 @@ def analyze_path(
     return PathAnalysisResponse(**result)
 
 
+@router.post("/path-analysis/batch", response_model=PathAnalysisBatchResponse)
+def analyze_paths_batch(
+    request: PathAnalysisBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Analyze many network paths in one request
+
+    Each query is answered exactly like path-analysis; results are returned
+    in the same order as the queries.
+    """
+    results = find_paths(
+        db=db,
+        queries=[
+            (query.source_segment_id, query.destination_segment_id, query.protocol, query.port)
+            for query in request.queries
+        ]
+    )
+
+    return PathAnalysisBatchResponse(results=results)
+
+
+@router.get("/reachability-matrix", response_model=ReachabilityMatrixResponse)
+def get_reachability_matrix_endpoint(
+    protocol: Optional[str] = Query(None, description="Filter by protocol (e.g., TCP)"),
+    port: Optional[int] = Query(None, ge=0, le=65535, description="Filter by destination port"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get reachability between every pair of segments
+
+    Each row gives the segments reachable from one source segment, with the same
+    semantics as path-analysis for the given protocol and port, as a bitset over
+    the ``segments`` list: ``reachable`` is the base64 of a little-endian byte
+    string whose bit i (bit i % 8 of byte i // 8) is set when ``segments[i]`` is
+    reachable.
+    """
+    result = get_reachability_matrix(
+        db=db,
+        protocol=protocol,
+        port=port
+    )
+
+    return ReachabilityMatrixResponse(**result)
+
+
+@router.post("/evaluate-flows", response_model=FlowEvaluationResponse)
+def evaluate_flows_endpoint(
+    request: FlowEvaluationRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Evaluate concrete flows against the firewall rules
+
+    Source and destination IPs are mapped to their most specific segments and
+    each flow gets the action of the first matching rule (lowest rule id) for
+    that segment pair, protocol and port. Flows that match no rule are denied.
+    With ``firewall_id`` only that firewall's rules are evaluated.
+    """
+    # NumPy-backed; imported on first use to keep application import fast
+    from app.services.flow_evaluator import evaluate_flows
+
+    result = evaluate_flows(
+        db=db,
+        flows=[
+            (flow.source_ip, flow.destination_ip, flow.protocol, flow.port)
+            for flow in request.flows
+        ],
+        firewall_id=request.firewall_id
+    )
+
+    return FlowEvaluationResponse(**result)
+
+
 @router.post("/rule-impact", response_model=RuleImpactResponse)
 def analyze_rule_impact_endpoint(
     request: RuleImpactRequest,
@@ -85,51 +319,39 @@ def analyze_rule_impact_endpoint(
 
 
 @router.get("/search")
-def search_topology(
-    q: str = Query(..., description="Search query"),
+async def search_topology_endpoint(
+    q: str = Query(..., description="Search query (words are prefix-matched; an IP or CIDR matches overlapping segments)"),
     type: str | None = Query(None, description="Search type: segment or rule"),
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=500, description="Max number of segments and of rules to return"),
+    cursor: str | None = Query(None, description="Opaque cursor from next_cursor")
 ):
     """
     Search network segments and firewall rules
-    """
-    results = {
-        "segments": [],
-        "rules": []
-    }
 
-    if not type or type == "segment":
-        # 세그먼트 검색 (이름 또는 IP)
-        segments = db.query(NetworkSegment).filter(
-            (NetworkSegment.name.ilike(f"%{q}%")) |
-            (NetworkSegment.ip_range.ilike(f"%{q}%"))
-        ).all()
-
-        results["segments"] = [
-            {
-                "id": seg.id,
-                "name": seg.name,
-                "ip_range": seg.ip_range,
-                "zone_type": seg.zone_type
-            }
-            for seg in segments
-        ]
+    Text queries use a full-text index kept in sync by triggers, ranked by
+    relevance. IP addresses and CIDRs match the segments that contain or
+    overlap them (most specific first) and the rules between those segments.
+    Pass ``next_cursor`` back as ``cursor`` for the next page of both lists.
+    """
+    offsets = {"segments": 0, "rules": 0}
+    if cursor:
+        try:
+            offsets = decode_offsets(cursor, ["segments", "rules"])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    if not type or type == "rule":
-        # 규칙 검색 (이름 또는 설명)
-        rules = db.query(FirewallRule).filter(
-            (FirewallRule.rule_name.ilike(f"%{q}%")) |
-            (FirewallRule.description.ilike(f"%{q}%"))
-        ).all()
-
-        results["rules"] = [
-            {
-                "id": rule.id,
-                "rule_name": rule.rule_name,
-                "protocol": rule.protocol,
-                "action": rule.action
-            }
-            for rule in rules
-        ]
+    result = await run_in_threadpool(
+        _run_with_session,
+        search_topology,
+        q,
+        type,
+        limit,
+        offsets["segments"],
+        offsets["rules"]
+    )
 
-    return results
+    return {
+        "segments": result["segments"],
+        "rules": result["rules"],
+        "next_cursor": encode_offsets(result["offsets"])
+    }
@@ -1,6 +1,8 @@
 from datetime import datetime
-from pydantic import BaseModel
-from typing import Optional, TYPE_CHECKING
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from app.services.port_ranges import parse_port_range
 
 if TYPE_CHECKING:
     from app.schemas.firewall import Firewall
@@ -17,11 +19,63 @@ class FirewallRuleBase(BaseModel):
     action: str
     description: str | None = None
 
+    @field_validator('port_range')
+    @classmethod
+    def validate_port_range(cls, v: str | None) -> str | None:
+        """Validate port range format (e.g. "80", "80,443", "8000-9000")"""
+        if v is None or not v.strip():
+            return None
+        parse_port_range(v)
+        return v.strip()
+
 
 class FirewallRuleCreate(FirewallRuleBase):
     pass
 
 
+class FirewallRulePatch(BaseModel):
+    """Partial update of one rule in a bulk patch; omitted fields are left unchanged"""
+    id: int
+    firewall_id: int | None = None
+    rule_name: str | None = None
+    source_segment_id: int | None = None
+    destination_segment_id: int | None = None
+    protocol: str | None = None
+    port_range: str | None = None
+    action: str | None = None
+    description: str | None = None
+
+    @field_validator('port_range')
+    @classmethod
+    def validate_port_range(cls, v: str | None) -> str | None:
+        return FirewallRuleBase.validate_port_range(v)
+
+
+class FirewallRuleBulkCreate(BaseModel):
+    rules: List[FirewallRuleCreate] = Field(..., min_length=1, max_length=10_000)
+    atomic: bool = True  # apply nothing if any item is invalid
+
+
+class FirewallRuleBulkPatch(BaseModel):
+    rules: List[FirewallRulePatch] = Field(..., min_length=1, max_length=10_000)
+    atomic: bool = True
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: int | None = None
+    status: str  # created/updated/skipped/error
+    error: str | None = None
+
+
+class BulkRuleResult(BaseModel):
+    """Per-item results in request order; all applied items were committed in one transaction"""
+    success: bool
+    applied: int
+    failed: int
+    results: List[BulkItemResult]
+
+
 class FirewallRule(FirewallRuleBase):
     id: int
     created_at: datetime
@@ -35,6 +89,30 @@ class FirewallRule(FirewallRuleBase):
         from_attributes = True
 
 
+class FirewallRulePage(BaseModel):
+    """A page of rules with the total count of the filtered rules"""
+    items: List[FirewallRule]
+    total: int
+    next_cursor: str | None = None
+
+
+class RuleAnomaly(BaseModel):
+    rule_id: int
+    rule_name: str
+    type: str  # duplicate/shadowed/redundant/conflict
+    source_segment_id: int
+    destination_segment_id: int
+    related_rule_ids: List[int]
+
+
+class RuleAnomalyReport(BaseModel):
+    """Anomalies ordered by rule id; summary counts all anomalies before filtering"""
+    firewall_id: int | None = None
+    rules_analyzed: int
+    summary: Dict[str, int]
+    anomalies: List[RuleAnomaly]
+
+
 class FirewallRuleWithRelations(FirewallRule):
     """Rule with full relationship data"""
     firewall: Optional["Firewall"] = None
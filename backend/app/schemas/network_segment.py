@@ -1,5 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
 import ipaddress
 
 
@@ -32,3 +33,28 @@ class NetworkSegment(NetworkSegmentBase):
 
     class Config:
         from_attributes = True
+
+
+class NetworkSegmentPage(BaseModel):
+    """A page of segments with the total count of the filtered segments"""
+    items: List[NetworkSegment]
+    total: int
+    next_cursor: str | None = None
+
+
+class SegmentClassifyRequest(BaseModel):
+    ips: List[str] = Field(..., max_length=5_000_000)
+
+
+class ClassifiedSegment(BaseModel):
+    id: int
+    name: str
+    ip_range: str
+    zone_type: str
+
+
+class SegmentClassifyResponse(BaseModel):
+    """Most specific containing segment per IP, in request order (None if no segment contains it)"""
+    segment_ids: List[Optional[int]]
+    invalid_indices: List[int]
+    segments: List[ClassifiedSegment]
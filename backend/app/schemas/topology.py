@@ -3,13 +3,19 @@ from typing import List, Dict, Any
 
 
 class TopologyNode(BaseModel):
-    """Node representing a network segment in topology graph"""
+    """Node representing a network segment (or a cluster of segments) in topology graph"""
     id: str
     label: str
     ip_range: str
     zone_type: str
     color: str
     description: str | None = None
+    x: float | None = None  # precomputed layout position (null until laid out)
+    y: float | None = None
+    kind: str | None = None  # "cluster" for zone / supernet nodes
+    expanded: bool | None = None  # cluster shown with its member segments
+    parent: str | None = None  # cluster id of a segment inside an expanded cluster
+    metadata: Dict[str, Any] | None = None  # cluster aggregates
 
 
 class TopologyEdge(BaseModel):
@@ -30,6 +36,24 @@ class TopologyGraph(BaseModel):
     edges: List[TopologyEdge]
 
 
+class TopologyNodeChanges(BaseModel):
+    upserted: List[TopologyNode]
+    removed: List[str]
+
+
+class TopologyEdgeChanges(BaseModel):
+    upserted: List[TopologyEdge]
+    removed: List[str]
+
+
+class TopologyDelta(BaseModel):
+    """Graph changes between two topology versions (upserted = added or modified)"""
+    since: int
+    version: int
+    nodes: TopologyNodeChanges
+    edges: TopologyEdgeChanges
+
+
 class PathSegment(BaseModel):
     segment_id: int
     segment_name: str
@@ -55,6 +79,30 @@ class PathAnalysisResponse(BaseModel):
     rules_applied: List[RuleApplied]
 
 
+class PathAnalysisBatchRequest(BaseModel):
+    queries: List[PathAnalysisRequest] = Field(..., max_length=10000)
+
+
+class PathAnalysisBatchResponse(BaseModel):
+    """Results in the same order as the request queries"""
+    results: List[PathAnalysisResponse]
+
+
+class ReachabilityRow(BaseModel):
+    source_segment_id: int
+    # Base64 of a little-endian bitset; bit i set = segments[i] is reachable
+    reachable: str
+
+
+class ReachabilityMatrixResponse(BaseModel):
+    """All-pairs reachability, one row per source segment"""
+    version: int
+    protocol: str | None = None
+    port: int | None = None
+    segments: List[PathSegment]
+    rows: List[ReachabilityRow]
+
+
 class AffectedConnection(BaseModel):
     source_segment: str
     destination_segment: str
@@ -76,3 +124,34 @@ class RuleImpactResponse(BaseModel):
     affected_connections: List[AffectedConnection]
     dependent_paths: List[DependentPath]
     warning: str
+
+
+class FlowQuery(BaseModel):
+    source_ip: str
+    destination_ip: str
+    protocol: str
+    port: int | None = Field(None, ge=0, le=65535)
+
+
+class FlowEvaluationRequest(BaseModel):
+    flows: List[FlowQuery] = Field(..., max_length=1_000_000)
+    firewall_id: int | None = None
+
+
+class MatchedRule(BaseModel):
+    id: int
+    rule_name: str
+    protocol: str
+    port_range: str | None = None
+    action: str
+
+
+class FlowEvaluationResponse(BaseModel):
+    """Per-flow verdicts in request order; flows matching no rule are denied (rule_id None)"""
+    version: int
+    verdicts: List[str]
+    rule_ids: List[int | None]
+    source_segment_ids: List[int | None]
+    destination_segment_ids: List[int | None]
+    invalid_indices: List[int]
+    rules: List[MatchedRule]
@@ -0,0 +1,328 @@
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict, deque
+import threading
+
+from app.models.network_segment import NetworkSegment
+from app.models.firewall_rule import FirewallRule
+from app.services.port_ranges import PortIntervals, parse_port_range, port_in_intervals
+from app.services.topology_version import get_topology_version
+
+# 그래프당 보관할 최근 경로 분석 결과 수
+PATH_CACHE_SIZE = 4096
+
+
+class CompiledGraph:
+    """
+    경로 분석용으로 컴파일된 세그먼트 그래프
+
+    세그먼트는 0부터 시작하는 정수 인덱스로, ALLOW 규칙은 병렬 리스트로 보관하며
+    포트 범위는 컴파일 시 한 번만 파싱한다. 특정 토폴로지 버전의 스냅샷이므로
+    생성 후에는 변경하지 않는다.
+    """
+
+    def __init__(self, version: int, segments: List[Tuple[int, str]], rules: List[tuple]):
+        self.version = version
+
+        # 세그먼트: index -> id/name, id -> index
+        self.segment_ids = [seg_id for seg_id, _ in segments]
+        self.segment_names = [name for _, name in segments]
+        self.segment_index = {seg_id: idx for idx, seg_id in enumerate(self.segment_ids)}
+
+        # ALLOW 규칙 (규칙 ID 순서 유지)
+        self.rule_ids: List[int] = []
+        self.rule_names: List[str] = []
+        self.rule_protocols: List[str] = []
+        self.rule_port_ranges: List[Optional[str]] = []
+        self.rule_ports: List[Optional[PortIntervals]] = []
+        self.rule_sources: List[int] = []
+        self.rule_destinations: List[int] = []
+
+        for rule_id, rule_name, source_id, dest_id, protocol, port_range in rules:
+            # 존재하지 않는 세그먼트를 참조하는 규칙은 경로가 될 수 없음
+            if source_id not in self.segment_index or dest_id not in self.segment_index:
+                continue
+            self.rule_ids.append(rule_id)
+            self.rule_names.append(rule_name)
+            self.rule_protocols.append(protocol)
+            self.rule_port_ranges.append(port_range)
+            self.rule_ports.append(_compile_port_range(port_range) if port_range else None)
+            self.rule_sources.append(self.segment_index[source_id])
+            self.rule_destinations.append(self.segment_index[dest_id])
+
+        self.rule_index = {rule_id: idx for idx, rule_id in enumerate(self.rule_ids)}
+
+        # 필터별 파생 데이터 캐시 (reachability 모듈이 전이 폐쇄를 보관)
+        self.closure_cache: Dict[Tuple[Optional[str], Optional[int]], Any] = {}
+        self._adjacency_cache: Dict[Tuple[Optional[str], Optional[int]], tuple] = {}
+        self._path_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def adjacency(
+        self,
+        protocol: Optional[str] = None,
+        port: Optional[int] = None
+    ) -> Tuple[List[List[Tuple[int, int]]], frozenset]:
+        """
+        프로토콜/포트 필터별 인접 리스트
+
+        Returns:
+            (adjacency, sources)
+            - adjacency[src_idx] = [(dst_idx, rule_idx), ...]
+            - sources: 프로토콜 필터를 통과한 규칙이 하나라도 있는 출발지 인덱스
+        """
+        key = (protocol.upper() if protocol else None, port)
+        cached = self._adjacency_cache.get(key)
+        if cached is not None:
+            return cached
+
+        protocol_upper = key[0]
+        adjacency: List[List[Tuple[int, int]]] = [[] for _ in self.segment_ids]
+        sources = set()
+
+        for rule_idx in range(len(self.rule_ids)):
+            if not self.matches_protocol(rule_idx, protocol_upper):
+                continue
+
+            source_idx = self.rule_sources[rule_idx]
+            sources.add(source_idx)
+
+            if not self.matches_port(rule_idx, port):
+                continue
+
+            adjacency[source_idx].append((self.rule_destinations[rule_idx], rule_idx))
+
+        result = (adjacency, frozenset(sources))
+        with self._lock:
+            self._adjacency_cache[key] = result
+        return result
+
+    def matches_protocol(self, rule_idx: int, protocol_upper: Optional[str]) -> bool:
+        """규칙이 (대문자) 프로토콜 필터를 통과하는지 확인"""
+        return not protocol_upper or self.rule_protocols[rule_idx] in (protocol_upper, "ANY")
+
+    def matches_port(self, rule_idx: int, port: Optional[int]) -> bool:
+        """규칙이 포트 필터를 통과하는지 확인 (포트 범위가 없는 규칙은 모든 포트 허용)"""
+        if not port or not self.rule_port_ranges[rule_idx]:
+            return True
+        ports = self.rule_ports[rule_idx]
+        return ports is not None and port_in_intervals(port, ports)
+
+    def find_path(
+        self,
+        source_segment_id: int,
+        destination_segment_id: int,
+        protocol: Optional[str] = None,
+        port: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        BFS 경로 탐색 (결과는 LRU 캐시에 보관)
+        """
+        key = (source_segment_id, destination_segment_id, protocol.upper() if protocol else None, port)
+        with self._lock:
+            cached = self._path_cache.get(key)
+            if cached is not None:
+                self._path_cache.move_to_end(key)
+                return cached
+
+        result = self._search(source_segment_id, destination_segment_id, protocol, port)
+
+        with self._lock:
+            self._path_cache[key] = result
+            if len(self._path_cache) > PATH_CACHE_SIZE:
+                self._path_cache.popitem(last=False)
+        return result
+
+    def _search(
+        self,
+        source_segment_id: int,
+        destination_segment_id: int,
+        protocol: Optional[str],
+        port: Optional[int]
+    ) -> Dict[str, Any]:
+        adjacency, sources = self.adjacency(protocol, port)
+
+        source_idx = self.segment_index.get(source_segment_id)
+        dest_idx = self.segment_index.get(destination_segment_id)
+        if source_idx is None or dest_idx is None or source_idx not in sources:
+            return _unreachable()
+
+        parent = self._bfs(adjacency, source_idx, {dest_idx})
+        if dest_idx in parent:
+            return self._build_result(parent, dest_idx)
+
+        return _unreachable()
+
+    def find_paths(
+        self,
+        queries: List[Tuple[int, int, Optional[str], Optional[int]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        여러 경로 분석을 한 번에 처리 (결과는 입력 순서)
+
+        필터(프로토콜/포트)별 인접 리스트는 한 번만 만들고, 같은 필터에서 출발지가 같은
+        질의들은 BFS 한 번의 탐색 트리를 공유한다.
+
+        Args:
+            queries: (source_segment_id, destination_segment_id, protocol, port) 목록
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        pending: Dict[tuple, List[Tuple[int, int]]] = {}
+
+        with self._lock:
+            for position, (source_id, dest_id, protocol, port) in enumerate(queries):
+                protocol_key = protocol.upper() if protocol else None
+                cached = self._path_cache.get((source_id, dest_id, protocol_key, port))
+                if cached is not None:
+                    results[position] = cached
+                else:
+                    pending.setdefault((protocol_key, port, source_id), []).append((position, dest_id))
+
+        computed = []
+        for (protocol_key, port, source_id), items in pending.items():
+            adjacency, sources = self.adjacency(protocol_key, port)
+            source_idx = self.segment_index.get(source_id)
+
+            parent: Dict[int, Optional[Tuple[int, int]]] = {}
+            if source_idx is not None and source_idx in sources:
+                targets = {self.segment_index[dest_id] for _, dest_id in items if dest_id in self.segment_index}
+                parent = self._bfs(adjacency, source_idx, targets)
+
+            for position, dest_id in items:
+                dest_idx = self.segment_index.get(dest_id)
+                if dest_idx is not None and dest_idx in parent:
+                    result = self._build_result(parent, dest_idx)
+                else:
+                    result = _unreachable()
+                results[position] = result
+                computed.append(((source_id, dest_id, protocol_key, port), result))
+
+        with self._lock:
+            for key, result in computed:
+                self._path_cache[key] = result
+            while len(self._path_cache) > PATH_CACHE_SIZE:
+                self._path_cache.popitem(last=False)
+
+        return results
+
+    def _bfs(
+        self,
+        adjacency: List[List[Tuple[int, int]]],
+        source_idx: int,
+        targets: set
+    ) -> Dict[int, Optional[Tuple[int, int]]]:
+        """
+        source에서 BFS 탐색 트리 생성 (모든 target을 방문하면 중단)
+
+        parent[node] = (prev_node, rule_idx); 방문 순서상 처음 도달한 경로가 최단 경로
+        """
+        parent: Dict[int, Optional[Tuple[int, int]]] = {source_idx: None}
+        remaining = set(targets)
+        queue = deque([source_idx])
+
+        while queue:
+            current = queue.popleft()
+
+            remaining.discard(current)
+            if not remaining:
+                break
+
+            for next_idx, rule_idx in adjacency[current]:
+                if next_idx not in parent:
+                    parent[next_idx] = (current, rule_idx)
+                    queue.append(next_idx)
+
+        return parent
+
+    def _build_result(self, parent: Dict[int, Optional[Tuple[int, int]]], dest_idx: int) -> Dict[str, Any]:
+        path = [dest_idx]
+        rules_used = []
+        node = dest_idx
+        while parent[node] is not None:
+            node, rule_idx = parent[node]
+            path.append(node)
+            rules_used.append(rule_idx)
+        path.reverse()
+        rules_used.reverse()
+
+        return {
+            "reachable": True,
+            "path": [
+                {
+                    "segment_id": self.segment_ids[idx],
+                    "segment_name": self.segment_names[idx]
+                }
+                for idx in path
+            ],
+            "rules_applied": [
+                {
+                    "rule_id": self.rule_ids[rule_idx],
+                    "rule_name": self.rule_names[rule_idx],
+                    "protocol": self.rule_protocols[rule_idx],
+                    "port_range": self.rule_port_ranges[rule_idx]
+                }
+                for rule_idx in rules_used
+            ]
+        }
+
+
+_compiled_graph: Optional[CompiledGraph] = None
+_compile_lock = threading.Lock()
+
+
+def get_compiled_graph(db: Session) -> CompiledGraph:
+    """
+    프로세스 전역 컴파일 그래프 조회
+
+    토폴로지 버전이 바뀐 경우에만 다시 컴파일하므로, 평상시 비용은
+    버전 조회 쿼리 한 번이다.
+    """
+    global _compiled_graph
+
+    version = get_topology_version(db)
+    graph = _compiled_graph
+    if graph is not None and graph.version == version:
+        return graph
+
+    with _compile_lock:
+        graph = _compiled_graph
+        if graph is None or graph.version != version:
+            graph = _compile(db, version)
+            _compiled_graph = graph
+    return graph
+
+
+def _compile(db: Session, version: int) -> CompiledGraph:
+    # ORM 객체 대신 필요한 컬럼만 조회 (relationship selectin 로딩 방지)
+    segments = db.query(NetworkSegment.id, NetworkSegment.name).order_by(NetworkSegment.id).all()
+    rules = db.query(
+        FirewallRule.id,
+        FirewallRule.rule_name,
+        FirewallRule.source_segment_id,
+        FirewallRule.destination_segment_id,
+        FirewallRule.protocol,
+        FirewallRule.port_range,
+    ).filter(FirewallRule.action == "ALLOW").order_by(FirewallRule.id).all()
+
+    return CompiledGraph(version, segments, rules)
+
+
+def _compile_port_range(port_range: str) -> Optional[PortIntervals]:
+    """
+    규칙의 포트 범위를 구간 배열로 변환
+
+    신규 규칙은 생성 시 검증되지만, 검증 도입 이전에 저장된 잘못된 값은
+    None (어떤 포트와도 매칭되지 않음)으로 처리한다.
+    """
+    try:
+        return parse_port_range(port_range)
+    except ValueError:
+        return None
+
+
+def _unreachable() -> Dict[str, Any]:
+    return {
+        "reachable": False,
+        "path": [],
+        "rules_applied": []
+    }
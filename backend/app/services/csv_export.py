@@ -0,0 +1,43 @@
+from sqlalchemy import Select
+from typing import Iterator, List
+import io
+import csv
+
+from app.database import SessionLocal
+
+# Rows fetched from the cursor and written per response chunk
+EXPORT_BATCH_SIZE = 1000
+
+
+def iter_csv(header: List[str], statement: Select, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Stream the rows of a column select as UTF-8 CSV chunks
+
+    Rows are fetched from a server-side cursor in batches of ``batch_size`` and each
+    batch is encoded and yielded immediately, so memory stays bounded regardless of
+    table size. NULL values are written as empty fields.
+
+    The generator opens its own session: the request-scoped session from get_db is
+    closed before a StreamingResponse body is consumed.
+    """
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(header)
+        yield _drain(buffer)
+
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            writer.writerows(rows)
+            yield _drain(buffer)
+    finally:
+        db.close()
+
+
+def _drain(buffer: io.StringIO) -> bytes:
+    data = buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate(0)
+    return data
@@ -0,0 +1,248 @@
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from typing import Dict, Any, List, Optional, Iterable, TextIO
+import csv
+import ipaddress
+
+from app.models.firewall import Firewall
+from app.models.firewall_rule import FirewallRule
+from app.models.network_segment import NetworkSegment
+from app.services.port_ranges import parse_port_range
+from app.services.graph_layout import refresh_segment_layout
+from app.services.topology_service import refresh_topology_connections
+from app.services.topology_version import record_rule_changes, record_segment_changes
+
+# Rows inserted and committed per transaction
+IMPORT_CHUNK_SIZE = 5000
+
+# Max number of per-row error messages returned in a response
+MAX_REPORTED_ERRORS = 1000
+
+RULE_PROTOCOLS = {"TCP", "UDP", "ICMP", "ANY"}
+RULE_ACTIONS = {"ALLOW", "DENY"}
+
+
+class _ImportReport:
+    """Accumulates import results; only the first MAX_REPORTED_ERRORS messages are kept"""
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.commit_failed = False
+        self.errors: List[str] = []
+
+    def error(self, message: str, rows: int = 1) -> None:
+        self.failed += rows
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "success": not self.commit_failed,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors
+        }
+
+
+def import_segments(db: Session, stream: TextIO) -> Dict[str, Any]:
+    """
+    Import network segments from a CSV text stream
+
+    CSV format: name, ip_range, zone_type, color, description
+
+    Rows are validated against a name map loaded once from the database, inserted
+    with batched core INSERTs and committed every IMPORT_CHUNK_SIZE rows. Invalid or
+    duplicate rows are reported and skipped without affecting the other rows.
+    """
+    report = _ImportReport()
+    names = set(db.execute(select(NetworkSegment.name)).scalars())
+    batch: List[Dict[str, Any]] = []
+
+    for line_no, row in _iter_rows(stream):
+        name = (row.get('name') or '').strip()
+        ip_range = (row.get('ip_range') or '').strip()
+        zone_type = (row.get('zone_type') or '').strip()
+
+        if not (name and ip_range and zone_type):
+            report.error(f"Row {line_no}: missing required fields (name, ip_range, zone_type)")
+            continue
+        try:
+            ipaddress.ip_network(ip_range, strict=False)
+        except ValueError:
+            report.error(f"Row {line_no}: invalid CIDR format: {ip_range}")
+            continue
+        if name in names:
+            report.error(f"Row {line_no}: network segment '{name}' already exists")
+            continue
+
+        names.add(name)
+        batch.append({
+            "name": name,
+            "ip_range": ip_range,
+            "zone_type": zone_type,
+            "color": (row.get('color') or '').strip() or '#CCCCCC',
+            "description": row.get('description') or None
+        })
+
+        if len(batch) >= IMPORT_CHUNK_SIZE:
+            _flush_segments(db, batch, report)
+            batch = []
+
+    if batch:
+        _flush_segments(db, batch, report)
+
+    return report.as_dict()
+
+
+def import_rules(db: Session, stream: TextIO) -> Dict[str, Any]:
+    """
+    Import firewall rules from a CSV text stream
+
+    CSV format: firewall_id, rule_name, source_segment_id, destination_segment_id,
+    protocol, port_range, action, description (the export format; a leading id
+    column is ignored). Firewalls and segments may also be given by name in
+    firewall / source_segment / destination_segment columns.
+
+    Chunks of rules are committed as they are read. Each chunk's transaction also
+    refreshes the topology cache for its segment pairs and records the rule
+    changes, so a committed chunk is always visible under a new topology version;
+    a chunk that fails to insert or publish is rolled back as a whole.
+
+    Firewall and segment references and existing rule definitions are resolved
+    through hash maps loaded once, so validation does not query per row. A rule
+    identical to an existing one (same firewall, segments, protocol, ports and
+    action) is reported as a duplicate.
+    """
+    report = _ImportReport()
+
+    firewall_ids = set(db.execute(select(Firewall.id)).scalars())
+    firewall_names = dict(db.execute(select(Firewall.name, Firewall.id)).all())
+    segment_ids = set(db.execute(select(NetworkSegment.id)).scalars())
+    segment_names = dict(db.execute(select(NetworkSegment.name, NetworkSegment.id)).all())
+    existing = set(db.execute(select(
+        FirewallRule.firewall_id,
+        FirewallRule.source_segment_id,
+        FirewallRule.destination_segment_id,
+        FirewallRule.protocol,
+        FirewallRule.port_range,
+        FirewallRule.action,
+    )).all())
+    batch: List[Dict[str, Any]] = []
+
+    for line_no, row in _iter_rows(stream):
+        rule_name = (row.get('rule_name') or '').strip()
+        protocol = (row.get('protocol') or '').strip().upper()
+        action = (row.get('action') or '').strip().upper()
+        port_range = (row.get('port_range') or '').strip() or None
+
+        if not (rule_name and protocol and action):
+            report.error(f"Row {line_no}: missing required fields (rule_name, protocol, action)")
+            continue
+
+        firewall_id = _resolve(row, 'firewall_id', 'firewall', firewall_ids, firewall_names)
+        source_id = _resolve(row, 'source_segment_id', 'source_segment', segment_ids, segment_names)
+        dest_id = _resolve(row, 'destination_segment_id', 'destination_segment', segment_ids, segment_names)
+        if firewall_id is None:
+            report.error(f"Row {line_no}: unknown firewall")
+            continue
+        if source_id is None or dest_id is None:
+            report.error(f"Row {line_no}: unknown source or destination segment")
+            continue
+        if protocol not in RULE_PROTOCOLS:
+            report.error(f"Row {line_no}: invalid protocol: {protocol}")
+            continue
+        if action not in RULE_ACTIONS:
+            report.error(f"Row {line_no}: invalid action: {action}")
+            continue
+        if port_range:
+            try:
+                parse_port_range(port_range)
+            except ValueError as e:
+                report.error(f"Row {line_no}: {e}")
+                continue
+
+        key = (firewall_id, source_id, dest_id, protocol, port_range, action)
+        if key in existing:
+            report.error(f"Row {line_no}: duplicate rule '{rule_name}'")
+            continue
+
+        existing.add(key)
+        batch.append({
+            "firewall_id": firewall_id,
+            "rule_name": rule_name,
+            "source_segment_id": source_id,
+            "destination_segment_id": dest_id,
+            "protocol": protocol,
+            "port_range": port_range,
+            "action": action,
+            "description": row.get('description') or None
+        })
+
+        if len(batch) >= IMPORT_CHUNK_SIZE:
+            _flush_rules(db, batch, report)
+            batch = []
+
+    if batch:
+        _flush_rules(db, batch, report)
+
+    return report.as_dict()
+
+
+def _iter_rows(stream: TextIO) -> Iterable[tuple]:
+    """Yield (line number, row dict) pairs from a CSV stream"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _resolve(
+    row: Dict[str, str],
+    id_column: str,
+    name_column: str,
+    known_ids: set,
+    ids_by_name: Dict[str, int]
+) -> Optional[int]:
+    """Resolve a reference given either by id or by name; None if unknown"""
+    value = (row.get(id_column) or '').strip()
+    if value:
+        return int(value) if value.isdigit() and int(value) in known_ids else None
+    return ids_by_name.get((row.get(name_column) or '').strip())
+
+
+def _flush_segments(db: Session, batch: List[Dict[str, Any]], report: _ImportReport) -> None:
+    try:
+        created_ids = db.execute(
+            insert(NetworkSegment).returning(NetworkSegment.id, sort_by_parameter_order=True),
+            batch
+        ).scalars().all()
+        record_segment_changes(db, "create", created_ids)
+        refresh_segment_layout(db, created_ids)
+        db.commit()
+        report.created += len(batch)
+    except Exception as e:
+        db.rollback()
+        report.commit_failed = True
+        report.error(f"Failed to commit {len(batch)} row(s): {str(e)}", rows=len(batch))
+
+
+def _flush_rules(db: Session, batch: List[Dict[str, Any]], report: _ImportReport) -> None:
+    """Insert a chunk of rules, refresh the topology cache and record the changes in one transaction"""
+    try:
+        created = db.execute(
+            insert(FirewallRule).returning(
+                FirewallRule.id,
+                FirewallRule.source_segment_id,
+                FirewallRule.destination_segment_id,
+                sort_by_parameter_order=True
+            ),
+            batch
+        ).all()
+        refresh_topology_connections(db, [(source_id, dest_id) for _, source_id, dest_id in created])
+        record_rule_changes(db, "create", [tuple(row) for row in created])
+        db.commit()
+        report.created += len(batch)
+    except Exception as e:
+        db.rollback()
+        report.commit_failed = True
+        report.error(f"Failed to commit {len(batch)} row(s): {str(e)}", rows=len(batch))
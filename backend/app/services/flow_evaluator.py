@@ -0,0 +1,264 @@
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+from app.models.firewall_rule import FirewallRule
+from app.services.port_ranges import parse_port_range
+from app.services.segment_index import SegmentIndex, get_segment_index, lookup_ips
+from app.services.topology_version import get_topology_version
+
+# 포트 축 크기 (0~65535 + 그룹 끝 경계)
+_PORT_SPAN = 65537
+
+# 버전당 보관할 방화벽별 규칙 테이블 수
+RULE_TABLE_CACHE_SIZE = 16
+
+
+class RuleTable:
+    """
+    플로우 판정용으로 컴파일된 규칙 테이블
+
+    규칙은 ID 순으로 평가하며 처음 매칭되는 규칙이 판정을 결정한다 (first match).
+    (출발지 세그먼트, 목적지 세그먼트, 프로토콜) 그룹마다 포트 축을 기본 구간으로 나누고
+    각 구간에서 처음 매칭되는 규칙을 미리 계산해 두므로, 배치 전체를 정렬된 키 배열에 대한
+    np.searchsorted 한 번으로 판정한다.
+
+    - 그룹 키 = (src_idx * 세그먼트 수 + dst_idx) * 프로토콜 수 + 프로토콜 코드
+    - ANY 규칙은 모든 프로토콜 코드에 포함되며, 마지막 코드는 규칙에 없는 프로토콜용이다
+    - 포트 범위가 없는 규칙은 모든 포트에 매칭, 잘못된 포트 범위는 포트가 지정된 플로우와 매칭되지 않음
+    - 포트가 없는 플로우는 포트 조건을 보지 않는다 (find_path와 같은 기준)
+    """
+
+    def __init__(self, version: int, index: SegmentIndex, rules: List[tuple]):
+        self.version = version
+        self.index = index
+
+        positions = {seg_id: idx for idx, seg_id in enumerate(index.segment_ids)}
+        self.rule_ids: List[int] = []
+        self.rule_names: List[str] = []
+        self.rule_protocols: List[str] = []
+        self.rule_port_ranges: List[Optional[str]] = []
+        self.rule_actions: List[str] = []
+
+        compiled = []
+        protocols = set()
+        for rule_id, rule_name, source_id, dest_id, protocol, port_range, action in rules:
+            # CIDR이 없는(잘못된) 세그먼트에는 어떤 IP도 속하지 않으므로 매칭 불가
+            if source_id not in positions or dest_id not in positions:
+                continue
+            protocol = (protocol or "").upper()
+            if protocol != "ANY":
+                protocols.add(protocol)
+            compiled.append((positions[source_id], positions[dest_id], protocol, _port_intervals(port_range)))
+            self.rule_ids.append(rule_id)
+            self.rule_names.append(rule_name)
+            self.rule_protocols.append(protocol)
+            self.rule_port_ranges.append(port_range)
+            self.rule_actions.append((action or "").upper())
+
+        # 규칙에 등장하지 않는 프로토콜은 모두 마지막 코드 (ANY 규칙만 매칭)
+        self.protocol_codes = {protocol: code for code, protocol in enumerate(sorted(protocols))}
+        self.protocol_count = len(self.protocol_codes) + 1
+        self.segment_count = len(index.segment_ids)
+
+        group_keys, lows, highs, orders = [], [], [], []
+        for order, (source_idx, dest_idx, protocol, intervals) in enumerate(compiled):
+            codes = range(self.protocol_count) if protocol == "ANY" else (self.protocol_codes[protocol],)
+            pair_key = (source_idx * self.segment_count + dest_idx) * self.protocol_count
+            for code in codes:
+                if intervals is None:
+                    # 포트가 지정된 플로우와는 매칭되지 않지만 포트 없는 플로우에는 매칭
+                    group_keys.append(pair_key + code)
+                    lows.append(0)
+                    highs.append(-1)
+                    orders.append(order)
+                    continue
+                for low, high in intervals:
+                    group_keys.append(pair_key + code)
+                    lows.append(low)
+                    highs.append(high)
+                    orders.append(order)
+
+        group_keys = np.asarray(group_keys, dtype=np.int64)
+        lows = np.asarray(lows, dtype=np.int64)
+        highs = np.asarray(highs, dtype=np.int64)
+        orders = np.asarray(orders, dtype=np.int64)
+
+        # 포트 없는 플로우: 그룹별 첫 규칙
+        self.any_port_keys, first = np.unique(group_keys, return_index=True)
+        self.any_port_orders = orders[first]
+
+        # 포트 지정 플로우: 그룹별 포트 축 기본 구간의 첫 매칭 규칙
+        valid = highs >= lows
+        starts = group_keys[valid] * _PORT_SPAN + lows[valid]
+        stops = group_keys[valid] * _PORT_SPAN + highs[valid] + 1
+        group_bounds = np.concatenate([self.any_port_keys * _PORT_SPAN, self.any_port_keys * _PORT_SPAN + _PORT_SPAN - 1])
+        self.boundaries = np.unique(np.concatenate([starts, stops, group_bounds, np.zeros(1, dtype=np.int64)]))
+        self.owners = np.full(len(self.boundaries), -1, dtype=np.int64)
+
+        # 뒤 규칙부터 칠하면 앞 규칙이 덮어쓴다
+        first_bound = np.searchsorted(self.boundaries, starts)
+        last_bound = np.searchsorted(self.boundaries, stops)
+        valid_orders = orders[valid]
+        for position in np.argsort(-valid_orders, kind="stable").tolist():
+            self.owners[first_bound[position]:last_bound[position]] = valid_orders[position]
+
+    def evaluate(
+        self,
+        source_positions: np.ndarray,
+        dest_positions: np.ndarray,
+        protocols: List[str],
+        ports: np.ndarray
+    ) -> np.ndarray:
+        """
+        플로우별 첫 매칭 규칙 위치 (매칭되는 규칙이 없거나 세그먼트가 없으면 -1)
+
+        Args:
+            source_positions / dest_positions: SegmentIndex의 세그먼트 위치 (-1: 없음)
+            protocols: 플로우 프로토콜 (대문자)
+            ports: 목적지 포트 (-1: 지정 안 됨)
+        """
+        other = self.protocol_count - 1
+        codes = np.fromiter(
+            (self.protocol_codes.get(protocol, other) for protocol in protocols),
+            dtype=np.int64,
+            count=len(protocols)
+        )
+        located = (source_positions >= 0) & (dest_positions >= 0)
+        keys = (source_positions * self.segment_count + dest_positions) * self.protocol_count + codes
+
+        result = np.full(len(keys), -1, dtype=np.int64)
+
+        with_port = located & (ports >= 0)
+        if self.boundaries.size:
+            bound = np.searchsorted(self.boundaries, keys[with_port] * _PORT_SPAN + ports[with_port], side="right") - 1
+            result[with_port] = self.owners[bound]
+
+        without_port = located & (ports < 0)
+        if self.any_port_keys.size:
+            group_keys = keys[without_port]
+            found = np.minimum(np.searchsorted(self.any_port_keys, group_keys), self.any_port_keys.size - 1)
+            exact = self.any_port_keys[found] == group_keys
+            result[without_port] = np.where(exact, self.any_port_orders[found], -1)
+
+        return result
+
+
+_rule_tables: "OrderedDict[Tuple[int, Optional[int]], RuleTable]" = OrderedDict()
+_table_lock = threading.Lock()
+
+
+def get_rule_table(db: Session, firewall_id: Optional[int] = None) -> RuleTable:
+    """
+    현재 토폴로지 버전의 규칙 테이블 (firewall_id가 있으면 해당 방화벽의 규칙만)
+    """
+    version = get_topology_version(db)
+    key = (version, firewall_id)
+    with _table_lock:
+        table = _rule_tables.get(key)
+        if table is not None:
+            _rule_tables.move_to_end(key)
+            return table
+
+    index = get_segment_index(db)
+    query = db.query(
+        FirewallRule.id,
+        FirewallRule.rule_name,
+        FirewallRule.source_segment_id,
+        FirewallRule.destination_segment_id,
+        FirewallRule.protocol,
+        FirewallRule.port_range,
+        FirewallRule.action,
+    )
+    if firewall_id is not None:
+        query = query.filter(FirewallRule.firewall_id == firewall_id)
+    table = RuleTable(version, index, query.order_by(FirewallRule.id).all())
+
+    with _table_lock:
+        # 이전 버전의 테이블은 더 이상 사용되지 않음
+        for stale in [cached for cached in _rule_tables if cached[0] != version]:
+            del _rule_tables[stale]
+        _rule_tables[key] = table
+        while len(_rule_tables) > RULE_TABLE_CACHE_SIZE:
+            _rule_tables.popitem(last=False)
+    return table
+
+
+def evaluate_flows(
+    db: Session,
+    flows: List[Tuple[str, str, Optional[str], Optional[int]]],
+    firewall_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    플로우 배치를 규칙 기반으로 판정
+
+    각 플로우의 출발지/목적지 IP를 가장 구체적인 세그먼트로 매핑한 뒤,
+    해당 세그먼트 쌍에서 프로토콜과 포트가 맞는 첫 규칙(ID 순)의 action을 판정으로 한다.
+    매칭되는 규칙이 없으면 기본 차단(DENY)이다.
+
+    Args:
+        flows: (source_ip, destination_ip, protocol, port) 목록
+        firewall_id: 지정하면 해당 방화벽의 규칙만으로 판정
+
+    Returns:
+        {
+            "version": int,
+            "verdicts": ["ALLOW" | "DENY", ...],        # 입력 순서
+            "rule_ids": [int | None, ...],              # 판정을 결정한 규칙 (없으면 None)
+            "source_segment_ids": [int | None, ...],
+            "destination_segment_ids": [int | None, ...],
+            "invalid_indices": [int, ...],              # IP를 해석할 수 없는 플로우의 위치
+            "rules": [{"id", "rule_name", "protocol", "port_range", "action"}, ...]  # 결과에 등장한 규칙
+        }
+    """
+    table = get_rule_table(db, firewall_id)
+    index = table.index
+
+    source_positions, source_invalid = lookup_ips(index, [flow[0] for flow in flows])
+    dest_positions, dest_invalid = lookup_ips(index, [flow[1] for flow in flows])
+    protocols = [(flow[2] or "").upper() for flow in flows]
+    ports = np.fromiter((-1 if flow[3] is None else flow[3] for flow in flows), dtype=np.int64, count=len(flows))
+
+    matched = table.evaluate(source_positions, dest_positions, protocols, ports)
+
+    actions = np.asarray(table.rule_actions + ["DENY"], dtype=object)
+    rule_ids = np.asarray(table.rule_ids + [-1], dtype=np.int64)
+    segment_ids = np.asarray(index.segment_ids + [-1], dtype=np.int64)
+
+    return {
+        "version": table.version,
+        "verdicts": actions[matched].tolist(),
+        "rule_ids": _optional_ids(rule_ids[matched]),
+        "source_segment_ids": _optional_ids(segment_ids[source_positions]),
+        "destination_segment_ids": _optional_ids(segment_ids[dest_positions]),
+        "invalid_indices": sorted(set(source_invalid) | set(dest_invalid)),
+        "rules": [
+            {
+                "id": table.rule_ids[order],
+                "rule_name": table.rule_names[order],
+                "protocol": table.rule_protocols[order],
+                "port_range": table.rule_port_ranges[order],
+                "action": table.rule_actions[order]
+            }
+            for order in np.unique(matched[matched >= 0]).tolist()
+        ]
+    }
+
+
+def _port_intervals(port_range: Optional[str]) -> Optional[List[Tuple[int, int]]]:
+    """규칙 포트 범위 -> [(low, high), ...] (없으면 전체 포트, 잘못된 값이면 None)"""
+    if not port_range:
+        return [(0, 65535)]
+    try:
+        starts, ends = parse_port_range(port_range)
+    except ValueError:
+        return None
+    return list(zip(starts, ends))
+
+
+def _optional_ids(ids: np.ndarray) -> List[Optional[int]]:
+    """-1을 None으로 바꾼 ID 목록 (위치 -1은 덧붙인 마지막 자리 -1을 가리킴)"""
+    return [value if value >= 0 else None for value in ids.tolist()]
@@ -0,0 +1,314 @@
+"""
+토폴로지 그래프 노드 좌표의 서버 측 계산 (zone별 계층 레이아웃)
+
+zone마다 격자 블록을 하나씩 두고 트래픽 방향 순서(External -> DMZ -> Internal -> Management)로
+가로로 배치한다. 모든 블록은 같은 높이를 쓰며, 블록 안의 노드 순서는 연결된 노드들의
+평균 위치(barycenter)로 몇 차례 정렬해서 서로 연결된 노드가 비슷한 높이에 오게 한다.
+정렬은 numpy 배열 연산(bincount, lexsort)으로만 수행하므로 노드 수에 거의 선형이다.
+
+좌표는 segment_position 테이블에 저장하고, 세그먼트 변경 시에는 새로 생겼거나 zone이
+바뀐 세그먼트만 빈 격자 칸에 배치한다. 이 세그먼트들은 변경 이력에 남으므로 변경분(delta)
+피드에도 포함되며, 그 밖의 노드 좌표는 바뀌지 않는다.
+"""
+
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+import ipaddress
+import math
+
+from app.models.network_segment import NetworkSegment
+from app.models.segment_position import SegmentPosition
+from app.models.topology_connection import TopologyConnection
+
+# numpy는 레이아웃을 계산할 때만 로드 (애플리케이션 시작 시간 단축)
+if TYPE_CHECKING:
+    import numpy as np
+
+# 왼쪽부터의 zone 블록 순서 (그 외 zone은 이름순으로 오른쪽에)
+ZONE_ORDER = ("External", "DMZ", "Internal", "Management")
+
+# 격자 한 칸의 크기 (프론트엔드 좌표 단위)
+NODE_SPACING = 150.0
+
+# zone 블록 사이의 빈 열 수
+ZONE_GAP = 2
+
+# barycenter 정렬 반복 횟수
+BARYCENTER_PASSES = 4
+
+# 한 번에 IN 절로 조회할 세그먼트 ID 수
+_IN_CHUNK_SIZE = 500
+
+# 이보다 많은 세그먼트의 이웃은 연결 테이블 전체를 읽어서 찾음
+_NEIGHBOR_SCAN_LIMIT = 2000
+
+# 삽입 한 번당 행 수
+_INSERT_CHUNK_SIZE = 5000
+
+
+def compute_layout(
+    zones: List[str],
+    ip_ranges: List[str],
+    sources: "np.ndarray",
+    targets: "np.ndarray"
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    전체 레이아웃 계산 (격자 단위 정수 좌표)
+
+    Args:
+        zones, ip_ranges: 노드별 zone과 CIDR (노드 = 리스트 위치)
+        sources, targets: 간선 양 끝 노드 위치 배열
+
+    Returns:
+        (x, y) 격자 좌표 배열. 모든 블록의 높이는 ceil(sqrt(노드 수))이며 y = 0이 가운데.
+    """
+    import numpy as np
+
+    count = len(zones)
+    if count == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    zone_names = _ordered_zones(set(zones))
+    zone_codes = {zone: code for code, zone in enumerate(zone_names)}
+    zone_idx = np.array([zone_codes[zone] for zone in zones], dtype=np.int64)
+    zone_sizes = np.bincount(zone_idx, minlength=len(zone_names))
+    zone_starts = np.cumsum(zone_sizes) - zone_sizes
+
+    # 처음 순서는 IP 순 (같은 대역의 세그먼트가 모이도록)
+    key = np.array([_ip_key(ip_range) for ip_range in ip_ranges], dtype=np.float64)
+    relative = _relative_ranks(np.lexsort((key, zone_idx)), zone_idx, zone_sizes, zone_starts)
+
+    degree = np.bincount(sources, minlength=count) + np.bincount(targets, minlength=count)
+    for _ in range(BARYCENTER_PASSES):
+        neighbor_sum = (
+            np.bincount(sources, weights=relative[targets], minlength=count)
+            + np.bincount(targets, weights=relative[sources], minlength=count)
+        )
+        # 자기 위치도 한 표로 섞어서 연결이 없는 노드는 제자리에 남긴다
+        key = (relative + neighbor_sum) / (1 + degree)
+        relative = _relative_ranks(np.lexsort((relative, key, zone_idx)), zone_idx, zone_sizes, zone_starts)
+
+    # 블록: 공통 높이 height 행, 열 수는 zone 크기에 비례. 행은 블록 높이 전체로 펼친다.
+    height = max(math.ceil(math.sqrt(count)), 1)
+    columns = np.maximum(-(-zone_sizes // height), 1)
+    rows = -(-zone_sizes // columns)
+    offsets = np.cumsum(columns + ZONE_GAP) - (columns + ZONE_GAP)
+
+    rank = np.rint(relative * np.maximum(zone_sizes[zone_idx] - 1, 0)).astype(np.int64)
+    node_columns = columns[zone_idx]
+    row = rank // node_columns
+    stretch = (height - 1) / np.maximum(rows[zone_idx] - 1, 1)
+    x = offsets[zone_idx] + rank % node_columns
+    y = np.rint(row * stretch).astype(np.int64) - (height - 1) // 2
+    return x, y
+
+
+def rebuild_segment_layout(db: Session) -> None:
+    """
+    모든 세그먼트의 좌표를 새로 계산해서 저장 (기존 좌표는 버림)
+    """
+    import numpy as np
+
+    segments = db.query(NetworkSegment.id, NetworkSegment.zone_type, NetworkSegment.ip_range).order_by(NetworkSegment.id).all()
+    positions = {seg_id: idx for idx, (seg_id, _, _) in enumerate(segments)}
+
+    pairs = [
+        (positions[source_id], positions[dest_id])
+        for source_id, dest_id in db.query(TopologyConnection.source_segment_id, TopologyConnection.destination_segment_id)
+        if source_id in positions and dest_id in positions and source_id != dest_id
+    ]
+    sources = np.array([source for source, _ in pairs], dtype=np.int64)
+    targets = np.array([target for _, target in pairs], dtype=np.int64)
+
+    x, y = compute_layout([zone for _, zone, _ in segments], [ip_range for _, _, ip_range in segments], sources, targets)
+
+    db.query(SegmentPosition).delete(synchronize_session=False)
+    _insert_positions(db, [
+        (seg_id, zone, int(x[idx]), int(y[idx]))
+        for idx, (seg_id, zone, _) in enumerate(segments)
+    ])
+
+
+def refresh_segment_layout(db: Session, segment_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    변경된 세그먼트의 좌표만 갱신 (변경을 수행한 트랜잭션 안에서 호출)
+
+    - 삭제된 세그먼트의 좌표는 지운다
+    - 좌표가 없거나 zone이 바뀐 세그먼트는 해당 zone 블록에서 연결된 노드들의 평균 위치에
+      가장 가까운 빈 칸에 놓는다
+    - 그 밖의 세그먼트는 움직이지 않는다 (규칙 변경도 좌표를 바꾸지 않음)
+
+    Args:
+        segment_ids: 변경된 세그먼트. None이면 전체를 확인하며, 저장된 좌표가 하나도 없으면
+            전체 레이아웃을 계산한다.
+    """
+    import numpy as np
+
+    # Session은 autoflush=False이므로 대기 중인 세그먼트/규칙 변경을 먼저 반영
+    db.flush()
+
+    if segment_ids is None:
+        if db.query(SegmentPosition.segment_id).first() is None:
+            rebuild_segment_layout(db)
+            return
+        segments = db.query(NetworkSegment.id, NetworkSegment.zone_type).all()
+        stored = dict(db.query(SegmentPosition.segment_id, SegmentPosition.zone_type))
+    else:
+        segments, stored = [], {}
+        for chunk in _chunks(sorted(set(segment_ids))):
+            segments += db.query(NetworkSegment.id, NetworkSegment.zone_type).filter(NetworkSegment.id.in_(chunk)).all()
+            stored.update(
+                db.query(SegmentPosition.segment_id, SegmentPosition.zone_type)
+                .filter(SegmentPosition.segment_id.in_(chunk))
+            )
+
+    zones = dict(segments)
+    removed = {seg_id for seg_id in stored if seg_id not in zones}
+    placing = sorted(seg_id for seg_id, zone in zones.items() if stored.get(seg_id) != zone)
+
+    stale = sorted(removed | set(placing))
+    for chunk in _chunks(stale):
+        db.query(SegmentPosition).filter(SegmentPosition.segment_id.in_(chunk)).delete(synchronize_session=False)
+    if not placing:
+        return
+    neighbors = _neighbors(db, set(placing))
+
+    # 이웃 좌표 (이번에 배치하는 노드는 아직 자리가 없으므로 제외)
+    anchors: Dict[int, Tuple[float, float]] = {}
+    wanted = sorted({other for seg_id in placing for other in neighbors.get(seg_id, ())} - set(placing))
+    for chunk in _chunks(wanted):
+        anchors.update({
+            seg_id: (x / NODE_SPACING, y / NODE_SPACING)
+            for seg_id, x, y in db.query(SegmentPosition.segment_id, SegmentPosition.x, SegmentPosition.y)
+            .filter(SegmentPosition.segment_id.in_(chunk))
+        })
+
+    for zone in sorted({zones[seg_id] for seg_id in placing}):
+        members = [seg_id for seg_id in placing if zones[seg_id] == zone]
+        occupied = np.array(
+            db.query(SegmentPosition.x, SegmentPosition.y).filter(SegmentPosition.zone_type == zone).all(),
+            dtype=np.float64
+        ).reshape(-1, 2) / NODE_SPACING
+        targets = []
+        for seg_id in members:
+            points = [anchors[other] for other in neighbors.get(seg_id, ()) if other in anchors]
+            targets.append(tuple(np.mean(points, axis=0)) if points else None)
+
+        # 블록이 없는 zone은 모든 블록 오른쪽에 새 열을 만든다 (바로 저장하므로 다음 zone은 그 오른쪽)
+        new_column = _next_free_column(db) if len(occupied) == 0 else None
+        cells = _place(np.rint(occupied).astype(np.int64), targets, new_column)
+        _insert_positions(db, [(seg_id, zone, x, y) for seg_id, (x, y) in zip(members, cells)])
+
+
+def _place(
+    occupied: "np.ndarray",
+    targets: List[Optional[Tuple[float, float]]],
+    new_column: Optional[int]
+) -> List[Tuple[int, int]]:
+    """
+    zone 블록의 빈 격자 칸에 노드를 하나씩 배치 (격자 좌표)
+
+    후보 칸은 블록의 기존 열 x (기존 최소~최대 행 + 위아래 여유 행)이며, 노드마다 목표 위치
+    (이웃의 평균 좌표, 없으면 블록 중심)에 가장 가까운 빈 칸을 차지한다.
+    블록이 없는 zone (new_column)은 새 열 하나를 y = 0 중심으로 채운다.
+    """
+    import numpy as np
+
+    count = len(targets)
+    if len(occupied) == 0:
+        columns = np.array([new_column], dtype=np.int64)
+        rows = np.arange(count, dtype=np.int64) - (count - 1) // 2
+    else:
+        columns = np.unique(occupied[:, 0])
+        spare = -(-count // len(columns))
+        rows = np.arange(occupied[:, 1].min() - spare, occupied[:, 1].max() + spare + 1, dtype=np.int64)
+
+    grid_x = np.repeat(columns, len(rows))
+    grid_y = np.tile(rows, len(columns))
+    # (x, y) 쌍을 정수 하나로 비교 (기존 칸은 모두 rows 범위 안)
+    cell_keys = grid_x * len(rows) + (grid_y - rows[0])
+    free = ~np.isin(cell_keys, occupied[:, 0] * len(rows) + (occupied[:, 1] - rows[0]))
+
+    center = (float(columns.mean()), float(np.median(occupied[:, 1])) if len(occupied) else 0.0)
+    result = []
+    for target in targets:
+        target_x, target_y = target if target is not None else center
+        distance = (grid_x - target_x) ** 2 + (grid_y - target_y) ** 2
+        distance[~free] = np.inf
+        cell = int(np.argmin(distance))
+        free[cell] = False
+        result.append((int(grid_x[cell]), int(grid_y[cell])))
+    return result
+
+
+def _neighbors(db: Session, segment_ids: Set[int]) -> Dict[int, Set[int]]:
+    """세그먼트 ID -> 규칙으로 연결된 (다른) 세그먼트 ID"""
+    query = db.query(TopologyConnection.source_segment_id, TopologyConnection.destination_segment_id)
+    if len(segment_ids) > _NEIGHBOR_SCAN_LIMIT:
+        pairs = query.all()
+    else:
+        pairs = []
+        for chunk in _chunks(sorted(segment_ids)):
+            pairs += query.filter(or_(
+                TopologyConnection.source_segment_id.in_(chunk),
+                TopologyConnection.destination_segment_id.in_(chunk)
+            )).all()
+
+    neighbors: Dict[int, Set[int]] = {}
+    for source_id, dest_id in pairs:
+        if source_id == dest_id:
+            continue
+        if source_id in segment_ids:
+            neighbors.setdefault(source_id, set()).add(dest_id)
+        if dest_id in segment_ids:
+            neighbors.setdefault(dest_id, set()).add(source_id)
+    return neighbors
+
+
+def _next_free_column(db: Session) -> int:
+    """모든 블록 오른쪽의 새 블록 열 (격자 좌표)"""
+    right = db.query(SegmentPosition.x).order_by(SegmentPosition.x.desc()).limit(1).scalar()
+    return 0 if right is None else int(round(right / NODE_SPACING)) + ZONE_GAP + 1
+
+
+def _relative_ranks(
+    order: "np.ndarray",
+    zone_idx: "np.ndarray",
+    zone_sizes: "np.ndarray",
+    zone_starts: "np.ndarray"
+) -> "np.ndarray":
+    """zone별로 정렬된 순서 -> zone 안에서의 상대 순위 (0~1)"""
+    import numpy as np
+
+    rank = np.empty(len(order), dtype=np.float64)
+    rank[order] = np.arange(len(order)) - zone_starts[zone_idx[order]]
+    return rank / np.maximum(zone_sizes[zone_idx] - 1, 1)
+
+
+def _ordered_zones(zones: Set[str]) -> List[str]:
+    return [zone for zone in ZONE_ORDER if zone in zones] + sorted(zones - set(ZONE_ORDER))
+
+
+def _ip_key(ip_range: str) -> float:
+    """정렬용 IP 키 (IPv4 주소값, IPv6/잘못된 CIDR은 IPv4 뒤)"""
+    try:
+        network = ipaddress.ip_network(ip_range, strict=False)
+    except ValueError:
+        return float(2 ** 33)
+    return float(int(network.network_address)) if network.version == 4 else float(2 ** 32)
+
+
+def _chunks(values: List[int]) -> Iterable[List[int]]:
+    for start in range(0, len(values), _IN_CHUNK_SIZE):
+        yield values[start:start + _IN_CHUNK_SIZE]
+
+
+def _insert_positions(db: Session, rows: List[Tuple[int, str, int, int]]) -> None:
+    """(segment_id, zone_type, 격자 x, 격자 y) 행 저장"""
+    values = [
+        {"segment_id": seg_id, "zone_type": zone, "x": x * NODE_SPACING, "y": y * NODE_SPACING}
+        for seg_id, zone, x, y in rows
+    ]
+    for start in range(0, len(values), _INSERT_CHUNK_SIZE):
+        db.execute(insert(SegmentPosition), values[start:start + _INSERT_CHUNK_SIZE])
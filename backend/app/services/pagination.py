@@ -0,0 +1,78 @@
+from typing import Dict, Optional
+import base64
+import json
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Opaque keyset cursor pointing after the row with ``last_id``
+    """
+    return _encode({"id": last_id})
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    try:
+        last_id = _decode(cursor)["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(last_id, int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return last_id
+
+
+def encode_offsets(offsets: Dict[str, Optional[int]]) -> Optional[str]:
+    """
+    Opaque cursor holding one offset per result list (None = list exhausted)
+
+    Used where results are ranked rather than ordered by id, so there is no key
+    to seek past. Returns None when every list is exhausted.
+    """
+    if all(offset is None for offset in offsets.values()):
+        return None
+    return _encode(offsets)
+
+
+def decode_offsets(cursor: str, keys: list) -> Dict[str, Optional[int]]:
+    """
+    Decode a cursor produced by encode_offsets
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    try:
+        payload = _decode(cursor)
+        offsets = {key: payload[key] for key in keys}
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not all(offset is None or (isinstance(offset, int) and offset >= 0) for offset in offsets.values()):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return offsets
+
+
+def next_cursor(rows: list, limit: int) -> Optional[str]:
+    """
+    Cursor for the page after ``rows`` (ordered by id), or None on the last page
+    """
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last["id"] if isinstance(last, dict) else last.id)
+
+
+def _encode(payload: dict) -> str:
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded))
+    if not isinstance(payload, dict):
+        raise ValueError(cursor)
+    return payload
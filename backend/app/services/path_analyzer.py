@@ -1,9 +1,11 @@
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from collections import deque
 
 from app.models.network_segment import NetworkSegment
 from app.models.firewall_rule import FirewallRule
+from app.services.compiled_graph import get_compiled_graph
+from app.services.reachability import get_closure, transitive_closure, iter_bits
 
 
 def find_path(
@@ -14,7 +16,7 @@ def find_path(
     port: Optional[int] = None
 ) -> Dict[str, Any]:
     """
-    두 세그먼트 간 경로를 BFS로 탐색
+    두 세그먼트 간 경로를 BFS로 탐색 (컴파일된 그래프 사용)
 
     Args:
         db: Database session
@@ -30,117 +32,34 @@ def find_path(
             "rules_applied": [{"rule_id": int, "rule_name": str, ...}, ...]
         }
     """
-    # 1. 모든 세그먼트 조회
-    segments = {seg.id: seg for seg in db.query(NetworkSegment).all()}
-
-    # 2. ALLOW 규칙만 조회 (경로 구성용)
-    rules_query = db.query(FirewallRule).filter(FirewallRule.action == "ALLOW")
-
-    if protocol:
-        rules_query = rules_query.filter(
-            (FirewallRule.protocol == protocol.upper()) |
-            (FirewallRule.protocol == "ANY")
-        )
-
-    rules = rules_query.all()
-
-    # 3. 그래프 구성 (adjacency list)
-    # graph[source_id] = [(destination_id, rule), ...]
-    graph = {}
-    for rule in rules:
-        if rule.source_segment_id not in graph:
-            graph[rule.source_segment_id] = []
-
-        # 포트 매칭 검사
-        if port and rule.port_range:
-            if not _port_matches(port, rule.port_range):
-                continue
-
-        graph[rule.source_segment_id].append((rule.destination_segment_id, rule))
-
-    # 4. BFS로 경로 탐색
-    if source_segment_id not in graph:
-        return {
-            "reachable": False,
-            "path": [],
-            "rules_applied": []
-        }
+    # 토폴로지 버전이 바뀐 경우에만 그래프를 다시 컴파일하고, 최근 결과는 LRU 캐시에서 반환
+    graph = get_compiled_graph(db)
 
-    queue = deque([(source_segment_id, [source_segment_id], [])])  # (current, path, rules)
-    visited = set()
+    return graph.find_path(
+        source_segment_id,
+        destination_segment_id,
+        protocol=protocol,
+        port=port
+    )
 
-    while queue:
-        current, path, rules_used = queue.popleft()
-
-        if current == destination_segment_id:
-            # 경로 찾음
-            return {
-                "reachable": True,
-                "path": [
-                    {
-                        "segment_id": seg_id,
-                        "segment_name": segments[seg_id].name
-                    }
-                    for seg_id in path
-                ],
-                "rules_applied": [
-                    {
-                        "rule_id": rule.id,
-                        "rule_name": rule.rule_name,
-                        "protocol": rule.protocol,
-                        "port_range": rule.port_range
-                    }
-                    for rule in rules_used
-                ]
-            }
-
-        if current in visited:
-            continue
-        visited.add(current)
-
-        # 인접 노드 탐색
-        if current in graph:
-            for next_seg, rule in graph[current]:
-                if next_seg not in visited:
-                    queue.append((
-                        next_seg,
-                        path + [next_seg],
-                        rules_used + [rule]
-                    ))
-
-    # 경로 없음
-    return {
-        "reachable": False,
-        "path": [],
-        "rules_applied": []
-    }
 
-
-def _port_matches(port: int, port_range: str) -> bool:
-    """
-    포트가 범위에 포함되는지 확인
-
-    port_range 형식:
-    - "80" (단일 포트)
-    - "80,443" (여러 포트)
-    - "8000-9000" (범위)
+def find_paths(
+    db: Session,
+    queries: List[Tuple[int, int, Optional[str], Optional[int]]]
+) -> List[Dict[str, Any]]:
     """
-    parts = port_range.split(',')
+    여러 세그먼트 쌍의 경로를 한 번에 탐색
 
-    for part in parts:
-        part = part.strip()
+    Args:
+        db: Database session
+        queries: (source_segment_id, destination_segment_id, protocol, port) 목록
 
-        if '-' in part:
-            # 범위
-            start, end = part.split('-')
-            if int(start) <= port <= int(end):
-                return True
-        else:
-            # 단일 포트
-            if port == int(part):
-                return True
+    Returns:
+        입력 순서대로 find_path와 같은 형식의 결과 목록
+    """
+    graph = get_compiled_graph(db)
 
-    return False
+    return graph.find_paths(queries)
 
 
 def analyze_rule_impact(
@@ -178,19 +97,115 @@ def analyze_rule_impact(
     }]
 
     # 3. 이 규칙을 경유하는 경로 찾기
-    # 모든 세그먼트 쌍에 대해 경로 검사 (간단한 구현)
-    # 실제로는 더 효율적인 방법 필요
-    all_segments = db.query(NetworkSegment).all()
-    dependent_paths = []
-
-    # 규칙을 임시로 삭제하고 경로 재계산 (시뮬레이션)
-    # 여기서는 간단히 직접 연결만 체크
+    # 세그먼트 쌍마다 BFS를 돌리지 않고, 규칙 삭제 전/후의 전이 폐쇄 비트셋 차이로 계산
+    dependent_paths = _find_dependent_paths(db, rule)
 
     # 4. 경고 메시지 생성
-    warning = f"This rule is critical for {len(affected_connections)} direct connection(s)"
+    warning = (
+        f"This rule is critical for {len(affected_connections)} direct connection(s)"
+        f" and {len(dependent_paths)} dependent path(s)"
+    )
 
     return {
         "affected_connections": affected_connections,
         "dependent_paths": dependent_paths,
         "warning": warning
     }
+
+
+def _find_dependent_paths(db: Session, rule: FirewallRule) -> List[Dict[str, Any]]:
+    """
+    규칙 삭제 시 도달 불가능해지는 (출발지, 목적지) 쌍과 경유 경로
+
+    규칙의 프로토콜 기준 그래프(포트 무관)에서 규칙의 간선 u -> v를 제거했을 때
+    도달성을 잃는 쌍을 구한다. 직접 연결(u -> v)은 affected_connections에 포함되므로 제외한다.
+
+    - 같은 u -> v 구간에 다른 규칙이 있으면 간선이 유지되므로 영향 없음
+    - 영향을 받을 수 있는 출발지는 u에 도달하는 세그먼트뿐이므로,
+      삭제 전/후 전이 폐쇄의 차이(before & ~after)로 잃는 목적지를 한 번에 구한다
+    - via는 삭제 후 그래프에서 s -> u 최단 경로와 v -> t 최단 경로를 이어 만든다
+    """
+    # 경로 분석은 ALLOW 규칙만 사용하므로 DENY 규칙 삭제는 도달성을 줄이지 않음
+    if rule.action != "ALLOW":
+        return []
+
+    graph = get_compiled_graph(db)
+    rule_idx = graph.rule_index.get(rule.id)
+    if rule_idx is None:
+        return []
+
+    protocol = None if rule.protocol == "ANY" else rule.protocol
+    adjacency, _ = graph.adjacency(protocol)
+    source_idx = graph.rule_sources[rule_idx]
+    dest_idx = graph.rule_destinations[rule_idx]
+
+    if source_idx == dest_idx or any(
+        next_idx == dest_idx and other_idx != rule_idx
+        for next_idx, other_idx in adjacency[source_idx]
+    ):
+        return []
+
+    # 규칙 삭제 후 그래프
+    successors = [list({next_idx for next_idx, _ in edges}) for edges in adjacency]
+    successors[source_idx] = [next_idx for next_idx in successors[source_idx] if next_idx != dest_idx]
+
+    before = get_closure(db, graph, protocol).rows
+    after = transitive_closure(successors)
+
+    # u로 향하는 다음 홉 (u에서 역방향 BFS)
+    predecessors: List[List[int]] = [[] for _ in successors]
+    for node, next_nodes in enumerate(successors):
+        for next_idx in next_nodes:
+            predecessors[next_idx].append(node)
+    toward_source = _bfs_tree(predecessors, source_idx)
+
+    # v에서 각 목적지로의 이전 홉 (v에서 정방향 BFS)
+    from_dest = _bfs_tree(successors, dest_idx)
+
+    names = graph.segment_names
+    source_bit = 1 << source_idx
+    dependent_paths = []
+
+    for start in range(len(successors)):
+        if start != source_idx and not after[start] & source_bit:
+            continue
+
+        lost = before[start] & ~after[start] & ~(1 << start)
+        if start == source_idx:
+            lost &= ~(1 << dest_idx)
+
+        if not lost:
+            continue
+
+        # start -> ... -> u
+        head = [start]
+        while head[-1] != source_idx:
+            head.append(toward_source[head[-1]])
+
+        for target in iter_bits(lost):
+            # v -> ... -> target
+            tail = [target]
+            while tail[-1] != dest_idx:
+                tail.append(from_dest[tail[-1]])
+            chain = head + tail[::-1]
+
+            dependent_paths.append({
+                "source": names[start],
+                "destination": names[target],
+                "via": [names[idx] for idx in chain[1:-1]]
+            })
+
+    return dependent_paths
+
+
+def _bfs_tree(neighbors: List[List[int]], root: int) -> Dict[int, int]:
+    """BFS 트리: 방문한 각 노드 -> root 방향의 이전 노드"""
+    parent = {root: root}
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        for next_idx in neighbors[node]:
+            if next_idx not in parent:
+                parent[next_idx] = node
+                queue.append(next_idx)
+    return parent
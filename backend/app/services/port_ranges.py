@@ -0,0 +1,57 @@
+from bisect import bisect_right
+from typing import List, Tuple
+
+MIN_PORT = 0
+MAX_PORT = 65535
+
+# (starts, ends): 정렬되고 서로 겹치지 않는 구간의 시작/끝 포트
+PortIntervals = Tuple[Tuple[int, ...], Tuple[int, ...]]
+
+
+def parse_port_range(port_range: str) -> PortIntervals:
+    """
+    포트 범위 문자열을 정렬/병합된 구간 배열로 변환
+
+    port_range 형식:
+    - "80" (단일 포트)
+    - "80,443" (여러 포트)
+    - "8000-9000" (범위)
+
+    Raises:
+        ValueError: 형식이 잘못되었거나 포트가 0-65535 범위를 벗어난 경우
+    """
+    intervals: List[Tuple[int, int]] = []
+
+    for part in port_range.split(','):
+        part = part.strip()
+        bounds = part.split('-')
+        if len(bounds) > 2 or not all(bound.strip().isdigit() for bound in bounds):
+            raise ValueError(f"Invalid port range: {port_range!r}")
+
+        start = int(bounds[0])
+        end = int(bounds[-1])
+        if start > end or start < MIN_PORT or end > MAX_PORT:
+            raise ValueError(f"Invalid port range: {port_range!r}")
+        intervals.append((start, end))
+
+    # 인접하거나 겹치는 구간 병합
+    intervals.sort()
+    starts: List[int] = []
+    ends: List[int] = []
+    for start, end in intervals:
+        if ends and start <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+
+    return tuple(starts), tuple(ends)
+
+
+def port_in_intervals(port: int, intervals: PortIntervals) -> bool:
+    """
+    포트가 구간 배열에 포함되는지 이진 탐색으로 확인
+    """
+    starts, ends = intervals
+    idx = bisect_right(starts, port) - 1
+    return idx >= 0 and port <= ends[idx]
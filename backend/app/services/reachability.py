@@ -0,0 +1,271 @@
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import base64
+import threading
+
+from app.services.compiled_graph import CompiledGraph, get_compiled_graph
+from app.services.topology_version import get_changes_between
+
+
+class ReachabilityClosure:
+    """
+    세그먼트 그래프의 전이 폐쇄 (비트셋)
+
+    rows[i]의 j번째 비트는 세그먼트 i에서 하나 이상의 규칙을 거쳐 j에 도달할 수 있음을 뜻한다.
+    sources는 프로토콜 필터를 통과한 규칙이 있는 출발지로, find_path와 같은 기준으로
+    자기 자신으로의 도달 여부를 판단하는 데 쓰인다.
+    """
+
+    def __init__(self, rows: List[int], sources: set):
+        self.rows = rows
+        self.sources = sources
+
+    def reachable_row(self, idx: int) -> int:
+        if idx not in self.sources:
+            return 0
+        return self.rows[idx] | (1 << idx)
+
+
+# 증분 반영용으로 필터별 가장 최근 전이 폐쇄를 보관할 최대 개수
+LATEST_CLOSURE_LIMIT = 64
+
+# 필터 -> (버전, 세그먼트 ID 목록, 전이 폐쇄)
+_latest_closures: "OrderedDict[Tuple[Optional[str], Optional[int]], tuple]" = OrderedDict()
+_closure_lock = threading.Lock()
+
+
+def get_reachability_matrix(
+    db: Session,
+    protocol: Optional[str] = None,
+    port: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    모든 세그먼트 쌍의 도달 가능 여부
+
+    결과는 find_path(source, destination, protocol, port)의 reachable 값과 같다.
+    행마다 도달 가능한 세그먼트를 segments 목록의 인덱스에 대한 비트셋으로 반환한다
+    (리틀 엔디언 바이트열의 base64, 비트 i = segments[i]). ID 목록은 O(N²) 크기가 되기 때문.
+    전이 폐쇄는 컴파일 그래프에 필터별로 캐싱되며, 직전 계산 이후 규칙 추가만 있었다면
+    새로 계산하지 않고 추가된 간선만 반영한다 (삭제/수정이 있으면 전체 재계산).
+
+    Returns:
+        {
+            "version": int,
+            "protocol": str | None,
+            "port": int | None,
+            "segments": [{"segment_id": int, "segment_name": str}, ...],
+            "rows": [{"source_segment_id": int, "reachable": str}, ...]
+        }
+    """
+    graph = get_compiled_graph(db)
+    closure = get_closure(db, graph, protocol, port)
+
+    segment_ids = graph.segment_ids
+    row_bytes = (len(segment_ids) + 7) // 8
+    rows = [
+        {
+            "source_segment_id": segment_ids[idx],
+            "reachable": encode_bitset(closure.reachable_row(idx), row_bytes)
+        }
+        for idx in range(len(segment_ids))
+    ]
+
+    return {
+        "version": graph.version,
+        "protocol": protocol.upper() if protocol else None,
+        "port": port,
+        "segments": [
+            {"segment_id": seg_id, "segment_name": name}
+            for seg_id, name in zip(segment_ids, graph.segment_names)
+        ],
+        "rows": rows
+    }
+
+
+def get_closure(
+    db: Session,
+    graph: CompiledGraph,
+    protocol: Optional[str] = None,
+    port: Optional[int] = None
+) -> ReachabilityClosure:
+    """
+    컴파일 그래프의 필터별 전이 폐쇄 (캐시 사용)
+    """
+    key = (protocol.upper() if protocol else None, port)
+    closure = graph.closure_cache.get(key)
+    if closure is not None:
+        return closure
+
+    with _closure_lock:
+        closure = graph.closure_cache.get(key)
+        if closure is None:
+            closure = _carry_over(db, graph, key)
+            if closure is None:
+                closure = compute_closure(graph, *key)
+            graph.closure_cache[key] = closure
+
+        _latest_closures[key] = (graph.version, graph.segment_ids, closure)
+        _latest_closures.move_to_end(key)
+        if len(_latest_closures) > LATEST_CLOSURE_LIMIT:
+            _latest_closures.popitem(last=False)
+    return closure
+
+
+def compute_closure(
+    graph: CompiledGraph,
+    protocol: Optional[str] = None,
+    port: Optional[int] = None
+) -> ReachabilityClosure:
+    """
+    컴파일 그래프의 필터별 전이 폐쇄 계산
+    """
+    adjacency, sources = graph.adjacency(protocol, port)
+    successors = [list({dest_idx for dest_idx, _ in edges}) for edges in adjacency]
+    return ReachabilityClosure(transitive_closure(successors), set(sources))
+
+
+def transitive_closure(successors: List[List[int]]) -> List[int]:
+    """
+    강한 연결 요소(SCC) 압축 후 역위상 순서로 비트셋을 합쳐 전이 폐쇄 계산
+
+    Tarjan 알고리즘은 SCC를 역위상 순서(도달 대상이 먼저)로 내보내므로
+    각 SCC의 도달 집합은 이미 계산된 후속 SCC의 집합을 OR 하여 구한다.
+
+    Args:
+        successors: successors[i] = i에서 직접 도달 가능한 노드 인덱스 목록
+
+    Returns:
+        rows[i]의 j번째 비트가 i -> j 도달 가능 여부인 비트셋 목록
+    """
+    n = len(successors)
+
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    component = [-1] * n
+    stack: List[int] = []
+    component_reach: List[int] = []
+    counter = 0
+
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, iter(successors[root]))]
+
+        while work:
+            node, children = work[-1]
+            descended = False
+            for child in children:
+                if index[child] < 0:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, iter(successors[child])))
+                    descended = True
+                    break
+                if on_stack[child]:
+                    low[node] = min(low[node], index[child])
+            if descended:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+
+            if low[node] == index[node]:
+                # SCC 확정: 구성원과 도달 집합 계산
+                comp_id = len(component_reach)
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = comp_id
+                    members.append(member)
+                    if member == node:
+                        break
+
+                mask = 0
+                cyclic = len(members) > 1
+                for member in members:
+                    for child in successors[member]:
+                        child_comp = component[child]
+                        if child_comp == comp_id:
+                            cyclic = True
+                        else:
+                            mask |= (1 << child) | component_reach[child_comp]
+                if cyclic:
+                    for member in members:
+                        mask |= 1 << member
+                component_reach.append(mask)
+
+    return [component_reach[component[idx]] for idx in range(n)]
+
+
+def _carry_over(
+    db: Session,
+    graph: CompiledGraph,
+    key: Tuple[Optional[str], Optional[int]]
+) -> Optional[ReachabilityClosure]:
+    """
+    필터별 가장 최근 전이 폐쇄에 그 이후 추가된 규칙만 반영
+
+    그 버전 이후 변경이 모두 규칙 생성인 경우에만 가능하며, 그 외에는 None.
+    """
+    latest = _latest_closures.get(key)
+    if latest is None:
+        return None
+
+    version, segment_ids, base = latest
+    if version >= graph.version or segment_ids != graph.segment_ids:
+        return None
+
+    changes = get_changes_between(db, version, graph.version)
+    if any(change.entity != "rule" or change.operation != "create" for change in changes):
+        return None
+
+    rows = list(base.rows)
+    sources = set(base.sources)
+    protocol_upper, port = key
+    n = len(rows)
+
+    for change in changes:
+        rule_idx = graph.rule_index.get(change.entity_id)
+        # DENY 규칙 등 경로 그래프에 포함되지 않는 규칙은 영향 없음
+        if rule_idx is None or not graph.matches_protocol(rule_idx, protocol_upper):
+            continue
+
+        source_idx = graph.rule_sources[rule_idx]
+        sources.add(source_idx)
+        if not graph.matches_port(rule_idx, port):
+            continue
+
+        # source에 도달하는 모든 세그먼트는 이제 destination과 그 도달 집합에도 도달
+        dest_idx = graph.rule_destinations[rule_idx]
+        source_bit = 1 << source_idx
+        added = (1 << dest_idx) | rows[dest_idx]
+        for idx in range(n):
+            if idx == source_idx or rows[idx] & source_bit:
+                rows[idx] |= added
+
+    return ReachabilityClosure(rows, sources)
+
+
+def encode_bitset(mask: int, length: int) -> str:
+    """비트셋을 length 바이트의 리틀 엔디언 바이트열로 만들어 base64 인코딩"""
+    return base64.b64encode(mask.to_bytes(length, "little")).decode("ascii")
+
+
+def iter_bits(mask: int):
+    """비트셋에서 설정된 비트의 인덱스를 오름차순으로 반환"""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
@@ -0,0 +1,255 @@
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple
+from bisect import bisect_right
+from collections import defaultdict
+
+from app.models.firewall_rule import FirewallRule
+from app.services.port_ranges import MAX_PORT, MIN_PORT, parse_port_range
+
+# 규칙별로 보고할 관련 규칙 ID 최대 개수
+MAX_RELATED_RULES = 50
+
+# 관련 규칙 예시를 모을 때 규칙 하나당 확인하는 최대 포트 구간 수
+_SCAN_BUDGET = 2000
+
+# 규칙에 없는 프로토콜 (ANY 규칙만 매칭)
+_OTHER_PROTOCOL = "*"
+
+# 보고 우선순위 (한 규칙에 여러 이상이 있으면 앞의 것 하나만 보고)
+ANOMALY_TYPES = ("duplicate", "shadowed", "redundant", "conflict")
+
+
+class _PortUnion:
+    """서로 겹치지 않게 병합된 포트 구간 집합"""
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    def add(self, low: int, high: int) -> List[Tuple[int, int]]:
+        """
+        [low, high]를 추가하고 그중 이전에 없던 부분 구간 목록을 반환
+
+        겹치거나 맞닿은 구간은 하나로 합쳐지므로, 훑는 구간 수는 병합으로 사라지는
+        구간 수에 비례한다 (전체적으로 분할 상환 O(log n)).
+        """
+        begin = bisect_right(self.starts, low) - 1
+        if begin < 0 or self.ends[begin] < low - 1:
+            begin += 1
+
+        gaps = []
+        position = low
+        merged_low, merged_high = low, high
+        index = begin
+        while index < len(self.starts) and self.starts[index] <= high + 1:
+            if self.starts[index] > position:
+                gaps.append((position, min(self.starts[index] - 1, high)))
+            position = max(position, self.ends[index] + 1)
+            merged_low = min(merged_low, self.starts[index])
+            merged_high = max(merged_high, self.ends[index])
+            index += 1
+        if position <= high:
+            gaps.append((position, high))
+
+        self.starts[begin:index] = [merged_low]
+        self.ends[begin:index] = [merged_high]
+        return gaps
+
+    def overlaps(self, low: int, high: int) -> bool:
+        index = bisect_right(self.starts, high) - 1
+        return index >= 0 and self.ends[index] >= low
+
+
+class _CoveredPorts:
+    """
+    한 (세그먼트 쌍, 프로토콜)에서 앞선 규칙들이 이미 매칭하는 포트 구간
+
+    - union: 앞선 규칙이 매칭하는 전체 포트 (완전히 가려지는지 판단)
+    - by_action: action별로 그 action의 규칙이 처음 매칭하는 포트 (반대 action과의 겹침 판단)
+    - starts/ends/owners: 포트 구간별로 처음 매칭하는 규칙 (관련 규칙 예시 수집용)
+    """
+
+    def __init__(self):
+        self.union = _PortUnion()
+        self.by_action: Dict[str, _PortUnion] = defaultdict(_PortUnion)
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.owners: List[int] = []
+
+    def cover(self, low: int, high: int, owner: int, action: str) -> Tuple[bool, bool]:
+        """
+        [low, high]를 owner로 덮고 (이미 덮인 부분은 유지)
+
+        Returns:
+            (이전에 모두 덮여 있었는지, action이 다른 규칙이 먼저 매칭하는 부분이 있는지)
+        """
+        opposite = any(
+            union.overlaps(low, high)
+            for other_action, union in self.by_action.items() if other_action != action
+        )
+        gaps = self.union.add(low, high)
+        for gap_low, gap_high in gaps:
+            self.by_action[action].add(gap_low, gap_high)
+            slot = bisect_right(self.starts, gap_low)
+            self.starts.insert(slot, gap_low)
+            self.ends.insert(slot, gap_high)
+            self.owners.insert(slot, owner)
+        return not gaps, opposite
+
+    def owners_between(self, low: int, high: int, limit: int) -> set:
+        """[low, high]를 먼저 매칭하는 규칙 위치 (최대 limit개, 최대 _SCAN_BUDGET 구간만 확인)"""
+        index = bisect_right(self.starts, low) - 1
+        if index < 0 or self.ends[index] < low:
+            index += 1
+
+        owners = set()
+        stop = min(len(self.starts), index + _SCAN_BUDGET)
+        while index < stop and self.starts[index] <= high and len(owners) < limit:
+            owners.add(self.owners[index])
+            index += 1
+        return owners
+
+
+def find_rule_anomalies(
+    db: Session,
+    firewall_id: Optional[int] = None,
+    anomaly_type: Optional[str] = None,
+    limit: int = 1000
+) -> Dict[str, Any]:
+    """
+    규칙 이상 탐지 (방화벽별, 규칙 ID 순 first match 기준)
+
+    - duplicate: 앞선 규칙과 프로토콜/포트/action이 모두 같음
+    - shadowed: 앞선 규칙들이 모든 트래픽을 먼저 매칭하고, 그중 action이 다른 규칙이 있음 (절대 적용되지 않음)
+    - redundant: 앞선 규칙들이 같은 action으로 모든 트래픽을 먼저 매칭 (삭제해도 결과 동일)
+    - conflict: 일부 트래픽이 action이 다른 앞선 규칙과 겹침
+
+    같은 방화벽의 같은 (출발지, 목적지) 세그먼트 쌍 안에서만 비교하며, 쌍/프로토콜마다
+    앞선 규칙이 덮은 포트 구간을 정렬 목록으로 유지하면서 한 번 훑으므로
+    모든 규칙 쌍을 비교하지 않는다. 포트 범위가 잘못된 규칙은 제외한다.
+    related_rule_ids는 해당 트래픽을 먼저 매칭하는 규칙의 예시이다 (최대 MAX_RELATED_RULES개).
+
+    Returns:
+        {
+            "firewall_id": int | None,
+            "rules_analyzed": int,
+            "summary": {"duplicate": int, "shadowed": int, "redundant": int, "conflict": int},
+            "anomalies": [
+                {
+                    "rule_id": int, "rule_name": str, "type": str,
+                    "source_segment_id": int, "destination_segment_id": int,
+                    "related_rule_ids": [int, ...]
+                }, ...
+            ]  # 규칙 ID 순, anomaly_type/limit 적용
+        }
+    """
+    query = db.query(
+        FirewallRule.id,
+        FirewallRule.rule_name,
+        FirewallRule.firewall_id,
+        FirewallRule.source_segment_id,
+        FirewallRule.destination_segment_id,
+        FirewallRule.protocol,
+        FirewallRule.port_range,
+        FirewallRule.action,
+    )
+    if firewall_id is not None:
+        query = query.filter(FirewallRule.firewall_id == firewall_id)
+
+    # (방화벽, 출발지, 목적지)별 규칙 (ID 순)
+    groups: Dict[Tuple[int, int, int], List[tuple]] = defaultdict(list)
+    analyzed = 0
+    for rule_id, rule_name, fw_id, source_id, dest_id, protocol, port_range, action in query.order_by(FirewallRule.id):
+        intervals = _port_intervals(port_range)
+        if intervals is None:
+            continue
+        analyzed += 1
+        groups[(fw_id, source_id, dest_id)].append(
+            (rule_id, rule_name, (protocol or "").upper(), intervals, (action or "").upper())
+        )
+
+    found = []
+    for (_, source_id, dest_id), rules in groups.items():
+        for rule_id, rule_name, kind, related in _analyze_group(rules):
+            found.append({
+                "rule_id": rule_id,
+                "rule_name": rule_name,
+                "type": kind,
+                "source_segment_id": source_id,
+                "destination_segment_id": dest_id,
+                "related_rule_ids": related
+            })
+
+    found.sort(key=lambda anomaly: anomaly["rule_id"])
+    summary = {kind: 0 for kind in ANOMALY_TYPES}
+    for anomaly in found:
+        summary[anomaly["type"]] += 1
+
+    if anomaly_type:
+        found = [anomaly for anomaly in found if anomaly["type"] == anomaly_type]
+
+    return {
+        "firewall_id": firewall_id,
+        "rules_analyzed": analyzed,
+        "summary": summary,
+        "anomalies": found[:limit]
+    }
+
+
+def _analyze_group(rules: List[tuple]) -> List[Tuple[int, str, str, List[int]]]:
+    """한 세그먼트 쌍의 규칙들 (ID 순)에서 이상 규칙 목록"""
+    # ANY 규칙은 쌍에 등장하는 모든 프로토콜과 그 외 프로토콜에 적용
+    protocols = {protocol for _, _, protocol, _, _ in rules if protocol != "ANY"}
+    protocols.add(_OTHER_PROTOCOL)
+    covered = {protocol: _CoveredPorts() for protocol in protocols}
+
+    first_definition: Dict[tuple, int] = {}
+    anomalies = []
+
+    for position, (rule_id, rule_name, protocol, intervals, action) in enumerate(rules):
+        slices = protocols if protocol == "ANY" else (protocol,)
+
+        # 관련 규칙은 덮기 전에 수집 (덮은 뒤에는 이 규칙 자신이 섞임)
+        overlapped = set()
+        for slice_protocol in slices:
+            for low, high in intervals:
+                overlapped |= covered[slice_protocol].owners_between(low, high, MAX_RELATED_RULES * 4)
+
+        fully_covered = True
+        has_opposite = False
+        for slice_protocol in slices:
+            for low, high in intervals:
+                was_covered, opposite = covered[slice_protocol].cover(low, high, position, action)
+                fully_covered = fully_covered and was_covered
+                has_opposite = has_opposite or opposite
+
+        definition = (protocol, intervals, action)
+        duplicate_of = first_definition.setdefault(definition, position)
+
+        if duplicate_of != position:
+            anomalies.append((rule_id, rule_name, "duplicate", [rules[duplicate_of][0]]))
+            continue
+
+        opposite_owners = sorted(owner for owner in overlapped if rules[owner][4] != action)
+        if fully_covered:
+            kind = "shadowed" if has_opposite else "redundant"
+            anomalies.append((rule_id, rule_name, kind, _rule_ids(rules, sorted(overlapped))))
+        elif has_opposite:
+            anomalies.append((rule_id, rule_name, "conflict", _rule_ids(rules, opposite_owners)))
+
+    return anomalies
+
+
+def _rule_ids(rules: List[tuple], positions: List[int]) -> List[int]:
+    return [rules[position][0] for position in positions[:MAX_RELATED_RULES]]
+
+
+def _port_intervals(port_range: Optional[str]) -> Optional[Tuple[Tuple[int, int], ...]]:
+    """규칙 포트 범위 -> ((low, high), ...) (없으면 전체 포트, 잘못된 값이면 None)"""
+    if not port_range:
+        return ((MIN_PORT, MAX_PORT),)
+    try:
+        starts, ends = parse_port_range(port_range)
+    except ValueError:
+        return None
+    return tuple(zip(starts, ends))
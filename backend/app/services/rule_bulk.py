@@ -0,0 +1,211 @@
+from sqlalchemy import insert, literal, select, union_all, update
+from sqlalchemy.orm import Session
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from app.models.firewall import Firewall
+from app.models.firewall_rule import FirewallRule
+from app.models.network_segment import NetworkSegment
+from app.services.csv_import import RULE_ACTIONS, RULE_PROTOCOLS
+from app.services.topology_service import refresh_topology_connections
+from app.services.topology_version import record_rule_changes
+
+# Ids per IN clause when loading referenced rows (below SQLite's bound parameter limit)
+_IN_CHUNK_SIZE = 10000
+
+# Fields that cannot be patched to null
+_REQUIRED_FIELDS = ("firewall_id", "rule_name", "source_segment_id", "destination_segment_id", "protocol", "action")
+
+
+def bulk_create_rules(db: Session, items: List[Dict[str, Any]], atomic: bool = True) -> Dict[str, Any]:
+    """
+    Create many rules in one transaction
+
+    Firewall and segment references of all items are checked with a single query,
+    valid rows are inserted with one executemany INSERT, and the topology cache
+    refresh and change records for all created rules happen in the same
+    transaction, so readers see either none or all of the new rules.
+
+    With ``atomic`` nothing is created if any item is invalid; otherwise invalid
+    items are reported and the rest are created.
+
+    Returns:
+        {"success": bool, "applied": int, "failed": int,
+         "results": [{"index", "id", "status", "error"}, ...]}  # request order
+    """
+    firewall_ids, segment_ids = _existing_references(
+        db,
+        {item["firewall_id"] for item in items},
+        {item[key] for item in items for key in ("source_segment_id", "destination_segment_id")}
+    )
+
+    results: List[Dict[str, Any]] = []
+    rows: List[Dict[str, Any]] = []
+    positions: List[int] = []
+    for index, item in enumerate(items):
+        row = _normalize(item)
+        error = _validate(row, firewall_ids, segment_ids)
+        results.append({"index": index, "id": None, "status": "error" if error else "created", "error": error})
+        if not error:
+            rows.append(row)
+            positions.append(index)
+
+    failed = len(items) - len(rows)
+    if atomic and failed:
+        return _rejected(results, failed)
+
+    if rows:
+        try:
+            created = db.execute(
+                insert(FirewallRule).returning(
+                    FirewallRule.id,
+                    FirewallRule.source_segment_id,
+                    FirewallRule.destination_segment_id,
+                    sort_by_parameter_order=True
+                ),
+                rows
+            ).all()
+            refresh_topology_connections(db, [(source_id, dest_id) for _, source_id, dest_id in created])
+            record_rule_changes(db, "create", [tuple(row) for row in created])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            return _commit_failed(results, positions, e)
+
+        for position, (rule_id, _, _) in zip(positions, created):
+            results[position]["id"] = rule_id
+
+    return {"success": not failed, "applied": len(rows), "failed": failed, "results": results}
+
+
+def bulk_update_rules(db: Session, items: List[Dict[str, Any]], atomic: bool = True) -> Dict[str, Any]:
+    """
+    Apply partial updates (``id`` plus the fields to change) to many rules in one transaction
+
+    The current rows of all targeted rules and all newly referenced firewalls and
+    segments are loaded with set-based queries; valid changes are written with one
+    executemany UPDATE by primary key. The topology cache is refreshed for both the
+    old and the new segment pair of every changed rule.
+
+    Returns the same structure as bulk_create_rules (status "updated").
+    """
+    rule_ids = [item["id"] for item in items]
+    current: Dict[int, Tuple[int, int]] = {}
+    for start in range(0, len(rule_ids), _IN_CHUNK_SIZE):
+        current.update({
+            rule_id: (source_id, dest_id)
+            for rule_id, source_id, dest_id in db.execute(
+                select(FirewallRule.id, FirewallRule.source_segment_id, FirewallRule.destination_segment_id)
+                .where(FirewallRule.id.in_(rule_ids[start:start + _IN_CHUNK_SIZE]))
+            )
+        })
+
+    firewall_ids, segment_ids = _existing_references(
+        db,
+        {item["firewall_id"] for item in items if item.get("firewall_id") is not None},
+        {
+            item[key] for item in items for key in ("source_segment_id", "destination_segment_id")
+            if item.get(key) is not None
+        }
+    )
+
+    results: List[Dict[str, Any]] = []
+    rows: List[Dict[str, Any]] = []
+    positions: List[int] = []
+    seen: Set[int] = set()
+    for index, item in enumerate(items):
+        rule_id = item["id"]
+        row = _normalize(item)
+        if rule_id not in current:
+            error = f"Firewall rule {rule_id} not found"
+        elif rule_id in seen:
+            error = f"Firewall rule {rule_id} is patched more than once"
+        else:
+            error = _validate(row, firewall_ids, segment_ids)
+        seen.add(rule_id)
+
+        results.append({"index": index, "id": rule_id, "status": "error" if error else "updated", "error": error})
+        if not error:
+            rows.append(row)
+            positions.append(index)
+
+    failed = len(items) - len(rows)
+    if atomic and failed:
+        return _rejected(results, failed)
+
+    changes: List[Tuple[int, int, int]] = []
+    for row in rows:
+        old_pair = current[row["id"]]
+        new_pair = (row.get("source_segment_id", old_pair[0]), row.get("destination_segment_id", old_pair[1]))
+        changes.extend((row["id"], *pair) for pair in {old_pair, new_pair})
+
+    if rows:
+        try:
+            # Rows only carrying an id change nothing and are skipped by the UPDATE
+            changed_rows = [row for row in rows if len(row) > 1]
+            if changed_rows:
+                db.execute(update(FirewallRule), changed_rows)
+            refresh_topology_connections(db, [(source_id, dest_id) for _, source_id, dest_id in changes])
+            record_rule_changes(db, "update", changes)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            return _commit_failed(results, positions, e)
+
+    return {"success": not failed, "applied": len(rows), "failed": failed, "results": results}
+
+
+def _existing_references(db: Session, firewall_ids: Set[int], segment_ids: Set[int]) -> Tuple[Set[int], Set[int]]:
+    """Which of the given firewall and segment ids exist (one UNION query per chunk)"""
+    found: Dict[str, Set[int]] = {"firewall": set(), "segment": set()}
+    firewall_list, segment_list = list(firewall_ids), list(segment_ids)
+    for start in range(0, max(len(firewall_list), len(segment_list)), _IN_CHUNK_SIZE):
+        firewall_chunk = firewall_list[start:start + _IN_CHUNK_SIZE]
+        segment_chunk = segment_list[start:start + _IN_CHUNK_SIZE]
+        statement = union_all(
+            select(literal("firewall"), Firewall.id).where(Firewall.id.in_(firewall_chunk)),
+            select(literal("segment"), NetworkSegment.id).where(NetworkSegment.id.in_(segment_chunk))
+        )
+        for kind, entity_id in db.execute(statement):
+            found[kind].add(entity_id)
+    return found["firewall"], found["segment"]
+
+
+def _normalize(item: Dict[str, Any]) -> Dict[str, Any]:
+    row = dict(item)
+    for key in ("protocol", "action"):
+        if row.get(key) is not None:
+            row[key] = row[key].strip().upper()
+    if row.get("rule_name") is not None:
+        row["rule_name"] = row["rule_name"].strip()
+    return row
+
+
+def _validate(row: Dict[str, Any], firewall_ids: Set[int], segment_ids: Set[int]) -> Optional[str]:
+    """Error message for an invalid create/patch row (only the fields present are checked)"""
+    missing = [key for key in _REQUIRED_FIELDS if key in row and row[key] in (None, "")]
+    if missing:
+        return f"{', '.join(missing)} cannot be empty"
+    if "firewall_id" in row and row["firewall_id"] not in firewall_ids:
+        return f"Firewall {row['firewall_id']} not found"
+    for key in ("source_segment_id", "destination_segment_id"):
+        if key in row and row[key] not in segment_ids:
+            return f"Network segment {row[key]} not found"
+    if "protocol" in row and row["protocol"] not in RULE_PROTOCOLS:
+        return f"Invalid protocol: {row['protocol']}"
+    if "action" in row and row["action"] not in RULE_ACTIONS:
+        return f"Invalid action: {row['action']}"
+    return None
+
+
+def _rejected(results: List[Dict[str, Any]], failed: int) -> Dict[str, Any]:
+    """Atomic request with invalid items: nothing is applied"""
+    for result in results:
+        if result["status"] != "error":
+            result["status"] = "skipped"
+    return {"success": False, "applied": 0, "failed": failed, "results": results}
+
+
+def _commit_failed(results: List[Dict[str, Any]], positions: List[int], error: Exception) -> Dict[str, Any]:
+    for position in positions:
+        results[position].update(status="error", error=f"Failed to commit: {str(error)}")
+    return {"success": False, "applied": 0, "failed": len(results), "results": results}
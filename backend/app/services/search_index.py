@@ -0,0 +1,220 @@
+from sqlalchemy import or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+import ipaddress
+import re
+
+from app.models.network_segment import NetworkSegment
+from app.models.firewall_rule import FirewallRule
+
+# '.'와 '/'를 토큰 문자로 취급해 "10.0.1.0/24"를 하나의 토큰으로 색인 (접두어 "10.0."로 검색 가능)
+_TOKENIZER = "unicode61 tokenchars './'"
+
+# 외부 콘텐츠(external content) FTS5 테이블과 동기화 트리거
+# 트리거로 유지하므로 ORM, 벌크 INSERT, CSV 가져오기 등 모든 쓰기 경로가 반영된다
+_SEARCH_TABLES = {
+    "segment_search": ("network_segments", ["name", "ip_range"]),
+    "rule_search": ("firewall_rules", ["rule_name", "description"]),
+}
+
+# bm25 컬럼 가중치 (이름이 일치하는 결과를 우선)
+_SEGMENT_WEIGHTS = "10.0, 5.0"
+_RULE_WEIGHTS = "10.0, 1.0"
+
+_TERM = re.compile(r'[^\s"]+')
+
+# IP 질의에 매칭된 세그먼트가 이보다 많으면 IN 절 대신 규칙을 순회하며 거른다
+_MAX_IN_SEGMENTS = 5000
+
+
+def create_search_index(engine: Engine) -> None:
+    """
+    검색용 FTS5 테이블과 동기화 트리거 생성 (SQLite 전용, 이미 있으면 유지)
+
+    새로 만든 테이블은 기존 데이터로 한 번 재구성한다. SQLite가 아니면
+    아무것도 하지 않으며 검색은 LIKE 검색으로 동작한다.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as conn:
+        existing = set(conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )).scalars())
+
+        for fts_table, (content_table, columns) in _SEARCH_TABLES.items():
+            column_list = ", ".join(columns)
+            new_values = ", ".join(f"new.{column}" for column in columns)
+            old_values = ", ".join(f"old.{column}" for column in columns)
+
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+                f"{column_list}, content='{content_table}', content_rowid='id', tokenize=\"{_TOKENIZER}\")"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {content_table} BEGIN "
+                f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {content_table} BEGIN "
+                f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {content_table} BEGIN "
+                f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+            ))
+
+            if fts_table not in existing:
+                conn.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+
+
+def search_topology(
+    db: Session,
+    q: str,
+    type: Optional[str] = None,
+    limit: int = 50,
+    segment_offset: Optional[int] = 0,
+    rule_offset: Optional[int] = 0
+) -> Dict[str, Any]:
+    """
+    세그먼트와 규칙 검색
+
+    - IP 주소 / CIDR 질의: 겹치는 세그먼트 (가장 구체적인 것부터)와
+      그 세그먼트를 출발지나 목적지로 하는 규칙
+    - 그 외: 단어별 접두어 검색 (FTS5, bm25 순위). SQLite가 아니면 LIKE 검색
+
+    목록별로 최대 limit개를 반환하며, offset이 None인 목록은 이미 끝까지 읽은 것이다.
+
+    Returns:
+        {
+            "segments": [{"id", "name", "ip_range", "zone_type"}, ...],
+            "rules": [{"id", "rule_name", "protocol", "action"}, ...],
+            "offsets": {"segments": int | None, "rules": int | None}  # 다음 페이지 offset
+        }
+    """
+    network = _parse_network(q)
+    include_segments = (not type or type == "segment") and segment_offset is not None
+    include_rules = (not type or type == "rule") and rule_offset is not None
+
+    segments: List[Dict[str, Any]] = []
+    rules: List[Dict[str, Any]] = []
+
+    if network is not None:
+        # numpy를 쓰는 세그먼트 인덱스는 IP 질의에서만 로드 (애플리케이션 시작 시간 단축)
+        from app.services.segment_index import get_segment_index
+
+        index = get_segment_index(db)
+        positions = index.overlapping(network)
+        if include_segments:
+            segments = [
+                {key: index.segments[idx][key] for key in ("id", "name", "ip_range", "zone_type")}
+                for idx in positions[segment_offset:segment_offset + limit + 1]
+            ]
+        if include_rules and positions:
+            rules = _rules_for_segments(
+                db, {index.segment_ids[idx] for idx in positions}, rule_offset, limit + 1
+            )
+
+    elif db.get_bind().dialect.name == "sqlite":
+        match = _match_expression(q)
+        if match and include_segments:
+            segments = _rows(db, text(
+                "SELECT s.id, s.name, s.ip_range, s.zone_type "
+                "FROM segment_search JOIN network_segments s ON s.id = segment_search.rowid "
+                f"WHERE segment_search MATCH :match ORDER BY bm25(segment_search, {_SEGMENT_WEIGHTS}), s.id "
+                "LIMIT :limit OFFSET :offset"
+            ), {"match": match, "limit": limit + 1, "offset": segment_offset})
+        if match and include_rules:
+            rules = _rows(db, text(
+                "SELECT r.id, r.rule_name, r.protocol, r.action "
+                "FROM rule_search JOIN firewall_rules r ON r.id = rule_search.rowid "
+                f"WHERE rule_search MATCH :match ORDER BY bm25(rule_search, {_RULE_WEIGHTS}), r.id "
+                "LIMIT :limit OFFSET :offset"
+            ), {"match": match, "limit": limit + 1, "offset": rule_offset})
+
+    else:
+        if include_segments:
+            segments = _rows(db, select(
+                NetworkSegment.id,
+                NetworkSegment.name,
+                NetworkSegment.ip_range,
+                NetworkSegment.zone_type
+            ).where(
+                (NetworkSegment.name.ilike(f"%{q}%")) |
+                (NetworkSegment.ip_range.ilike(f"%{q}%"))
+            ).order_by(NetworkSegment.id).offset(segment_offset).limit(limit + 1))
+        if include_rules:
+            rules = _rows(db, select(
+                FirewallRule.id,
+                FirewallRule.rule_name,
+                FirewallRule.protocol,
+                FirewallRule.action
+            ).where(
+                (FirewallRule.rule_name.ilike(f"%{q}%")) |
+                (FirewallRule.description.ilike(f"%{q}%"))
+            ).order_by(FirewallRule.id).offset(rule_offset).limit(limit + 1))
+
+    # limit + 1개를 읽어 다음 페이지 존재 여부를 판단
+    return {
+        "segments": segments[:limit],
+        "rules": rules[:limit],
+        "offsets": {
+            "segments": segment_offset + limit if include_segments and len(segments) > limit else None,
+            "rules": rule_offset + limit if include_rules and len(rules) > limit else None,
+        }
+    }
+
+
+def _parse_network(q: str):
+    """IP 주소나 CIDR 질의면 네트워크 객체, 아니면 None"""
+    try:
+        return ipaddress.ip_network(q.strip(), strict=False)
+    except ValueError:
+        return None
+
+
+def _match_expression(q: str) -> Optional[str]:
+    """
+    사용자 입력 -> FTS5 MATCH 식 (단어마다 접두어 검색, 모든 단어 AND)
+
+    FTS5 문법 문자가 해석되지 않도록 각 단어를 큰따옴표로 감싼다.
+    """
+    terms = [term for term in _TERM.findall(q) if any(char.isalnum() for char in term)]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _rules_for_segments(db: Session, segment_ids: set, offset: int, limit: int) -> List[Dict[str, Any]]:
+    """출발지나 목적지가 segment_ids에 속한 규칙 (ID 순, offset/limit 적용)"""
+    columns = (FirewallRule.id, FirewallRule.rule_name, FirewallRule.protocol, FirewallRule.action)
+    if len(segment_ids) <= _MAX_IN_SEGMENTS:
+        return _rows(db, select(*columns).where(or_(
+            FirewallRule.source_segment_id.in_(segment_ids),
+            FirewallRule.destination_segment_id.in_(segment_ids)
+        )).order_by(FirewallRule.id).offset(offset).limit(limit))
+
+    rows: List[Dict[str, Any]] = []
+    skipped = 0
+    result = db.execute(
+        select(*columns, FirewallRule.source_segment_id, FirewallRule.destination_segment_id)
+        .order_by(FirewallRule.id)
+        .execution_options(yield_per=1000)
+    )
+    for rule_id, rule_name, protocol, action, source_id, dest_id in result:
+        if source_id not in segment_ids and dest_id not in segment_ids:
+            continue
+        if skipped < offset:
+            skipped += 1
+            continue
+        rows.append({"id": rule_id, "rule_name": rule_name, "protocol": protocol, "action": action})
+        if len(rows) >= limit:
+            break
+    result.close()
+    return rows
+
+
+def _rows(db: Session, statement, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    return [dict(row) for row in db.execute(statement, params).mappings()]
@@ -0,0 +1,192 @@
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple
+import ipaddress
+import socket
+import threading
+
+import numpy as np
+
+from app.models.network_segment import NetworkSegment
+from app.services.topology_version import get_segment_version
+
+
+class SegmentIndex:
+    """
+    IP 주소 -> 가장 구체적인(prefix가 가장 긴) 세그먼트 조회용 인덱스
+
+    IPv4 세그먼트의 CIDR 경계를 정렬된 정수 배열(boundaries)로 만들고, 인접한 두 경계
+    사이 구간마다 그 구간을 포함하는 가장 구체적인 세그먼트를 owners에 저장한다.
+    조회는 np.searchsorted 한 번으로 배치 전체를 처리한다.
+    같은 CIDR의 세그먼트가 여러 개면 ID가 가장 작은 세그먼트를 선택한다.
+    IPv6 세그먼트는 드물어서 prefix 길이 순 목록으로 순차 비교한다.
+    """
+
+    def __init__(self, version: int, segments: List[Tuple[int, str, str, str]]):
+        self.version = version
+        self.segment_ids: List[int] = []
+        self.segments: List[Dict[str, Any]] = []
+
+        ipv4: List[Tuple[int, int, int, int, int]] = []  # (prefixlen, -segment_id, start, end, idx)
+        ipv6: List[Tuple[int, int, Any, int]] = []  # (prefixlen, -segment_id, network, idx)
+
+        for seg_id, name, ip_range, zone_type in segments:
+            try:
+                network = ipaddress.ip_network(ip_range, strict=False)
+            except ValueError:
+                # 검증 도입 이전에 저장된 잘못된 CIDR은 어떤 IP와도 매칭되지 않음
+                continue
+
+            idx = len(self.segment_ids)
+            self.segment_ids.append(seg_id)
+            self.segments.append({"id": seg_id, "name": name, "ip_range": ip_range, "zone_type": zone_type})
+            if network.version == 4:
+                ipv4.append((network.prefixlen, -seg_id, int(network.network_address), int(network.broadcast_address), idx))
+            else:
+                ipv6.append((network.prefixlen, -seg_id, network, idx))
+
+        # 덜 구체적인 세그먼트부터 구간을 칠하면 더 구체적인 세그먼트가 덮어쓴다
+        ipv4.sort()
+        starts = np.array([net[2] for net in ipv4], dtype=np.int64)
+        stops = np.array([net[3] + 1 for net in ipv4], dtype=np.int64)
+        self.boundaries = np.unique(np.concatenate([starts, stops, np.zeros(1, dtype=np.int64)]))
+        self.owners = np.full(len(self.boundaries), -1, dtype=np.int64)
+
+        # 겹침 검색용 (prefix 길이 오름차순)
+        self.ipv4_starts = starts
+        self.ipv4_ends = stops - 1
+        self.ipv4_prefixlens = np.array([net[0] for net in ipv4], dtype=np.int64)
+        self.ipv4_positions = np.array([net[4] for net in ipv4], dtype=np.int64)
+
+        lows = np.searchsorted(self.boundaries, starts)
+        highs = np.searchsorted(self.boundaries, stops)
+        for (_, _, _, _, idx), low, high in zip(ipv4, lows, highs):
+            self.owners[low:high] = idx
+
+        # 가장 구체적인 IPv6 세그먼트가 먼저 오도록 정렬 (같으면 ID가 작은 순)
+        ipv6.sort(key=lambda net: (-net[0], -net[1]))
+        self.ipv6 = [(network, idx) for _, _, network, idx in ipv6]
+
+    def lookup_ipv4(self, addresses: np.ndarray) -> np.ndarray:
+        """IPv4 정수 배열 -> 세그먼트 위치 배열 (없으면 -1)"""
+        positions = np.searchsorted(self.boundaries, addresses, side="right") - 1
+        return self.owners[positions]
+
+    def overlapping(self, network) -> List[int]:
+        """
+        network과 겹치는(포함하거나 포함되는) 세그먼트 위치 목록
+
+        prefix 길이가 network과 가까운 순 (단일 주소면 가장 구체적인 세그먼트부터),
+        같으면 세그먼트 ID 순으로 정렬한다.
+        """
+        if network.version == 4:
+            mask = (self.ipv4_starts <= int(network.broadcast_address)) & (self.ipv4_ends >= int(network.network_address))
+            matches = zip(self.ipv4_prefixlens[mask].tolist(), self.ipv4_positions[mask].tolist())
+        else:
+            matches = [(net.prefixlen, idx) for net, idx in self.ipv6 if net.overlaps(network)]
+
+        ranked = sorted(
+            (abs(prefixlen - network.prefixlen), self.segment_ids[idx], idx)
+            for prefixlen, idx in matches
+        )
+        return [idx for _, _, idx in ranked]
+
+    def lookup_ipv6(self, address: ipaddress.IPv6Address) -> int:
+        for network, idx in self.ipv6:
+            if address in network:
+                return idx
+        return -1
+
+
+_segment_index: Optional[SegmentIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_segment_index(db: Session) -> SegmentIndex:
+    """
+    프로세스 전역 세그먼트 인덱스 조회 (세그먼트가 변경된 경우에만 재구성)
+    """
+    global _segment_index
+
+    version = get_segment_version(db)
+    index = _segment_index
+    if index is not None and index.version == version:
+        return index
+
+    with _index_lock:
+        index = _segment_index
+        if index is None or index.version != version:
+            segments = db.query(
+                NetworkSegment.id,
+                NetworkSegment.name,
+                NetworkSegment.ip_range,
+                NetworkSegment.zone_type
+            ).order_by(NetworkSegment.id).all()
+            index = SegmentIndex(version, segments)
+            _segment_index = index
+    return index
+
+
+def classify_ips(db: Session, ips: List[str]) -> Dict[str, Any]:
+    """
+    IP 주소 목록을 각 IP를 포함하는 가장 구체적인 세그먼트로 분류
+
+    Returns:
+        {
+            "segment_ids": [int | None, ...],  # 입력 순서, 포함하는 세그먼트가 없으면 None
+            "invalid_indices": [int, ...],     # IP 주소로 해석할 수 없는 입력의 위치
+            "segments": [{"id", "name", "ip_range", "zone_type"}, ...]  # 결과에 등장한 세그먼트
+        }
+    """
+    index = get_segment_index(db)
+    positions, invalid = lookup_ips(index, ips)
+
+    # 위치 -1 (미분류)은 마지막에 덧붙인 자리를 가리키고, 아래에서 None으로 바뀐다
+    segment_ids = np.asarray(index.segment_ids + [0], dtype=np.int64)[positions]
+    matched = positions >= 0
+    result_ids = np.where(matched, segment_ids, -1).tolist()
+
+    return {
+        "segment_ids": [seg_id if seg_id >= 0 else None for seg_id in result_ids],
+        "invalid_indices": invalid,
+        "segments": [index.segments[idx] for idx in np.unique(positions[matched]).tolist()]
+    }
+
+
+def lookup_ips(index: SegmentIndex, ips: List[str]) -> Tuple[np.ndarray, List[int]]:
+    """입력 IP별 세그먼트 위치 (-1: 없음/잘못된 입력)와 잘못된 입력의 위치 목록"""
+    pton = socket.inet_pton
+    af_inet = socket.AF_INET
+
+    # 대부분의 입력은 IPv4이므로 한 번에 4바이트 빅엔디언 배열로 변환
+    try:
+        packed = b"".join([pton(af_inet, ip) for ip in ips])
+    except (OSError, TypeError, ValueError):  # ValueError: NUL 문자가 포함된 문자열
+        packed = None
+
+    if packed is not None:
+        addresses = np.frombuffer(packed, dtype=">u4").astype(np.int64)
+        return index.lookup_ipv4(addresses), []
+
+    # IPv6나 잘못된 입력이 섞인 경우: IPv4만 모아 배치 조회, 나머지는 개별 처리
+    positions = np.full(len(ips), -1, dtype=np.int64)
+    ipv4_positions: List[int] = []
+    ipv4_packed: List[bytes] = []
+    invalid: List[int] = []
+
+    for position, ip in enumerate(ips):
+        try:
+            ipv4_packed.append(pton(af_inet, ip))
+            ipv4_positions.append(position)
+            continue
+        except (OSError, TypeError, ValueError):
+            pass
+        try:
+            positions[position] = index.lookup_ipv6(ipaddress.IPv6Address(ip))
+        except ValueError:
+            invalid.append(position)
+
+    if ipv4_positions:
+        addresses = np.frombuffer(b"".join(ipv4_packed), dtype=">u4").astype(np.int64)
+        positions[ipv4_positions] = index.lookup_ipv4(addresses)
+
+    return positions, invalid
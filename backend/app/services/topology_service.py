@@ -1,9 +1,49 @@
+from sqlalchemy import func, insert, or_, and_
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
-from collections import defaultdict
+from typing import List, Optional, Dict, Any, Iterable, Tuple
+from collections import Counter, OrderedDict, defaultdict
+import hashlib
+import ipaddress
+import json
+import threading
 
 from app.models.network_segment import NetworkSegment
 from app.models.firewall_rule import FirewallRule
+from app.models.segment_position import SegmentPosition
+from app.models.topology_connection import TopologyConnection
+from app.services.topology_version import get_changes_between, get_topology_version
+
+# Max number of (source, destination) pairs per OR clause when refreshing connections
+_PAIR_CHUNK_SIZE = 200
+
+# Above this many affected pairs a single full rebuild is cheaper than per-pair refreshes
+_FULL_REBUILD_PAIRS = 5000
+
+# Number of encoded graph responses kept (one per topology version and filter combination)
+GRAPH_CACHE_SIZE = 32
+
+# Graph detail levels: one node per segment, per zone_type, or per CIDR supernet
+GRAPH_LEVELS = ("segment", "zone", "cidr-supernet")
+
+# Default IPv4 prefix length of cidr-supernet clusters
+DEFAULT_SUPERNET_PREFIX = 16
+
+# IPv6 segments are always grouped by /48 (site prefix)
+IPV6_SUPERNET_PREFIX = 48
+
+# Number of per-pair rule aggregates kept (one per topology version and rule filter)
+AGGREGATE_CACHE_SIZE = 8
+
+GraphFilters = Tuple[Tuple[str, ...], Tuple[str, ...], Optional[str]]
+
+# (level, supernet prefix length, expanded cluster id)
+GraphView = Tuple[str, Optional[int], Optional[str]]
+
+SEGMENT_VIEW: GraphView = ("segment", None, None)
+
+_graph_cache: "OrderedDict[Tuple[int, GraphFilters, GraphView], bytes]" = OrderedDict()
+_aggregate_cache: "OrderedDict[Tuple[int, Tuple[str, ...], Optional[str]], list]" = OrderedDict()
+_graph_cache_lock = threading.Lock()
 
 
 def build_topology_graph(
@@ -13,7 +53,7 @@ def build_topology_graph(
     action: Optional[str] = None
 ) -> Dict[str, Any]:
     """
-    Build topology graph from firewall rules and network segments
+    Build topology graph from the pre-merged topology_connection table
 
     Args:
         db: Database session
@@ -25,64 +65,386 @@ def build_topology_graph(
         Dictionary with 'nodes' and 'edges' lists representing the topology graph
     """
 
-    # 1. Query segments with optional filtering
-    segments_query = db.query(NetworkSegment)
+    nodes, segment_ids = _build_nodes(db, zone_types)
+    edges = _build_edges(db, segment_ids, protocols, action)
+
+    return {
+        "nodes": nodes,
+        "edges": edges
+    }
+
+
+def build_topology_delta(
+    db: Session,
+    since: int,
+    until: int,
+    zone_types: Optional[List[str]] = None,
+    protocols: Optional[List[str]] = None,
+    action: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Nodes and edges of the (filtered) topology graph that changed between two versions
+
+    Only segments and segment pairs touched by the change log in (since, until]
+    are read. Each touched node/edge is either returned in ``upserted`` with its
+    current content (added or modified; clients replace it by id) or listed by id
+    in ``removed`` when it is no longer part of the filtered graph.
+
+    Returns:
+        {
+            "since": int,
+            "version": int,
+            "nodes": {"upserted": [...], "removed": ["segment-<id>", ...]},
+            "edges": {"upserted": [...], "removed": ["edge-<src>-<dst>", ...]}
+        }
+    """
+    changes = get_changes_between(db, since, until)
+    changed_segments = {change.entity_id for change in changes if change.entity == "segment"}
+    pairs = {
+        (change.source_segment_id, change.destination_segment_id)
+        for change in changes if change.entity == "rule"
+    }
+
+    # Adding, removing or re-zoning a segment also changes which of its edges are visible
+    if changed_segments:
+        pairs.update(db.query(
+            TopologyConnection.source_segment_id,
+            TopologyConnection.destination_segment_id
+        ).filter(or_(
+            TopologyConnection.source_segment_id.in_(changed_segments),
+            TopologyConnection.destination_segment_id.in_(changed_segments)
+        )).all())
+    pairs = sorted(pairs)
+
+    endpoints = changed_segments | {seg_id for pair in pairs for seg_id in pair}
+    nodes, visible = _build_nodes(db, zone_types, endpoints)
+    edges = _build_edges(db, visible, protocols, action, pairs)
+
+    changed_node_ids = {f"segment-{seg_id}" for seg_id in changed_segments}
+    edge_ids = {edge["id"] for edge in edges}
+
+    return {
+        "since": since,
+        "version": until,
+        "nodes": {
+            "upserted": [node for node in nodes if node["id"] in changed_node_ids],
+            "removed": [f"segment-{seg_id}" for seg_id in sorted(changed_segments - visible)]
+        },
+        "edges": {
+            "upserted": edges,
+            "removed": [
+                f"edge-{source_id}-{dest_id}" for source_id, dest_id in pairs
+                if f"edge-{source_id}-{dest_id}" not in edge_ids
+            ]
+        }
+    }
+
+
+def build_clustered_graph(
+    db: Session,
+    level: str,
+    zone_types: Optional[List[str]] = None,
+    protocols: Optional[List[str]] = None,
+    action: Optional[str] = None,
+    prefix_length: int = DEFAULT_SUPERNET_PREFIX,
+    expand: Optional[str] = None,
+    version: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Topology graph with segments collapsed into clusters
+
+    With level "zone" every zone_type becomes one node, with "cidr-supernet" every
+    IPv4 /prefix_length (IPv6 /48) network containing segments does. Edges between
+    clusters aggregate all rules between their members: rule count, allow/deny
+    counts, protocol and action sets, and the number of segment pairs. Rules
+    between members of the same collapsed cluster are counted on the cluster node.
+
+    The cluster named by ``expand`` is returned as a compound node whose members
+    are regular segment nodes (with ``parent`` set to the cluster id); their edges
+    to other clusters are aggregated the same way.
+
+    Per-pair rule counts come from one GROUP BY query that is cached per topology
+    version and rule filter, so switching levels or expanding another cluster only
+    re-groups the cached aggregate.
+    """
+    segments_query = db.query(
+        NetworkSegment.id,
+        NetworkSegment.name,
+        NetworkSegment.ip_range,
+        NetworkSegment.zone_type,
+        NetworkSegment.color,
+        NetworkSegment.description,
+        SegmentPosition.x,
+        SegmentPosition.y
+    ).outerjoin(SegmentPosition, SegmentPosition.segment_id == NetworkSegment.id)
     if zone_types:
         segments_query = segments_query.filter(NetworkSegment.zone_type.in_(zone_types))
-    segments = segments_query.all()
 
-    # 2. Query firewall rules with optional filtering
-    rules_query = db.query(FirewallRule)
+    # segment id -> graph node id it is drawn as
+    endpoint: Dict[int, str] = {}
+    clusters: Dict[str, Dict[str, Any]] = {}
+    member_nodes = []
+    for segment_id, name, ip_range, zone_type, color, description, x, y in segments_query.order_by(NetworkSegment.id):
+        cluster_id, cluster_range = _cluster_of(level, ip_range, zone_type, prefix_length)
+        cluster = clusters.get(cluster_id)
+        if cluster is None:
+            cluster = clusters[cluster_id] = {
+                "label": zone_type if level == "zone" else cluster_range,
+                "ip_range": cluster_range,
+                "zones": Counter(),
+                "colors": Counter(),
+                "positions": [],
+                "rule_count": 0,
+                "pairs": set()
+            }
+        cluster["zones"][zone_type] += 1
+        cluster["colors"][color] += 1
+        if x is not None:
+            cluster["positions"].append((x, y))
+
+        if cluster_id == expand:
+            endpoint[segment_id] = f"segment-{segment_id}"
+            member_nodes.append({
+                "id": f"segment-{segment_id}",
+                "label": name,
+                "ip_range": ip_range,
+                "zone_type": zone_type,
+                "color": color,
+                "description": description,
+                "x": x,
+                "y": y,
+                "parent": cluster_id
+            })
+        else:
+            endpoint[segment_id] = cluster_id
+
+    edge_map: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for source_id, dest_id, protocol, rule_action, count in _pair_aggregates(db, protocols, action, version):
+        source = endpoint.get(source_id)
+        dest = endpoint.get(dest_id)
+        if source is None or dest is None:
+            continue
+        if source == dest and source in clusters:
+            clusters[source]["rule_count"] += count
+            clusters[source]["pairs"].add((source_id, dest_id))
+            continue
+
+        edge = edge_map.get((source, dest))
+        if edge is None:
+            edge = edge_map[(source, dest)] = {
+                "protocols": set(),
+                "actions": set(),
+                "pairs": set(),
+                "rule_count": 0,
+                "allow_count": 0,
+                "deny_count": 0
+            }
+        edge["protocols"].add(protocol)
+        edge["actions"].add(rule_action)
+        edge["pairs"].add((source_id, dest_id))
+        edge["rule_count"] += count
+        edge["allow_count" if rule_action == "ALLOW" else "deny_count"] += count
+
+    nodes = []
+    for cluster_id in sorted(clusters):
+        cluster = clusters[cluster_id]
+        segment_count = sum(cluster["zones"].values())
+        # Collapsed clusters sit at the centroid of their members' positions
+        positions = cluster["positions"]
+        nodes.append({
+            "id": cluster_id,
+            "label": f"{cluster['label']} ({segment_count})",
+            "ip_range": cluster["ip_range"],
+            "zone_type": cluster["zones"].most_common(1)[0][0],
+            "color": cluster["colors"].most_common(1)[0][0],
+            "description": f"{segment_count} segments",
+            "x": sum(x for x, _ in positions) / len(positions) if positions else None,
+            "y": sum(y for _, y in positions) / len(positions) if positions else None,
+            "kind": "cluster",
+            "expanded": cluster_id == expand,
+            "metadata": {
+                "segment_count": segment_count,
+                "zone_counts": dict(sorted(cluster["zones"].items())),
+                "internal_rule_count": cluster["rule_count"],
+                "internal_connection_count": len(cluster["pairs"])
+            }
+        })
+    nodes.extend(member_nodes)
+
+    edges = []
+    for (source, dest), edge in sorted(edge_map.items()):
+        protocols_str = ", ".join(sorted(edge["protocols"]))
+        actions_str = ", ".join(sorted(edge["actions"]))
+        edges.append({
+            "id": f"edge-{source}-{dest}",
+            "from": source,
+            "to": dest,
+            "label": f"{protocols_str} ({actions_str}) - {edge['rule_count']} rules",
+            "metadata": {
+                "protocols": sorted(edge["protocols"]),
+                "actions": sorted(edge["actions"]),
+                "rule_count": edge["rule_count"],
+                "allow_count": edge["allow_count"],
+                "deny_count": edge["deny_count"],
+                "connection_count": len(edge["pairs"])
+            }
+        })
+
+    return {
+        "nodes": nodes,
+        "edges": edges
+    }
+
+
+def _cluster_of(level: str, ip_range: str, zone_type: str, prefix_length: int) -> Tuple[str, str]:
+    """(cluster node id, cluster ip_range) of a segment"""
+    if level == "zone":
+        return f"zone-{zone_type}", ""
+
+    network = ipaddress.ip_network(ip_range, strict=False)
+    prefix = prefix_length if network.version == 4 else IPV6_SUPERNET_PREFIX
+    # Segments wider than the supernet (e.g. 0.0.0.0/0) form their own cluster
+    supernet = network.supernet(new_prefix=min(prefix, network.prefixlen))
+    return f"supernet-{supernet}", str(supernet)
+
+
+def _pair_aggregates(
+    db: Session,
+    protocols: Optional[List[str]] = None,
+    action: Optional[str] = None,
+    version: Optional[int] = None
+) -> list:
+    """
+    Rule counts per (source, destination, protocol, action), cached per topology version
+    """
+    protocols = tuple(sorted({p.upper() for p in protocols or []}))
+    action = action.upper() if action else None
+    key = (version, protocols, action)
+    if version is not None:
+        with _graph_cache_lock:
+            rows = _aggregate_cache.get(key)
+            if rows is not None:
+                _aggregate_cache.move_to_end(key)
+                return rows
+
+    group = (
+        FirewallRule.source_segment_id,
+        FirewallRule.destination_segment_id,
+        FirewallRule.protocol,
+        FirewallRule.action
+    )
+    query = db.query(*group, func.count(FirewallRule.id))
     if protocols:
-        rules_query = rules_query.filter(FirewallRule.protocol.in_([p.upper() for p in protocols]))
+        query = query.filter(FirewallRule.protocol.in_(protocols))
     if action:
-        rules_query = rules_query.filter(FirewallRule.action == action.upper())
-    rules = rules_query.all()
+        query = query.filter(FirewallRule.action == action)
+    rows = [tuple(row) for row in query.group_by(*group)]
+
+    if version is not None and get_topology_version(db) == version:
+        with _graph_cache_lock:
+            _aggregate_cache[key] = rows
+            while len(_aggregate_cache) > AGGREGATE_CACHE_SIZE:
+                _aggregate_cache.popitem(last=False)
+    return rows
+
+
+def _build_nodes(
+    db: Session,
+    zone_types: Optional[List[str]] = None,
+    only_ids: Optional[set] = None
+) -> Tuple[List[Dict[str, Any]], set]:
+    """Graph nodes of the (filtered) segments; returns (nodes, ids of the included segments)"""
+    segments_query = db.query(
+        NetworkSegment.id,
+        NetworkSegment.name,
+        NetworkSegment.ip_range,
+        NetworkSegment.zone_type,
+        NetworkSegment.color,
+        NetworkSegment.description,
+        SegmentPosition.x,
+        SegmentPosition.y
+    ).outerjoin(SegmentPosition, SegmentPosition.segment_id == NetworkSegment.id)
+    if zone_types:
+        segments_query = segments_query.filter(NetworkSegment.zone_type.in_(zone_types))
+    if only_ids is not None:
+        segments_query = segments_query.filter(NetworkSegment.id.in_(only_ids))
 
-    # 3. Build nodes from segments
     nodes = []
     segment_ids = set()
 
-    for segment in segments:
-        segment_ids.add(segment.id)
+    for segment_id, name, ip_range, zone_type, color, description, x, y in segments_query:
+        segment_ids.add(segment_id)
         nodes.append({
-            "id": f"segment-{segment.id}",
-            "label": segment.name,
-            "ip_range": segment.ip_range,
-            "zone_type": segment.zone_type,
-            "color": segment.color,
-            "description": segment.description
+            "id": f"segment-{segment_id}",
+            "label": name,
+            "ip_range": ip_range,
+            "zone_type": zone_type,
+            "color": color,
+            "description": description,
+            "x": x,
+            "y": y
         })
 
-    # 4. Build edges from rules
-    # Group rules by (source, destination) pair to merge them into single edges
-    edge_map = defaultdict(lambda: {
-        "rule_ids": [],
-        "protocols": set(),
-        "ports": set(),
-        "actions": set(),
-        "descriptions": []
-    })
-
-    for rule in rules:
-        # Only include rules where both source and destination are in filtered segments
-        if rule.source_segment_id not in segment_ids or rule.destination_segment_id not in segment_ids:
-            continue
+    return nodes, segment_ids
 
-        edge_key = (rule.source_segment_id, rule.destination_segment_id)
-        edge_data = edge_map[edge_key]
 
-        edge_data["rule_ids"].append(rule.id)
-        edge_data["protocols"].add(rule.protocol)
-        edge_data["actions"].add(rule.action)
+def _build_edges(
+    db: Session,
+    segment_ids: set,
+    protocols: Optional[List[str]] = None,
+    action: Optional[str] = None,
+    pairs: Optional[List[Tuple[int, int]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Graph edges between the given segments, optionally only for some segment pairs
+    """
+    # Read one pre-merged row per (source, destination) pair.
+    # Without rule filters the aggregated columns are used as-is; with filters the
+    # per-rule details of each pair are re-merged, which still avoids loading rules.
+    edge_map = {}
+    if not protocols and not action:
+        rows = _connection_rows(db, [
+            TopologyConnection.source_segment_id,
+            TopologyConnection.destination_segment_id,
+            TopologyConnection.rule_ids,
+            TopologyConnection.protocols,
+            TopologyConnection.ports,
+            TopologyConnection.actions,
+            TopologyConnection.descriptions,
+        ], pairs)
 
-        if rule.port_range:
-            edge_data["ports"].add(rule.port_range)
+        for source_id, dest_id, rule_ids, protocols_json, ports, actions, descriptions in rows:
+            if source_id not in segment_ids or dest_id not in segment_ids:
+                continue
+            edge_map[(source_id, dest_id)] = {
+                "rule_ids": json.loads(rule_ids),
+                "protocols": json.loads(protocols_json),
+                "ports": json.loads(ports),
+                "actions": json.loads(actions),
+                "descriptions": json.loads(descriptions)
+            }
+    else:
+        protocol_filter = {p.upper() for p in protocols} if protocols else None
+        action_filter = action.upper() if action else None
 
-        if rule.description:
-            edge_data["descriptions"].append(rule.description)
+        rows = _connection_rows(db, [
+            TopologyConnection.source_segment_id,
+            TopologyConnection.destination_segment_id,
+            TopologyConnection.rule_details,
+        ], pairs)
 
-    # 5. Create edge objects
+        for source_id, dest_id, rule_details in rows:
+            if source_id not in segment_ids or dest_id not in segment_ids:
+                continue
+            details = [
+                detail for detail in json.loads(rule_details)
+                if (protocol_filter is None or detail[1] in protocol_filter)
+                and (action_filter is None or detail[3] == action_filter)
+            ]
+            if details:
+                edge_map[(source_id, dest_id)] = _merge_rule_details(details)
+
+    # Create edge objects
     edges = []
     for (source_id, dest_id), data in edge_map.items():
         edge_id = f"edge-{source_id}-{dest_id}"
@@ -97,16 +459,212 @@ def build_topology_graph(
             "from": f"segment-{source_id}",
             "to": f"segment-{dest_id}",
             "label": label,
-            "metadata": {
-                "rule_ids": data["rule_ids"],
-                "protocols": list(data["protocols"]),
-                "ports": list(data["ports"]),
-                "actions": list(data["actions"]),
-                "descriptions": data["descriptions"]
-            }
+            "metadata": data
         })
 
+    return edges
+
+
+def _connection_rows(db: Session, columns: list, pairs: Optional[List[Tuple[int, int]]] = None):
+    """Yield topology_connection rows, all of them or only those of the given pairs"""
+    order = (TopologyConnection.source_segment_id, TopologyConnection.destination_segment_id)
+    if pairs is None or len(pairs) > _FULL_REBUILD_PAIRS:
+        wanted = None if pairs is None else set(pairs)
+        for row in db.query(*columns).order_by(*order):
+            if wanted is None or (row[0], row[1]) in wanted:
+                yield row
+        return
+
+    for start in range(0, len(pairs), _PAIR_CHUNK_SIZE):
+        chunk = pairs[start:start + _PAIR_CHUNK_SIZE]
+        yield from db.query(*columns).filter(
+            _pair_filter(TopologyConnection.source_segment_id, TopologyConnection.destination_segment_id, chunk)
+        ).order_by(*order)
+
+
+def normalize_graph_filters(
+    zone_types: Optional[List[str]] = None,
+    protocols: Optional[List[str]] = None,
+    action: Optional[str] = None
+) -> GraphFilters:
+    """
+    Canonical form of the graph filters, so equivalent requests share a cache entry and ETag
+    """
+    return (
+        tuple(sorted(set(zone_types or []))),
+        tuple(sorted({p.upper() for p in protocols or []})),
+        action.upper() if action else None
+    )
+
+
+def normalize_graph_view(
+    level: str = "segment",
+    prefix_length: Optional[int] = None,
+    expand: Optional[str] = None
+) -> GraphView:
+    """
+    Canonical form of the graph level options (prefix length only applies to cidr-supernet)
+    """
+    if level == "segment":
+        return SEGMENT_VIEW
+    if level == "cidr-supernet":
+        return (level, prefix_length or DEFAULT_SUPERNET_PREFIX, expand or None)
+    return (level, None, expand or None)
+
+
+def topology_graph_etag(version: int, filters: GraphFilters, view: GraphView = SEGMENT_VIEW) -> str:
+    """ETag of the graph for a topology version, (normalized) filters and level"""
+    # Segment-level graphs keep the ETags they had before levels were introduced
+    payload = filters if view == SEGMENT_VIEW else [filters, view]
+    digest = hashlib.sha1(json.dumps(payload).encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def render_topology_graph(
+    db: Session,
+    version: int,
+    filters: GraphFilters,
+    view: GraphView = SEGMENT_VIEW
+) -> bytes:
+    """
+    JSON-encoded topology graph for the given version, served from an LRU cache
+
+    The graph is built and encoded once per (version, filters, view); later requests
+    reuse the bytes without rebuilding or re-serializing. If the topology changes
+    while the graph is being built, the result is returned but not cached, since
+    it may not match ``version`` exactly.
+    """
+    key = (version, filters, view)
+    with _graph_cache_lock:
+        body = _graph_cache.get(key)
+        if body is not None:
+            _graph_cache.move_to_end(key)
+            return body
+
+    zone_types, protocols, action = filters
+    level, prefix_length, expand = view
+    if level == "segment":
+        graph_data = build_topology_graph(
+            db,
+            zone_types=list(zone_types),
+            protocols=list(protocols),
+            action=action
+        )
+    else:
+        graph_data = build_clustered_graph(
+            db,
+            level,
+            zone_types=list(zone_types),
+            protocols=list(protocols),
+            action=action,
+            prefix_length=prefix_length or DEFAULT_SUPERNET_PREFIX,
+            expand=expand,
+            version=version
+        )
+    body = json.dumps(graph_data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    if get_topology_version(db) == version:
+        with _graph_cache_lock:
+            _graph_cache[key] = body
+            while len(_graph_cache) > GRAPH_CACHE_SIZE:
+                _graph_cache.popitem(last=False)
+    return body
+
+
+def refresh_topology_connections(db: Session, pairs: Iterable[Tuple[int, int]]) -> None:
+    """
+    Recompute topology_connection rows for the given (source, destination) pairs
+
+    Must be called inside the transaction that changed the rules, before commit.
+    Only rules of the affected pairs are read, so the cost is proportional to the
+    size of the change and not to the size of the rule set.
+    """
+    pairs = list(set(pairs))
+    if not pairs:
+        return
+
+    # Session uses autoflush=False, so pending rule changes must be flushed first
+    db.flush()
+
+    if len(pairs) > _FULL_REBUILD_PAIRS:
+        rebuild_topology_connections(db)
+    else:
+        # OR of (source AND destination) terms lets SQLite use the indexes for each pair;
+        # a row-value IN clause would scan the whole table
+        for start in range(0, len(pairs), _PAIR_CHUNK_SIZE):
+            chunk = pairs[start:start + _PAIR_CHUNK_SIZE]
+
+            db.query(TopologyConnection).filter(
+                _pair_filter(TopologyConnection.source_segment_id, TopologyConnection.destination_segment_id, chunk)
+            ).delete(synchronize_session=False)
+
+            rules = _rule_detail_query(db).filter(
+                _pair_filter(FirewallRule.source_segment_id, FirewallRule.destination_segment_id, chunk)
+            )
+            _insert_connections(db, _group_rule_details(rules))
+
+
+def rebuild_topology_connections(db: Session) -> None:
+    """
+    Recompute the whole topology_connection table from firewall_rules
+
+    Used at startup and after data is loaded outside the API (e.g. seeding).
+    """
+    db.query(TopologyConnection).delete(synchronize_session=False)
+    _insert_connections(db, _group_rule_details(_rule_detail_query(db)))
+
+
+def _pair_filter(source_column, destination_column, pairs: List[Tuple[int, int]]):
+    return or_(*[
+        and_(source_column == source_id, destination_column == dest_id)
+        for source_id, dest_id in pairs
+    ])
+
+
+def _rule_detail_query(db: Session):
+    return db.query(
+        FirewallRule.id,
+        FirewallRule.source_segment_id,
+        FirewallRule.destination_segment_id,
+        FirewallRule.protocol,
+        FirewallRule.port_range,
+        FirewallRule.action,
+        FirewallRule.description,
+    ).order_by(FirewallRule.id)
+
+
+def _group_rule_details(rules) -> Dict[Tuple[int, int], List[list]]:
+    grouped = defaultdict(list)
+    for rule_id, source_id, dest_id, protocol, port_range, action, description in rules:
+        grouped[(source_id, dest_id)].append([rule_id, protocol, port_range, action, description])
+    return grouped
+
+
+def _merge_rule_details(details: List[list]) -> Dict[str, Any]:
+    """Merge per-rule details of one segment pair into edge metadata"""
     return {
-        "nodes": nodes,
-        "edges": edges
+        "rule_ids": [detail[0] for detail in details],
+        "protocols": sorted({detail[1] for detail in details}),
+        "ports": sorted({detail[2] for detail in details if detail[2]}),
+        "actions": sorted({detail[3] for detail in details}),
+        "descriptions": [detail[4] for detail in details if detail[4]]
     }
+
+
+def _insert_connections(db: Session, grouped: Dict[Tuple[int, int], List[list]]) -> None:
+    rows = []
+    for (source_id, dest_id), details in grouped.items():
+        merged = _merge_rule_details(details)
+        rows.append({
+            "source_segment_id": source_id,
+            "destination_segment_id": dest_id,
+            "rule_ids": json.dumps(merged["rule_ids"]),
+            "protocols": json.dumps(merged["protocols"]),
+            "ports": json.dumps(merged["ports"]),
+            "actions": json.dumps(merged["actions"]),
+            "descriptions": json.dumps(merged["descriptions"]),
+            "rule_details": json.dumps(details),
+        })
+
+    if rows:
+        db.execute(insert(TopologyConnection), rows)
@@ -0,0 +1,118 @@
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Tuple
+
+from app.models.topology_change import TopologyChange, TopologyVersion
+
+# 버전 카운터 행의 ID
+_COUNTER_ID = 1
+
+
+def get_topology_version(db: Session) -> int:
+    """
+    현재 토폴로지 버전 (커밋된 마지막 변경의 버전, 변경이 없으면 0)
+    """
+    return db.query(TopologyVersion.version).filter(TopologyVersion.id == _COUNTER_ID).scalar() or 0
+
+
+def get_segment_version(db: Session) -> int:
+    """
+    마지막 세그먼트 변경의 토폴로지 버전 (세그먼트만 참조하는 캐시의 유효성 판단용)
+    """
+    return db.query(TopologyVersion.segment_version).filter(TopologyVersion.id == _COUNTER_ID).scalar() or 0
+
+
+def ensure_version_counter(db: Session) -> None:
+    """
+    버전 카운터 행이 없으면 변경 이력의 마지막 버전으로 생성 (데이터베이스 초기화 시 호출)
+    """
+    if db.query(TopologyVersion.id).filter(TopologyVersion.id == _COUNTER_ID).first() is not None:
+        return
+    last = db.query(TopologyChange.version).order_by(TopologyChange.version.desc()).limit(1).scalar() or 0
+    last_segment = db.query(TopologyChange.version).filter(
+        TopologyChange.entity == "segment"
+    ).order_by(TopologyChange.version.desc()).limit(1).scalar() or 0
+    db.execute(insert(TopologyVersion).values(id=_COUNTER_ID, version=last, segment_version=last_segment))
+
+
+def _next_version(db: Session, segment: bool = False) -> int:
+    """
+    버전 카운터를 증가시키고 새 버전을 반환 (변경을 수행한 트랜잭션 안에서 호출)
+
+    카운터 행은 커밋할 때까지 잠겨 있으므로, 동시에 쓰는 다른 트랜잭션은 이 트랜잭션이
+    커밋된 뒤의 값을 증가시킨다.
+    """
+    values = {"version": TopologyVersion.version + 1}
+    if segment:
+        # SET 식은 갱신 전 값을 참조하므로 새 version과 같은 값
+        values["segment_version"] = TopologyVersion.version + 1
+    version = db.execute(
+        update(TopologyVersion)
+        .where(TopologyVersion.id == _COUNTER_ID)
+        .values(**values)
+        .returning(TopologyVersion.version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if version is None:
+        # 초기화 전 데이터베이스 (ensure_version_counter가 호출되지 않음)
+        version = 1
+        db.execute(insert(TopologyVersion).values(
+            id=_COUNTER_ID, version=version, segment_version=version if segment else 0
+        ))
+    return version
+
+
+def record_rule_changes(
+    db: Session,
+    operation: str,
+    rules: Iterable[Tuple[int, int, int]]
+) -> None:
+    """
+    규칙 변경 이력 기록 (변경을 수행한 트랜잭션 안에서 호출)
+
+    Args:
+        db: Database session
+        operation: create/update/delete
+        rules: (rule_id, source_segment_id, destination_segment_id) 목록
+    """
+    rules = list(rules)
+    if rules:
+        version = _next_version(db)
+        db.execute(insert(TopologyChange), [
+            {
+                "version": version,
+                "entity": "rule",
+                "operation": operation,
+                "entity_id": rule_id,
+                "source_segment_id": source_id,
+                "destination_segment_id": dest_id
+            }
+            for rule_id, source_id, dest_id in rules
+        ])
+
+
+def record_segment_changes(
+    db: Session,
+    operation: str,
+    segment_ids: Iterable[int]
+) -> None:
+    """
+    세그먼트 변경 이력 기록 (변경을 수행한 트랜잭션 안에서 호출)
+    """
+    segment_ids = list(segment_ids)
+    if segment_ids:
+        version = _next_version(db, segment=True)
+        db.execute(insert(TopologyChange), [
+            {"version": version, "entity": "segment", "operation": operation, "entity_id": segment_id}
+            for segment_id in segment_ids
+        ])
+
+
+def get_changes_between(db: Session, since: int, until: int) -> List[TopologyChange]:
+    """
+    (since, until] 버전 구간의 변경 이력 (버전 순)
+    """
+    return db.query(TopologyChange).filter(
+        TopologyChange.version > since,
+        TopologyChange.version <= until
+    ).order_by(TopologyChange.version, TopologyChange.id).all()
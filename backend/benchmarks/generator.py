@@ -0,0 +1,214 @@
+"""
+Deterministic synthetic topology generator for benchmarks
+
+Segments are laid out in sites of SITE_SIZE /24 networks under a per-site /16
+aggregate (10.<site>.0.0/16), with a zone mix close to the sample data. Rules
+follow the usual tiering (External -> DMZ -> Internal tiers, Management -> all)
+and mostly stay inside a site, so path analysis sees realistic multi-hop paths.
+The same (segment_count, seed) always produces the same rows.
+"""
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from typing import Dict, Any, List, Optional
+import csv
+import random
+
+from app.models.firewall import Firewall
+from app.models.firewall_rule import FirewallRule
+from app.models.network_segment import NetworkSegment
+
+DEFAULT_SEED = 42
+
+# Rules generated per segment when no rule count is given
+RULES_PER_SEGMENT = 4
+
+# /24 segments per 10.<site>.0.0/16 site (one aggregate segment per site)
+SITE_SIZE = 250
+
+# Segments protected by each firewall
+SEGMENTS_PER_FIREWALL = 500
+
+# Rows per INSERT statement when loading
+LOAD_CHUNK_SIZE = 5000
+
+# (zone, share of segments, tiers)
+ZONE_MIX = (
+    ("External", 0.02, ("Partner", "Cloud", "Vendor")),
+    ("DMZ", 0.15, ("Web", "API Gateway", "Load Balancer", "Mail")),
+    ("Internal", 0.68, ("Web", "App", "Database", "Cache", "Storage", "Batch")),
+    ("Management", 0.15, ("Monitoring", "Backup", "Bastion", "Logging")),
+)
+
+ZONE_COLORS = {
+    "External": "#E74C3C",
+    "DMZ": "#FF6B6B",
+    "Internal": "#4ECDC4",
+    "Management": "#9B59B6",
+}
+
+# (source zone, destination zone, protocol, port choices, action, weight)
+RULE_PATTERNS = (
+    ("External", "DMZ", "TCP", ("80,443", "443", "25"), "ALLOW", 8),
+    ("External", "Internal", "ANY", (None,), "DENY", 3),
+    ("DMZ", "Internal", "TCP", ("8080", "8000-8100", "8443", "9000-9010"), "ALLOW", 14),
+    ("DMZ", "DMZ", "TCP", ("443", "8080"), "ALLOW", 3),
+    ("Internal", "Internal", "TCP", ("3306", "5432", "6379", "9092", "2049", "8080", "27017"), "ALLOW", 40),
+    ("Internal", "Internal", "UDP", ("53", "123", "514"), "ALLOW", 6),
+    ("Internal", "Internal", "ANY", (None,), "DENY", 5),
+    ("Internal", "External", "TCP", ("80,443", "443"), "ALLOW", 5),
+    ("Management", "Internal", "TCP", ("22", "9100", "5666", "3389"), "ALLOW", 10),
+    ("Management", "DMZ", "TCP", ("22", "9100"), "ALLOW", 4),
+    ("Management", "Internal", "ICMP", (None,), "ALLOW", 2),
+)
+
+# Probability that a rule's destination is in the same site as its source
+SITE_LOCALITY = 0.8
+
+
+def generate_topology(
+    segment_count: int,
+    rule_count: Optional[int] = None,
+    seed: int = DEFAULT_SEED
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Generate firewalls, segments and rules as plain row dicts
+
+    Rows are meant to be inserted in order into empty tables, so the segment and
+    firewall ids referenced by rules are their 1-based positions.
+
+    Returns:
+        {"firewalls": [...], "segments": [...], "rules": [...]}
+    """
+    rng = random.Random(seed)
+    if rule_count is None:
+        rule_count = segment_count * RULES_PER_SEGMENT
+
+    segments = _generate_segments(rng, segment_count)
+    firewalls = [
+        {
+            "name": f"FW-{number:03d}",
+            "vendor": "Synthetic",
+            "model": "BENCH-1000",
+            "management_ip": f"192.168.{number // 250}.{number % 250 + 1}",
+        }
+        for number in range(1, (segment_count - 1) // SEGMENTS_PER_FIREWALL + 2)
+    ]
+    rules = generate_rules(segments, rule_count, len(firewalls), seed=seed + 1)
+
+    return {"firewalls": firewalls, "segments": segments, "rules": rules}
+
+
+def generate_rules(
+    segments: List[Dict[str, Any]],
+    rule_count: int,
+    firewall_count: int,
+    seed: int = DEFAULT_SEED,
+    id_offset: int = 0,
+    name_prefix: str = ""
+) -> List[Dict[str, Any]]:
+    """
+    Generate rules between segments (segment ids are id_offset + 1-based positions)
+    """
+    rng = random.Random(seed)
+
+    # zone -> site -> segment positions, and zone -> all positions
+    by_zone_site: Dict[str, Dict[int, List[int]]] = {}
+    by_zone: Dict[str, List[int]] = {}
+    for position, segment in enumerate(segments):
+        by_zone_site.setdefault(segment["zone_type"], {}).setdefault(segment["_site"], []).append(position)
+        by_zone.setdefault(segment["zone_type"], []).append(position)
+
+    patterns = [pattern for pattern in RULE_PATTERNS if pattern[0] in by_zone and pattern[1] in by_zone]
+    weights = [pattern[5] for pattern in patterns]
+
+    rules = []
+    for number in range(rule_count):
+        source_zone, dest_zone, protocol, ports, action, _ = rng.choices(patterns, weights)[0]
+        source = rng.choice(by_zone[source_zone])
+        local = by_zone_site[dest_zone].get(segments[source]["_site"])
+        if local and rng.random() < SITE_LOCALITY:
+            dest = rng.choice(local)
+        else:
+            dest = rng.choice(by_zone[dest_zone])
+
+        rules.append({
+            "firewall_id": min(source // SEGMENTS_PER_FIREWALL, firewall_count - 1) + 1,
+            "rule_name": f"{name_prefix}{source_zone} to {dest_zone} {number + 1:06d}",
+            "source_segment_id": id_offset + source + 1,
+            "destination_segment_id": id_offset + dest + 1,
+            "protocol": protocol,
+            "port_range": rng.choice(ports),
+            "action": action,
+            "description": f"{segments[source]['name']} -> {segments[dest]['name']}",
+        })
+    return rules
+
+
+def load_topology(db: Session, topology: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Insert generated rows with chunked core INSERTs and commit"""
+    for model, key in ((Firewall, "firewalls"), (NetworkSegment, "segments"), (FirewallRule, "rules")):
+        rows = [{column: value for column, value in row.items() if not column.startswith("_")} for row in topology[key]]
+        for start in range(0, len(rows), LOAD_CHUNK_SIZE):
+            db.execute(insert(model), rows[start:start + LOAD_CHUNK_SIZE])
+    db.commit()
+
+
+def write_csv(path: str, rows: List[Dict[str, Any]], columns: List[str]) -> None:
+    """Write rows in the CSV import format (missing values as empty fields)"""
+    with open(path, "w", newline="", encoding="utf-8") as stream:
+        writer = csv.writer(stream)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(["" if row.get(column) is None else row[column] for column in columns])
+
+
+def _generate_segments(rng: random.Random, segment_count: int) -> List[Dict[str, Any]]:
+    zones = [zone for zone, _, _ in ZONE_MIX]
+    shares = [share for _, share, _ in ZONE_MIX]
+    tiers = {zone: zone_tiers for zone, _, zone_tiers in ZONE_MIX}
+
+    segments = [{
+        "name": "Internet",
+        "ip_range": "0.0.0.0/0",
+        "zone_type": "External",
+        "color": ZONE_COLORS["External"],
+        "description": "Public Internet",
+        "_site": 0,
+    }]
+    external = 0
+    position = 0
+    while len(segments) < segment_count:
+        zone = rng.choices(zones, shares)[0]
+        tier = rng.choice(tiers[zone])
+
+        if zone == "External":
+            # 198.18.0.0/15 (benchmarking range) split into /26 networks
+            ip_range = f"198.{18 + external // 1024}.{external // 4 % 256}.{external % 4 * 64}/26"
+            site = rng.randrange(position // SITE_SIZE + 1)
+            external += 1
+        else:
+            site, offset = divmod(position, SITE_SIZE)
+            if offset == 0:
+                segments.append({
+                    "name": f"Site {site:03d} Aggregate",
+                    "ip_range": f"10.{site}.0.0/16",
+                    "zone_type": "Internal",
+                    "color": ZONE_COLORS["Internal"],
+                    "description": f"Site {site} summary route",
+                    "_site": site,
+                })
+                if len(segments) >= segment_count:
+                    break
+            ip_range = f"10.{site}.{offset}.0/24"
+            position += 1
+
+        segments.append({
+            "name": f"{zone} {tier} {len(segments):06d}",
+            "ip_range": ip_range,
+            "zone_type": zone,
+            "color": ZONE_COLORS[zone],
+            "description": f"Synthetic {tier.lower()} segment",
+            "_site": site,
+        })
+    return segments
@@ -0,0 +1,310 @@
+"""
+Benchmark harness
+
+Generates a synthetic topology per scale, loads it into a fresh SQLite database
+and times the main service functions and API endpoints against it. Each scale
+runs in its own process (the engine is bound to DATABASE_URL at import time), and
+the results of all scales are written to one JSON file.
+
+Usage (from backend/):
+    python -m benchmarks.run --scales 500 5000 50000
+    python -m benchmarks.run --scales 500 --repeat 10 --output before.json
+    python -m benchmarks.run --scales 500 --baseline before.json
+
+With --baseline, median times are compared per (scale, benchmark) and the run
+exits with status 1 if any benchmark got slower than --threshold times
+(and by more than MIN_REGRESSION_DELTA).
+"""
+
+from typing import Dict, Any, List, Optional, Callable
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_SCALES = [500, 5000, 50000]
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 1.2
+
+# Slowdowns smaller than this (seconds) are timer noise, not regressions
+MIN_REGRESSION_DELTA = 0.005
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="segment counts")
+    parser.add_argument("--rules-per-segment", type=int, default=None, help="default: generator RULES_PER_SEGMENT")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per benchmark")
+    parser.add_argument("--seed", type=int, default=None, help="default: generator DEFAULT_SEED")
+    parser.add_argument("--skip", nargs="*", default=[], help="benchmark names to skip")
+    parser.add_argument("--output", default=None, help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="previous result file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="slowdown ratio reported as a regression")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = run_scale(args.scales[0], args.rules_per_segment, args.repeat, args.seed, set(args.skip))
+        with open(args.worker_output, "w", encoding="utf-8") as stream:
+            json.dump(result, stream)
+        return 0
+
+    results = {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "scales": {},
+    }
+    for scale in args.scales:
+        print(f"Running scale {scale}...", flush=True)
+        results["scales"][str(scale)] = _run_worker(scale, args)
+        _print_scale(results["scales"][str(scale)])
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, "w", encoding="utf-8") as stream:
+        json.dump(results, stream, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as stream:
+            baseline = json.load(stream)
+        if compare_results(baseline, results, args.threshold):
+            return 1
+    return 0
+
+
+def _run_worker(scale: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one scale in a child process against a fresh database file"""
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        worker_output = os.path.join(workdir, "result.json")
+        command = [
+            sys.executable, "-m", "benchmarks.run", "--worker",
+            "--scales", str(scale), "--repeat", str(args.repeat),
+            "--worker-output", worker_output,
+        ]
+        if args.rules_per_segment is not None:
+            command += ["--rules-per-segment", str(args.rules_per_segment)]
+        if args.seed is not None:
+            command += ["--seed", str(args.seed)]
+        if args.skip:
+            command += ["--skip", *args.skip]
+
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            INIT_DB_ON_STARTUP="false",
+        )
+        subprocess.run(command, cwd=BACKEND_DIR, env=env, check=True)
+        with open(worker_output, encoding="utf-8") as stream:
+            return json.load(stream)
+
+
+def run_scale(
+    segment_count: int,
+    rules_per_segment: Optional[int],
+    repeat: int,
+    seed: Optional[int],
+    skip: set
+) -> Dict[str, Any]:
+    """Generate, load and benchmark one scale (must run in a fresh process)"""
+    from fastapi.testclient import TestClient
+
+    from app.database import Base, SessionLocal, engine
+    from benchmarks import generator
+
+    seed = generator.DEFAULT_SEED if seed is None else seed
+    rule_count = None if rules_per_segment is None else segment_count * rules_per_segment
+    timings: Dict[str, Dict[str, Any]] = {}
+
+    started = time.perf_counter()
+    topology = generator.generate_topology(segment_count, rule_count, seed)
+    timings["generate"] = _stats([time.perf_counter() - started])
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    started = time.perf_counter()
+    generator.load_topology(db, topology)
+    timings["load"] = _stats([time.perf_counter() - started])
+
+    # Cold start: application import (no I/O) and database initialization
+    # (search index and topology connection cache build), run explicitly like a deployment
+    started = time.perf_counter()
+    from app.main import app
+    timings["import"] = _stats([time.perf_counter() - started])
+
+    from app.bootstrap import init_database
+    started = time.perf_counter()
+    init_database(seed=False)
+    timings["startup"] = _stats([time.perf_counter() - started])
+
+    from app.services.path_analyzer import analyze_rule_impact, find_path
+    from app.services.topology_service import build_topology_graph
+
+    segments = topology["segments"]
+    rules = topology["rules"]
+    rng = random.Random(seed)
+    pairs = [(rng.randint(1, len(segments)), rng.randint(1, len(segments))) for _ in range(repeat + 1)]
+    rule_ids = [rng.randint(1, len(rules)) for _ in range(repeat)]
+    search_name = segments[len(segments) // 2]["name"].split()[1]
+    search_ip = segments[len(segments) // 2]["ip_range"].split("/")[0]
+
+    def bench(name: str, fn: Callable[[int], Any], runs: int = repeat) -> Any:
+        """Time fn(run) runs times; returns the last result"""
+        if name in skip:
+            return None
+        durations = []
+        for run in range(runs):
+            started = time.perf_counter()
+            value = fn(run)
+            durations.append(time.perf_counter() - started)
+        timings[name] = _stats(durations)
+        print(f"  {name}: {timings[name]['median'] * 1000:.1f} ms", flush=True)
+        return value
+
+    with TestClient(app) as client:
+        def get(path: str) -> Callable[[int], Any]:
+            def call(_):
+                response = client.get(path)
+                response.raise_for_status()
+                return response.content
+            return call
+
+        bench("build_topology_graph", lambda _: build_topology_graph(db))
+        bench("find_path_cold", lambda _: find_path(db, *pairs[0]), runs=1)
+        bench("find_path", lambda run: find_path(db, *pairs[run + 1], protocol="TCP", port=443))
+        bench("analyze_rule_impact", lambda run: analyze_rule_impact(db, rule_ids[run]))
+
+        bench("api_graph", get("/api/topology/graph"))
+        bench("api_segments_list", get("/api/network-segments/?limit=100&include_total=true"))
+        bench("api_segments_count", get("/api/network-segments/count"))
+        bench("api_rules_list", get("/api/firewall-rules/?limit=100&include_total=true"))
+        bench("api_rules_list_deep", get(f"/api/firewall-rules/?limit=100&skip={max(len(rules) - 100, 0)}"))
+        bench("api_rules_count", get("/api/firewall-rules/count?action=ALLOW"))
+        bench("api_search_text", get(f"/api/topology/search?q={search_name}"))
+        bench("api_search_ip", get(f"/api/topology/search?q={search_ip}"))
+        bench("api_segments_export", get("/api/network-segments/export/csv"))
+        bench("api_rules_export", get("/api/firewall-rules/export/csv"))
+
+        # Imports change the data, so they run once and last
+        imports = _bench_imports(client, bench, topology, seed)
+
+    db.close()
+    engine.dispose()
+    return {
+        "segments": len(segments),
+        "rules": len(rules),
+        "firewalls": len(topology["firewalls"]),
+        "seed": seed,
+        "timings": timings,
+        "imports": imports,
+    }
+
+
+def _bench_imports(client, bench: Callable, topology: Dict[str, List[Dict[str, Any]]], seed: int) -> Dict[str, Any]:
+    """Time CSV imports of new segments and rules (10% of the scale); returns created/failed counts"""
+    from benchmarks import generator
+
+    segment_count = len(topology["segments"])
+    import_count = max(segment_count // 10, 1)
+    new_segments = [
+        dict(segment, name=f"Imported {segment['name']}")
+        for segment in generator.generate_topology(import_count, 0, seed + 2)["segments"]
+    ]
+    new_rules = generator.generate_rules(
+        topology["segments"],
+        len(topology["rules"]) // 10 or 1,
+        len(topology["firewalls"]),
+        seed=seed + 3,
+        name_prefix="Imported ",
+    )
+
+    with tempfile.TemporaryDirectory(prefix="bench-csv-") as workdir:
+        segment_csv = os.path.join(workdir, "segments.csv")
+        rule_csv = os.path.join(workdir, "rules.csv")
+        generator.write_csv(segment_csv, new_segments, ["name", "ip_range", "zone_type", "color", "description"])
+        generator.write_csv(rule_csv, new_rules, [
+            "firewall_id", "rule_name", "source_segment_id", "destination_segment_id",
+            "protocol", "port_range", "action", "description",
+        ])
+
+        def upload(path: str, csv_path: str) -> Callable[[int], Any]:
+            def call(_):
+                with open(csv_path, "rb") as stream:
+                    response = client.post(path, files={"file": ("import.csv", stream, "text/csv")})
+                response.raise_for_status()
+                return response.json()
+            return call
+
+        reports = {
+            "segments": bench("api_segments_import", upload("/api/network-segments/import/csv", segment_csv), runs=1),
+            "rules": bench("api_rules_import", upload("/api/firewall-rules/import/csv", rule_csv), runs=1),
+        }
+    return {
+        name: {"created": report["created"], "failed": report["failed"]}
+        for name, report in reports.items() if report is not None
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print median ratios against a baseline; returns the regressed '<scale>/<name>' keys"""
+    regressions = []
+    print(f"\nComparison with baseline ({baseline.get('commit') or 'unknown commit'}):")
+    for scale, result in current["scales"].items():
+        previous = baseline.get("scales", {}).get(scale)
+        if previous is None:
+            continue
+        for name, timing in result["timings"].items():
+            before = previous["timings"].get(name)
+            if not before or not before["median"]:
+                continue
+            ratio = timing["median"] / before["median"]
+            flag = ""
+            if ratio > threshold and timing["median"] - before["median"] > MIN_REGRESSION_DELTA:
+                flag = "  REGRESSION"
+                regressions.append(f"{scale}/{name}")
+            print(f"  {scale:>7} {name:<24} {before['median'] * 1000:10.1f} ms -> {timing['median'] * 1000:10.1f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def _stats(durations: List[float]) -> Dict[str, Any]:
+    return {
+        "runs": len(durations),
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "mean": statistics.fmean(durations),
+        "max": max(durations),
+    }
+
+
+def _print_scale(result: Dict[str, Any]) -> None:
+    print(f"  {result['segments']} segments, {result['rules']} rules, {result['firewalls']} firewalls")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
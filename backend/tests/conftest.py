@@ -0,0 +1,135 @@
+"""
+Shared fixtures: a throwaway SQLite database and small topologies loaded through CSV import
+
+The database URL is set before any app module is imported, so app.config and
+app.database pick it up. Data is written through the same import path as the
+API (which records topology changes), so version-keyed caches stay consistent
+between tests.
+"""
+
+import csv
+import io
+import os
+import shutil
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="firewall-topology-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ["INIT_DB_ON_STARTUP"] = "false"
+os.environ["SEED_SAMPLE_DATA"] = "false"
+
+import pytest
+
+from app.bootstrap import init_database
+from app.database import SessionLocal, engine
+from app.models import (
+    Firewall,
+    FirewallRule,
+    NetworkSegment,
+    SegmentPosition,
+    TopologyConnection
+)
+from app.services.csv_import import import_rules, import_segments
+from app.services.topology_version import record_rule_changes, record_segment_changes
+
+SEGMENT_COLUMNS = ["name", "ip_range", "zone_type", "color", "description"]
+RULE_COLUMNS = [
+    "firewall_id", "rule_name", "source_segment_id", "destination_segment_id",
+    "protocol", "port_range", "action", "description"
+]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    init_database(seed=False)
+    yield
+    engine.dispose()
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    """Session on an empty topology (rows left by earlier tests are deleted as recorded changes)"""
+    session = SessionLocal()
+    _clear(session)
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def firewall_id(db) -> int:
+    firewall = Firewall(name="fw-test")
+    db.add(firewall)
+    db.commit()
+    return firewall.id
+
+
+@pytest.fixture
+def load_segments(db):
+    """load_segments([(name, ip_range, zone_type), ...]) -> [segment id, ...] in input order"""
+    def load(segments):
+        rows = [
+            {"name": name, "ip_range": ip_range, "zone_type": zone_type, "color": "#CCCCCC", "description": ""}
+            for name, ip_range, zone_type in segments
+        ]
+        report = import_segments(db, _csv_stream(SEGMENT_COLUMNS, rows))
+        assert report["failed"] == 0, report["errors"]
+        ids = dict(db.query(NetworkSegment.name, NetworkSegment.id).all())
+        return [ids[name] for name, _, _ in segments]
+    return load
+
+
+@pytest.fixture
+def load_rules(db, firewall_id):
+    """
+    load_rules([(source_id, dest_id, protocol, port_range, action), ...]) -> [rule id, ...]
+
+    Rule ids increase in input order, so the input order is the first-match order.
+    """
+    def load(rules):
+        last_id = db.query(FirewallRule.id).order_by(FirewallRule.id.desc()).limit(1).scalar() or 0
+        rows = [
+            {
+                "firewall_id": firewall_id,
+                "rule_name": f"rule-{last_id + position + 1}",
+                "source_segment_id": source_id,
+                "destination_segment_id": dest_id,
+                "protocol": protocol,
+                "port_range": port_range or "",
+                "action": action,
+                "description": ""
+            }
+            for position, (source_id, dest_id, protocol, port_range, action) in enumerate(rules)
+        ]
+        report = import_rules(db, _csv_stream(RULE_COLUMNS, rows))
+        assert report["failed"] == 0, report["errors"]
+        created = db.query(FirewallRule.id).filter(FirewallRule.id > last_id).order_by(FirewallRule.id).all()
+        return [rule_id for (rule_id,) in created]
+    return load
+
+
+def _csv_stream(columns, rows) -> io.StringIO:
+    stream = io.StringIO()
+    writer = csv.DictWriter(stream, fieldnames=columns)
+    writer.writeheader()
+    writer.writerows(rows)
+    stream.seek(0)
+    return stream
+
+
+def _clear(db) -> None:
+    rules = db.query(
+        FirewallRule.id,
+        FirewallRule.source_segment_id,
+        FirewallRule.destination_segment_id
+    ).all()
+    segment_ids = [segment_id for (segment_id,) in db.query(NetworkSegment.id).all()]
+
+    for model in (TopologyConnection, SegmentPosition, FirewallRule, NetworkSegment, Firewall):
+        db.query(model).delete(synchronize_session=False)
+    record_rule_changes(db, "delete", [tuple(rule) for rule in rules])
+    record_segment_changes(db, "delete", segment_ids)
+    db.commit()
@@ -0,0 +1,50 @@
+"""
+Database initialization over a database created by an earlier version
+"""
+
+from sqlalchemy import inspect, text
+
+from app.bootstrap import init_database
+from app.database import engine
+from app.models import TopologyConnection
+from app.services.topology_service import build_topology_graph
+
+# topology_connection as created before descriptions/rule_details were added
+OLD_CONNECTION_TABLE = """
+CREATE TABLE topology_connection (
+    id INTEGER NOT NULL PRIMARY KEY,
+    source_segment_id INTEGER NOT NULL,
+    destination_segment_id INTEGER NOT NULL,
+    rule_ids TEXT NOT NULL,
+    protocols TEXT NOT NULL,
+    ports TEXT NOT NULL,
+    actions TEXT NOT NULL,
+    updated_at DATETIME
+)
+"""
+
+
+def test_outdated_connection_cache_is_recreated(db, load_segments, load_rules):
+    web, app_, lan = load_segments([
+        ("web", "10.0.1.0/24", "DMZ"),
+        ("app", "10.0.2.0/24", "DMZ"),
+        ("lan", "10.1.0.0/16", "Internal"),
+    ])
+    load_rules([
+        (web, app_, "TCP", "443", "ALLOW"),
+        (web, app_, "UDP", "53", "ALLOW"),
+        (lan, web, "TCP", "22", "DENY"),
+    ])
+    expected = build_topology_graph(db)["edges"]
+    db.close()
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE topology_connection"))
+        conn.execute(text(OLD_CONNECTION_TABLE))
+
+    # Startup path: the cache is kept unless its schema is outdated
+    init_database(seed=False, reset_cache=False)
+
+    columns = {column["name"] for column in inspect(engine).get_columns(TopologyConnection.__tablename__)}
+    assert columns == {column.name for column in TopologyConnection.__table__.columns}
+    assert build_topology_graph(db)["edges"] == expected
@@ -0,0 +1,32 @@
+"""
+Zone-level clustered graph counts against the distinct segment pairs of the rules
+"""
+
+from app.services.topology_service import build_clustered_graph
+
+
+def test_connection_counts_are_distinct_pairs(db, load_segments, load_rules):
+    web, app_, db_, lan = load_segments([
+        ("web", "10.0.1.0/24", "DMZ"),
+        ("app", "10.0.2.0/24", "DMZ"),
+        ("db", "10.0.3.0/24", "DMZ"),
+        ("lan", "10.1.0.0/16", "Internal"),
+    ])
+    load_rules([
+        # one intra-DMZ pair with rules of several protocols and actions
+        (web, app_, "TCP", "443", "ALLOW"),
+        (web, app_, "UDP", "53", "ALLOW"),
+        (web, app_, "TCP", "22", "DENY"),
+        (app_, db_, "TCP", "5432", "ALLOW"),
+        (lan, web, "TCP", "443", "ALLOW"),
+        (lan, web, "UDP", "53", "ALLOW"),
+    ])
+
+    graph = build_clustered_graph(db, "zone")
+    dmz = next(node for node in graph["nodes"] if node["id"] == "zone-DMZ")
+    assert dmz["metadata"]["internal_rule_count"] == 4
+    assert dmz["metadata"]["internal_connection_count"] == 2
+
+    edge, = graph["edges"]
+    assert edge["metadata"]["rule_count"] == 2
+    assert edge["metadata"]["connection_count"] == 1
@@ -0,0 +1,125 @@
+"""
+Flow verdicts against a first-match scan over the rules in id order
+"""
+
+import ipaddress
+import random
+
+import pytest
+
+from app.services.flow_evaluator import evaluate_flows
+
+SEGMENTS = [
+    ("campus", "10.0.0.0/16", "Internal"),
+    ("campus-web", "10.0.1.0/24", "DMZ"),
+    ("campus-web-upper", "10.0.1.128/25", "DMZ"),
+    ("branch", "10.1.0.0/16", "Internal"),
+    ("lab", "192.168.1.0/24", "Management"),
+]
+
+PORT_RANGES = ["", "", "22", "443", "53,443", "8000-9000", "1-1024"]
+FLOW_PROTOCOLS = ["TCP", "UDP", "ICMP", "GRE", "tcp", None]
+FLOW_PORTS = [None, 0, 22, 53, 443, 8080, 8443, 9000]
+
+
+def in_ranges(port, port_range):
+    for part in port_range.split(","):
+        low, _, high = part.partition("-")
+        if int(low) <= port <= int(high or low):
+            return True
+    return False
+
+
+def reference_verdict(segments, rules, rule_ids, flow):
+    """(action, rule id) of the first matching rule, ("DENY", None) if none"""
+    source_ip, dest_ip, protocol, port = flow
+    source_id = _lookup(segments, source_ip)
+    dest_id = _lookup(segments, dest_ip)
+    for rule_id, (rule_source, rule_dest, rule_protocol, port_range, action) in zip(rule_ids, rules):
+        if (rule_source, rule_dest) != (source_id, dest_id) or source_id is None:
+            continue
+        if rule_protocol != "ANY" and rule_protocol != (protocol or "").upper():
+            continue
+        if port is not None and port_range and not in_ranges(port, port_range):
+            continue
+        return action, rule_id
+    return "DENY", None
+
+
+def _lookup(segments, ip):
+    address = ipaddress.ip_address(ip)
+    matches = [
+        (-ipaddress.ip_network(ip_range).prefixlen, seg_id)
+        for seg_id, ip_range in segments
+        if address in ipaddress.ip_network(ip_range)
+    ]
+    return min(matches)[1] if matches else None
+
+
+def random_ip(rng):
+    network = ipaddress.ip_network(rng.choice([ip_range for _, ip_range, _ in SEGMENTS] + ["0.0.0.0/0"]))
+    return str(network.network_address + rng.randrange(network.num_addresses))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_verdicts_match_first_match_scan(db, load_segments, load_rules, firewall_id, seed):
+    rng = random.Random(seed)
+    segment_ids = load_segments(SEGMENTS)
+    segments = [(seg_id, ip_range) for seg_id, (_, ip_range, _) in zip(segment_ids, SEGMENTS)]
+
+    # CSV import rejects identical rules
+    rules = list(dict.fromkeys(
+        (
+            rng.choice(segment_ids),
+            rng.choice(segment_ids),
+            rng.choice(["TCP", "UDP", "ICMP", "ANY"]),
+            rng.choice(PORT_RANGES),
+            rng.choice(["ALLOW", "DENY"])
+        )
+        for _ in range(60)
+    ))
+    rule_ids = load_rules(rules)
+
+    flows = [
+        (random_ip(rng), random_ip(rng), rng.choice(FLOW_PROTOCOLS), rng.choice(FLOW_PORTS))
+        for _ in range(500)
+    ]
+    expected = [reference_verdict(segments, rules, rule_ids, flow) for flow in flows]
+
+    for firewall in (None, firewall_id):
+        result = evaluate_flows(db, flows, firewall)
+        assert list(zip(result["verdicts"], result["rule_ids"])) == expected
+        assert result["source_segment_ids"] == [_lookup(segments, flow[0]) for flow in flows]
+        assert {rule["id"] for rule in result["rules"]} == {rule_id for _, rule_id in expected if rule_id}
+
+
+def test_verdicts_follow_rule_changes(db, load_segments, load_rules):
+    campus, _, _, branch, _ = load_segments(SEGMENTS)
+    flow = ("10.0.2.1", "10.1.0.1", "TCP", 443)
+    assert evaluate_flows(db, [flow])["verdicts"] == ["DENY"]
+
+    allow_id, = load_rules([(campus, branch, "TCP", "443", "ALLOW")])
+    assert evaluate_flows(db, [flow])["rule_ids"] == [allow_id]
+
+    # A later rule never overrides an earlier match
+    load_rules([(campus, branch, "ANY", "", "DENY")])
+    result = evaluate_flows(db, [flow, flow[:3] + (22,)])
+    assert result["verdicts"] == ["ALLOW", "DENY"]
+
+
+def test_invalid_ips_are_reported(db, load_segments, load_rules):
+    campus, _, _, branch, _ = load_segments(SEGMENTS)
+    load_rules([(campus, branch, "ANY", "", "ALLOW")])
+    flows = [
+        ("10.0.2.1", "10.1.0.1", "TCP", 443),
+        ("10.0.2.1\x00", "10.1.0.1", "TCP", 443),
+        ("10.0.2.1", "", "UDP", None),
+        ("10.0.2", "10.1.0.1", None, None),
+        ("10.0.2.1", "2001:db8::1%eth0", "TCP", 22),
+    ]
+
+    result = evaluate_flows(db, flows)
+    assert result["invalid_indices"] == [1, 2, 3]
+    assert result["verdicts"] == ["ALLOW", "DENY", "DENY", "DENY", "DENY"]
+    assert result["source_segment_ids"] == [campus, None, campus, None, campus]
+    assert result["destination_segment_ids"] == [branch, branch, None, branch, None]
@@ -0,0 +1,80 @@
+"""
+Keyset (cursor) pagination of the list endpoints against the filtered, id-ordered rows
+"""
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import FirewallRule, NetworkSegment
+
+ZONES = ["DMZ", "Internal", "External"]
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def topology(db, load_segments, load_rules, client):
+    rng = random.Random(7)
+    segment_ids = load_segments([(f"seg-{idx}", f"10.{idx}.0.0/16", rng.choice(ZONES)) for idx in range(30)])
+    rules = list(dict.fromkeys(
+        (rng.choice(segment_ids), rng.choice(segment_ids), rng.choice(["TCP", "UDP", "ANY"]), "", rng.choice(["ALLOW", "DENY"]))
+        for _ in range(80)
+    ))
+    rule_ids = load_rules(rules)
+    # Gaps in the id sequence
+    for rule_id in rng.sample(rule_ids, 10):
+        assert client.delete(f"/api/firewall-rules/{rule_id}").status_code == 200
+
+
+def collect_pages(client, path, params, limit):
+    """Follow X-Next-Cursor from the first page; returns the ids of every page"""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(path, params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 7, 10, 500])
+@pytest.mark.parametrize("params", [{}, {"protocol": "tcp"}, {"action": "ALLOW", "protocol": "ANY"}])
+def test_rule_pages_match_ordered_rows(db, client, topology, limit, params):
+    rows = db.query(FirewallRule.id, FirewallRule.protocol, FirewallRule.action).order_by(FirewallRule.id).all()
+    expected = [
+        rule_id for rule_id, protocol, action in rows
+        if protocol == params.get("protocol", protocol).upper() and action == params.get("action", action)
+    ]
+
+    pages = collect_pages(client, "/api/firewall-rules/", params, limit)
+    assert [rule_id for page in pages for rule_id in page] == expected
+    assert all(len(page) == limit for page in pages[:-1])
+
+    # skip and include_total page the same rows
+    body = client.get("/api/firewall-rules/", params={**params, "limit": limit, "skip": limit, "include_total": True}).json()
+    assert [item["id"] for item in body["items"]] == expected[limit:2 * limit]
+    assert body["total"] == len(expected)
+
+
+@pytest.mark.parametrize("limit", [1, 4, 100])
+@pytest.mark.parametrize("params", [{}, {"zone_type": "DMZ"}])
+def test_segment_pages_match_ordered_rows(db, client, topology, limit, params):
+    rows = db.query(NetworkSegment.id, NetworkSegment.zone_type).order_by(NetworkSegment.id).all()
+    expected = [seg_id for seg_id, zone in rows if zone == params.get("zone_type", zone)]
+
+    pages = collect_pages(client, "/api/network-segments/", params, limit)
+    assert [seg_id for page in pages for seg_id in page] == expected
+
+
+def test_invalid_cursor_is_rejected(client):
+    for path in ("/api/firewall-rules/", "/api/network-segments/"):
+        assert client.get(path, params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,188 @@
+"""
+Path analysis, the reachability closure and rule-impact dependent paths against a brute-force BFS
+"""
+
+import base64
+import random
+from collections import defaultdict
+
+import pytest
+
+from app.services import reachability
+from app.services.path_analyzer import analyze_rule_impact, find_path, find_paths
+from app.services.reachability import get_reachability_matrix
+
+PROTOCOLS = ["TCP", "UDP", "ANY"]
+FILTERS = [(None, None), ("TCP", None), ("UDP", 53), ("TCP", 443), (None, 8080)]
+
+
+def random_rules(rng, segment_ids, count, existing=()):
+    """count distinct rules, none identical to an existing one (CSV import rejects those)"""
+    rules = []
+    while len(rules) < count:
+        port_range = rng.choice(["", "443", "53", "8000-9000", "22,443", "1-1024"])
+        action = "DENY" if rng.random() < 0.2 else "ALLOW"
+        rule = (rng.choice(segment_ids), rng.choice(segment_ids), rng.choice(PROTOCOLS), port_range, action)
+        if rule not in rules and rule not in existing:
+            rules.append(rule)
+    return rules
+
+
+def port_matches(port, port_range):
+    for part in port_range.split(","):
+        low, _, high = part.partition("-")
+        if int(low) <= port <= int(high or low):
+            return True
+    return False
+
+
+def shortest_hops(successors, start, target):
+    """Number of rules on a shortest path from start to target (0 when start == target)"""
+    seen = {start}
+    frontier = {start}
+    hops = 0
+    while target not in frontier:
+        frontier = {node for current in frontier for node in successors[current]} - seen
+        seen |= frontier
+        hops += 1
+    return hops
+
+
+def reference_reach(segment_ids, rules, protocol=None, port=None, skip=None):
+    """source id -> set of reachable destination ids (same rules as find_path), ignoring rule index ``skip``"""
+    successors = defaultdict(set)
+    sources = set()
+    for position, (source_id, dest_id, rule_protocol, port_range, action) in enumerate(rules):
+        if position == skip or action != "ALLOW":
+            continue
+        if protocol and rule_protocol not in (protocol, "ANY"):
+            continue
+        sources.add(source_id)
+        if port and port_range and not port_matches(port, port_range):
+            continue
+        successors[source_id].add(dest_id)
+
+    reach = {}
+    for start in segment_ids:
+        seen = set()
+        stack = list(successors[start])
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                stack.extend(successors[node])
+        reach[start] = seen | ({start} if start in sources else set())
+    return reach, successors
+
+
+def matrix_as_sets(matrix):
+    segment_ids = [segment["segment_id"] for segment in matrix["segments"]]
+    result = {}
+    for row in matrix["rows"]:
+        bits = int.from_bytes(base64.b64decode(row["reachable"]), "little")
+        result[row["source_segment_id"]] = {seg_id for idx, seg_id in enumerate(segment_ids) if bits >> idx & 1}
+    return result
+
+
+def build_topology(rng, load_segments, load_rules, segment_count=12, rule_count=30):
+    segment_ids = load_segments([
+        (f"seg-{idx}", f"10.0.{idx}.0/24", "Internal") for idx in range(segment_count)
+    ])
+    rules = random_rules(rng, segment_ids, rule_count)
+    rule_ids = load_rules(rules)
+    return segment_ids, rules, rule_ids
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matrix_matches_bfs(db, load_segments, load_rules, seed):
+    rng = random.Random(seed)
+    segment_ids, rules, _ = build_topology(rng, load_segments, load_rules)
+
+    for protocol, port in FILTERS:
+        expected, _ = reference_reach(segment_ids, rules, protocol, port)
+        assert matrix_as_sets(get_reachability_matrix(db, protocol, port)) == expected
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_closure_carry_over_after_rule_creation(db, load_segments, load_rules, monkeypatch, seed):
+    rng = random.Random(seed)
+    segment_ids, rules, _ = build_topology(rng, load_segments, load_rules, rule_count=15)
+    for protocol, port in FILTERS:
+        get_reachability_matrix(db, protocol, port)
+
+    # Later versions must come from the previous closures plus the new rules
+    computed = []
+    compute_closure = reachability.compute_closure
+    monkeypatch.setattr(reachability, "compute_closure", lambda *args: computed.append(args) or compute_closure(*args))
+
+    for _ in range(3):
+        added = random_rules(rng, segment_ids, 5, rules)
+        load_rules(added)
+        rules += added
+        for protocol, port in FILTERS:
+            expected, _ = reference_reach(segment_ids, rules, protocol, port)
+            assert matrix_as_sets(get_reachability_matrix(db, protocol, port)) == expected
+
+    assert computed == []
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_dependent_paths_match_bfs(db, load_segments, load_rules, seed):
+    rng = random.Random(seed)
+    segment_ids, rules, rule_ids = build_topology(rng, load_segments, load_rules, segment_count=10, rule_count=18)
+    names = {seg_id: f"seg-{idx}" for idx, seg_id in enumerate(segment_ids)}
+
+    for position, (source_id, dest_id, protocol, _, action) in enumerate(rules):
+        result = analyze_rule_impact(db, rule_ids[position])
+        found = {(path["source"], path["destination"]): path["via"] for path in result["dependent_paths"]}
+
+        expected = set()
+        if action == "ALLOW":
+            protocol_filter = None if protocol == "ANY" else protocol
+            before, _ = reference_reach(segment_ids, rules, protocol_filter)
+            after, successors = reference_reach(segment_ids, rules, protocol_filter, skip=position)
+            expected = {
+                (names[start], names[target])
+                for start in segment_ids
+                for target in before[start] - after[start]
+                if target != start and (start, target) != (source_id, dest_id)
+            }
+        assert set(found) == expected
+
+        # via continues through the remaining graph and the removed rule's edge
+        ids = {name: seg_id for seg_id, name in names.items()}
+        for (start, target), via in found.items():
+            chain = [ids[name] for name in [start, *via, target]]
+            hops = list(zip(chain, chain[1:]))
+            assert (source_id, dest_id) in hops
+            assert all(hop == (source_id, dest_id) or hop[1] in successors[hop[0]] for hop in hops)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_batch_paths_match_bfs(db, load_segments, load_rules, seed):
+    rng = random.Random(seed)
+    segment_ids, rules, rule_ids = build_topology(rng, load_segments, load_rules)
+    rules_by_id = dict(zip(rule_ids, rules))
+
+    queries = [
+        (rng.choice(segment_ids), rng.choice(segment_ids), *rng.choice(FILTERS))
+        for _ in range(200)
+    ]
+    results = find_paths(db, queries)
+    assert results == [find_path(db, *query) for query in queries]
+
+    for (source_id, dest_id, protocol, port), result in zip(queries, results):
+        reach, successors = reference_reach(segment_ids, rules, protocol, port)
+        assert result["reachable"] == (dest_id in reach[source_id])
+        if not result["reachable"]:
+            continue
+
+        # A shortest path whose every hop is an ALLOW rule passing the filters
+        path = [segment["segment_id"] for segment in result["path"]]
+        assert path[0] == source_id and path[-1] == dest_id
+        assert len(result["rules_applied"]) == len(path) - 1 == shortest_hops(successors, source_id, dest_id)
+        for (hop_source, hop_dest), applied in zip(zip(path, path[1:]), result["rules_applied"]):
+            rule_source, rule_dest, rule_protocol, port_range, action = rules_by_id[applied["rule_id"]]
+            assert (rule_source, rule_dest, action) == (hop_source, hop_dest, "ALLOW")
+            assert not protocol or rule_protocol in (protocol, "ANY")
+            assert not port or not port_range or port_matches(port, port_range)
@@ -0,0 +1,95 @@
+"""
+Rule anomaly sweep against a point-by-point first-match reference
+
+Generated port ranges stay within 1-30, so ports 0-31 plus one port outside
+that range stand for every port a rule can match.
+"""
+
+import random
+
+import pytest
+
+from app.services.rule_anomalies import ANOMALY_TYPES, find_rule_anomalies
+
+PROTOCOLS = ["TCP", "UDP", "ICMP", "OTHER"]
+PORTS = list(range(32)) + [1000]
+
+
+def random_port_range(rng):
+    low, high = sorted(rng.sample(range(1, 31), 2))
+    return rng.choice(["", "", str(low), f"{low}-{high}", f"{low},{high}", f"{low}-{high},{high}"])
+
+
+def rule_points(protocol, port_range):
+    if port_range:
+        ports = set()
+        for part in port_range.split(","):
+            low, _, high = part.partition("-")
+            ports.update(range(int(low), int(high or low) + 1))
+    else:
+        ports = set(PORTS)
+    protocols = PROTOCOLS if protocol == "ANY" else [protocol]
+    return frozenset((rule_protocol, port) for rule_protocol in protocols for port in ports)
+
+
+def reference_anomalies(rules, rule_ids):
+    """[(rule_id, type, related_rule_ids)] by rule id, comparing rules of the same segment pair only"""
+    groups = {}
+    for rule_id, rule in zip(rule_ids, rules):
+        groups.setdefault(rule[:2], []).append((rule_id, rule))
+
+    found = []
+    for members in groups.values():
+        first_match = {}  # point -> position of the first rule matching it
+        definitions = {}
+        for position, (rule_id, (_, _, protocol, port_range, action)) in enumerate(members):
+            points = rule_points(protocol, port_range)
+            definition = (protocol, points, action)
+            owners = {first_match[point] for point in points if point in first_match}
+            opposite = sorted(owner for owner in owners if members[owner][1][4] != action)
+
+            if definition in definitions:
+                found.append((rule_id, "duplicate", [members[definitions[definition]][0]]))
+            elif points <= first_match.keys():
+                kind = "shadowed" if opposite else "redundant"
+                found.append((rule_id, kind, [members[owner][0] for owner in sorted(owners)]))
+            elif opposite:
+                found.append((rule_id, "conflict", [members[owner][0] for owner in opposite]))
+
+            definitions.setdefault(definition, position)
+            for point in points:
+                first_match.setdefault(point, position)
+    return sorted(found)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_anomalies_match_reference(db, load_segments, load_rules, firewall_id, seed):
+    rng = random.Random(seed)
+    segment_ids = load_segments([(f"seg-{idx}", f"10.0.{idx}.0/24", "Internal") for idx in range(3)])
+
+    # CSV import rejects identical rules
+    rules = list(dict.fromkeys(
+        (
+            rng.choice(segment_ids),
+            rng.choice(segment_ids),
+            rng.choice(["TCP", "UDP", "ICMP", "ANY"]),
+            random_port_range(rng),
+            rng.choice(["ALLOW", "DENY"])
+        )
+        for _ in range(60)
+    ))
+    # Same definition spelled differently (a duplicate, not rejected by the import)
+    for source_id, dest_id, protocol, port_range, action in rng.sample([rule for rule in rules if rule[3]], 5):
+        rules.append((source_id, dest_id, protocol, f"{port_range},{port_range.split('-')[0].split(',')[0]}", action))
+    rules = list(dict.fromkeys(rules))
+    rule_ids = load_rules(rules)
+    expected = reference_anomalies(rules, rule_ids)
+
+    result = find_rule_anomalies(db, firewall_id=firewall_id)
+    assert result["rules_analyzed"] == len(rules)
+    assert [(anomaly["rule_id"], anomaly["type"], anomaly["related_rule_ids"]) for anomaly in result["anomalies"]] == expected
+    assert result["summary"] == {kind: sum(1 for _, found, _ in expected if found == kind) for kind in ANOMALY_TYPES}
+
+    for kind in ANOMALY_TYPES:
+        filtered = find_rule_anomalies(db, anomaly_type=kind, limit=3)["anomalies"]
+        assert [anomaly["rule_id"] for anomaly in filtered] == [rule_id for rule_id, found, _ in expected if found == kind][:3]
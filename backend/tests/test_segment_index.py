@@ -0,0 +1,99 @@
+"""
+SegmentIndex classification and overlap search against a linear scan over the segments
+"""
+
+import ipaddress
+import random
+
+import pytest
+
+from app.services.segment_index import classify_ips, get_segment_index
+
+SEGMENTS = [
+    ("any-10", "10.0.0.0/8", "Internal"),
+    ("dc", "10.1.0.0/16", "Internal"),
+    ("dc-web", "10.1.2.0/24", "DMZ"),
+    ("dc-web-copy", "10.1.2.0/24", "DMZ"),
+    ("dc-db", "10.1.3.0/25", "Internal"),
+    ("host", "10.1.3.7/32", "Internal"),
+    ("lab", "192.168.0.0/16", "Management"),
+    ("lab-edge", "192.168.255.0/24", "External"),
+    ("v6", "2001:db8::/32", "Internal"),
+    ("v6-site", "2001:db8:1::/48", "DMZ"),
+]
+
+
+def reference_lookup(segments, ip):
+    """Most specific segment containing ip (lowest id on ties), None if none"""
+    address = ipaddress.ip_address(ip)
+    matches = [
+        (-ipaddress.ip_network(ip_range).prefixlen, seg_id)
+        for seg_id, ip_range in segments
+        if ipaddress.ip_network(ip_range).version == address.version and address in ipaddress.ip_network(ip_range)
+    ]
+    return min(matches)[1] if matches else None
+
+
+MALFORMED = ["", "1.2.3", "1.2.3.4\x00", "10.1.2.3\x00garbage", "not-an-ip", "10.1.2.256", "2001:db8::1%eth0", "::1\x00"]
+
+
+def random_ips(rng, count):
+    networks = [ipaddress.ip_network(ip_range) for _, ip_range, _ in SEGMENTS]
+    networks += [ipaddress.ip_network("0.0.0.0/0"), ipaddress.ip_network("2001:db8::/30")]
+    ips = []
+    for _ in range(count):
+        network = rng.choice(networks)
+        if rng.random() < 0.05:
+            ips.append(rng.choice(MALFORMED))
+        else:
+            ips.append(str(network.network_address + rng.randrange(network.num_addresses)))
+    # network and broadcast edges of every segment
+    for network in networks[:-2]:
+        ips += [str(network.network_address), str(network.broadcast_address)]
+        if network.version == 4 and int(network.broadcast_address) < 2 ** 32 - 1:
+            ips.append(str(network.broadcast_address + 1))
+    return ips
+
+
+@pytest.fixture
+def segments(load_segments):
+    ids = load_segments(SEGMENTS)
+    return [(seg_id, ip_range) for seg_id, (_, ip_range, _) in zip(ids, SEGMENTS)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_classify_matches_linear_scan(db, segments, seed):
+    ips = random_ips(random.Random(seed), 300)
+    # Mixed IPv4 / IPv6 / invalid input takes the per-address path
+    mixed = ips + ["::ffff:10.1.2.3", "2001:db8:1::5%eth0"]
+
+    for batch in (
+        [ip for ip in ips if ":" not in ip and _is_ip(ip)],
+        mixed,
+    ):
+        result = classify_ips(db, batch)
+        expected = [reference_lookup(segments, ip) if _is_ip(ip) else None for ip in batch]
+        assert result["segment_ids"] == expected
+        assert result["invalid_indices"] == [idx for idx, ip in enumerate(batch) if not _is_ip(ip)]
+        assert {segment["id"] for segment in result["segments"]} == {seg_id for seg_id in expected if seg_id}
+
+
+def test_overlapping_matches_linear_scan(db, segments):
+    index = get_segment_index(db)
+    for query in ["10.1.3.7", "10.1.0.0/16", "10.0.0.0/7", "192.168.255.1", "172.16.0.0/12", "2001:db8:1::5", "2001:db8::/31"]:
+        network = ipaddress.ip_network(query, strict=False)
+        expected = sorted(
+            (abs(ipaddress.ip_network(ip_range).prefixlen - network.prefixlen), seg_id)
+            for seg_id, ip_range in segments
+            if ipaddress.ip_network(ip_range).version == network.version
+            and ipaddress.ip_network(ip_range).overlaps(network)
+        )
+        assert [index.segment_ids[idx] for idx in index.overlapping(network)] == [seg_id for _, seg_id in expected]
+
+
+def _is_ip(value):
+    try:
+        ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    return True
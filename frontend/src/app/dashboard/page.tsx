@@ -1,29 +1,33 @@
 'use client';
 
-import { useState } from 'react';
+import { useCallback, useState } from 'react';
 import { useQuery, useQueryClient } from '@tanstack/react-query';
-import TopologyMap from '@/components/topology/TopologyMap';
+import TopologyMap, { TopologyLayout } from '@/components/topology/TopologyMap';
 import FilterPanel, { TopologyFilters } from '@/components/topology/FilterPanel';
 import PathAnalysis from '@/components/topology/PathAnalysis';
 import DetailPanel from '@/components/topology/DetailPanel';
 import Sidebar from '@/components/layout/Sidebar';
 import { fetchTopologyGraph, fetchFirewallRules, deleteFirewallRule } from '@/lib/api';
+import { GraphLevel } from '@/types/topology';
 import { Trash2 } from 'lucide-react';
 
 export default function DashboardPage() {
   const [selectedNodeId, setSelectedNodeId] = useState<string | null>(null);
-  const [layout, setLayout] = useState<'dagre' | 'cose' | 'circle'>('dagre');
+  const [layout, setLayout] = useState<TopologyLayout>('preset');
   const [filters, setFilters] = useState<TopologyFilters>({
     zoneTypes: [],
     protocols: []
   });
   const [selectedRules, setSelectedRules] = useState<number[]>([]);
+  const [graphLevel, setGraphLevel] = useState<GraphLevel>('segment');
+  // Only one cluster is expanded at a time
+  const [expandedCluster, setExpandedCluster] = useState<string | null>(null);
 
   const queryClient = useQueryClient();
 
   const { data: graph, isLoading } = useQuery({
-    queryKey: ['topology', filters],
-    queryFn: () => fetchTopologyGraph()
+    queryKey: ['topology', filters, graphLevel, expandedCluster],
+    queryFn: () => fetchTopologyGraph({ level: graphLevel, expand: expandedCluster })
   });
 
   const { data: allRules } = useQuery({
@@ -33,6 +37,21 @@ export default function DashboardPage() {
 
   const selectedNode = graph?.nodes.find(n => n.id === selectedNodeId);
 
+  const handleLevelChange = (level: GraphLevel) => {
+    setGraphLevel(level);
+    setExpandedCluster(null);
+    setSelectedNodeId(null);
+  };
+
+  // Clicking a cluster expands it (or collapses it again); segments open the detail panel
+  const handleNodeClick = useCallback((nodeId: string) => {
+    if (nodeId.startsWith('segment-')) {
+      setSelectedNodeId(nodeId);
+    } else {
+      setExpandedCluster(prev => (prev === nodeId ? null : nodeId));
+    }
+  }, []);
+
   // Filter rules for selected node
   const inboundRules = allRules?.filter(
     rule => selectedNode && rule.destination_segment_id === parseInt(selectedNode.id.replace('segment-', ''))
@@ -44,7 +63,7 @@ export default function DashboardPage() {
   // Apply filters to graph data
   const filteredGraph = graph ? {
     nodes: graph.nodes.filter(node =>
-      filters.zoneTypes.length === 0 || filters.zoneTypes.includes(node.zone_type)
+      filters.zoneTypes.length === 0 || filters.zoneTypes.includes(node.zone_type) || node.expanded
     ),
     edges: graph.edges.filter(edge =>
       filters.protocols.length === 0 ||
@@ -120,6 +139,7 @@ export default function DashboardPage() {
             <FilterPanel
               onFilterChange={setFilters}
               onLayoutChange={setLayout}
+              onLevelChange={handleLevelChange}
             />
             <PathAnalysis />
           </aside>
@@ -131,7 +151,7 @@ export default function DashboardPage() {
                 nodes={filteredGraph.nodes}
                 edges={filteredGraph.edges}
                 layout={layout}
-                onNodeClick={setSelectedNodeId}
+                onNodeClick={handleNodeClick}
               />
             )}
           </main>
@@ -14,29 +14,23 @@ export default function RulesPage() {
   const itemsPerPage = 10;
   const queryClient = useQueryClient();
 
-  const { data: countData } = useQuery({
-    queryKey: ['rules-count'],
-    queryFn: async () => {
-      const res = await fetch('/api/firewall-rules/count');
-      return res.json();
-    }
-  });
-
-  const { data: rules, isLoading: rulesLoading, error: rulesError } = useQuery({
+  // Page items and total count come back in a single request
+  const { data: rulesPage, isLoading: rulesLoading, error: rulesError } = useQuery({
     queryKey: ['rules', currentPage],
     queryFn: async () => {
       const skip = (currentPage - 1) * itemsPerPage;
-      const res = await fetch(`/api/firewall-rules?skip=${skip}&limit=${itemsPerPage}`);
+      const res = await fetch(`/api/firewall-rules?skip=${skip}&limit=${itemsPerPage}&include_total=true`);
       return res.json();
     }
   });
+  const rules = rulesPage?.items;
 
   const { data: segments } = useQuery({
     queryKey: ['segments'],
     queryFn: fetchNetworkSegments
   });
 
-  const totalPages = Math.ceil((countData?.total || 0) / itemsPerPage);
+  const totalPages = Math.ceil((rulesPage?.total || 0) / itemsPerPage);
 
   const getSegmentName = (segmentId: number) => {
     const segment = segments?.find(s => s.id === segmentId);
@@ -73,7 +67,6 @@ export default function RulesPage() {
       if (res.ok) {
         setSelectedRules([]);
         queryClient.invalidateQueries({ queryKey: ['rules'] });
-        queryClient.invalidateQueries({ queryKey: ['rules-count'] });
       }
     } catch (error) {
       console.error('Failed to delete rules:', error);
@@ -148,7 +141,7 @@ export default function RulesPage() {
           </div>
         </div>
         <p className="text-sm text-gray-400 mt-2">
-          Total: {countData?.total || 0} rules
+          Total: {rulesPage?.total || 0} rules
         </p>
       </div>
 
@@ -12,24 +12,18 @@ export default function SegmentsPage() {
   const [currentPage, setCurrentPage] = useState(1);
   const itemsPerPage = 10;
 
-  const { data: countData } = useQuery({
-    queryKey: ['segments-count'],
-    queryFn: async () => {
-      const res = await fetch('/api/network-segments/count');
-      return res.json();
-    }
-  });
-
-  const { data: segments, isLoading, error } = useQuery({
+  // Page items and total count come back in a single request
+  const { data: segmentsPage, isLoading, error } = useQuery({
     queryKey: ['segments', currentPage],
     queryFn: async () => {
       const skip = (currentPage - 1) * itemsPerPage;
-      const res = await fetch(`/api/network-segments?skip=${skip}&limit=${itemsPerPage}`);
+      const res = await fetch(`/api/network-segments?skip=${skip}&limit=${itemsPerPage}&include_total=true`);
       return res.json();
     }
   });
+  const segments = segmentsPage?.items;
 
-  const totalPages = Math.ceil((countData?.total || 0) / itemsPerPage);
+  const totalPages = Math.ceil((segmentsPage?.total || 0) / itemsPerPage);
 
   const handleExportCSV = async () => {
     try {
@@ -91,7 +85,7 @@ export default function SegmentsPage() {
           </div>
         </div>
         <p className="text-sm text-gray-400 mt-2">
-          Total: {countData?.total || 0} segments
+          Total: {segmentsPage?.total || 0} segments
         </p>
       </div>
 
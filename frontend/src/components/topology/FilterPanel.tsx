@@ -1,10 +1,13 @@
 'use client';
 
 import { useState } from 'react';
+import { GraphLevel } from '@/types/topology';
+import { TopologyLayout } from './TopologyMap';
 
 interface FilterPanelProps {
   onFilterChange: (filters: TopologyFilters) => void;
-  onLayoutChange: (layout: 'dagre' | 'cose' | 'circle') => void;
+  onLayoutChange: (layout: TopologyLayout) => void;
+  onLevelChange?: (level: GraphLevel) => void;
 }
 
 export interface TopologyFilters {
@@ -17,12 +20,18 @@ export interface TopologyFilters {
 const ZONE_TYPES = ['DMZ', 'Internal', 'External', 'Management'];
 const PROTOCOLS = ['TCP', 'UDP', 'ICMP', 'ANY'];
 const LAYOUTS = [
+  { value: 'preset', label: 'Precomputed (by zone)' },
   { value: 'cose', label: 'Force-directed' },
   { value: 'dagre', label: 'Hierarchical' },
   { value: 'circle', label: 'Circular' }
 ];
+const LEVELS = [
+  { value: 'segment', label: 'Segments' },
+  { value: 'zone', label: 'Zones' },
+  { value: 'cidr-supernet', label: 'CIDR supernets (/16)' }
+];
 
-export default function FilterPanel({ onFilterChange, onLayoutChange }: FilterPanelProps) {
+export default function FilterPanel({ onFilterChange, onLayoutChange, onLevelChange }: FilterPanelProps) {
   const [filters, setFilters] = useState<TopologyFilters>({
     zoneTypes: [],
     protocols: [],
@@ -148,7 +157,7 @@ export default function FilterPanel({ onFilterChange, onLayoutChange }: FilterPa
       <div>
         <h3 className="font-semibold text-sm text-gray-200 mb-2">Layout</h3>
         <select
-          onChange={(e) => onLayoutChange(e.target.value as any)}
+          onChange={(e) => onLayoutChange(e.target.value as TopologyLayout)}
           className="w-full px-3 py-2 bg-gray-900 border border-gray-600 text-white rounded-lg focus:ring-2 focus:ring-blue-500"
         >
           {LAYOUTS.map(layout => (
@@ -159,6 +168,22 @@ export default function FilterPanel({ onFilterChange, onLayoutChange }: FilterPa
         </select>
       </div>
 
+      {onLevelChange && (
+        <div>
+          <h3 className="font-semibold text-sm text-gray-200 mb-2">Group By</h3>
+          <select
+            onChange={(e) => onLevelChange(e.target.value as GraphLevel)}
+            className="w-full px-3 py-2 bg-gray-900 border border-gray-600 text-white rounded-lg focus:ring-2 focus:ring-blue-500"
+          >
+            {LEVELS.map(level => (
+              <option key={level.value} value={level.value}>
+                {level.label}
+              </option>
+            ))}
+          </select>
+        </div>
+      )}
+
       <button
         onClick={handleReset}
         className="w-full px-4 py-2 bg-gray-700 text-gray-200 rounded-lg hover:bg-gray-600 transition-colors"
@@ -13,9 +13,11 @@ interface TopologyMapProps {
   edges: TopologyEdge[];
   onNodeClick?: (nodeId: string) => void;
   onEdgeClick?: (edgeId: string) => void;
-  layout?: 'dagre' | 'cose' | 'circle';
+  layout?: TopologyLayout;
 }
 
+export type TopologyLayout = 'preset' | 'dagre' | 'cose' | 'circle';
+
 interface ContextMenu {
   x: number;
   y: number;
@@ -28,7 +30,7 @@ const TopologyMap = forwardRef<any, TopologyMapProps>(({
   edges,
   onNodeClick,
   onEdgeClick,
-  layout = 'dagre'
+  layout = 'preset'
 }, ref) => {
   const containerRef = useRef<HTMLDivElement>(null);
   const cyRef = useRef<cytoscape.Core | null>(null);
@@ -39,6 +41,26 @@ const TopologyMap = forwardRef<any, TopologyMapProps>(({
     cyRef
   }));
 
+  // 'preset' draws the positions computed by the server (node x/y) without running a
+  // layout; graphs from an older backend without positions fall back to dagre
+  const layoutOptions = (): any => {
+    if (layout === 'preset' && nodes.every(n => n.x != null && n.y != null)) {
+      return {
+        name: 'preset',
+        positions: (node: any) => ({ x: node.data('x'), y: node.data('y') }),
+        fit: true
+      };
+    }
+    return {
+      name: layout === 'preset' ? 'dagre' : layout,
+      rankDir: 'LR',
+      nodeSep: 80,
+      rankSep: 120,
+      animate: true,
+      animationDuration: 500
+    };
+  };
+
   // Node positions localStorage helpers
   const saveNodePositions = () => {
     const cy = cyRef.current;
@@ -68,14 +90,7 @@ const TopologyMap = forwardRef<any, TopologyMapProps>(({
     const cy = cyRef.current;
     if (!cy) return;
 
-    cy.layout({
-      name: layout,
-      rankDir: 'LR',
-      nodeSep: 80,
-      rankSep: 120,
-      animate: true,
-      animationDuration: 500
-    } as any).run();
+    cy.layout(layoutOptions()).run();
   };
 
   const highlightNode = (nodeId: string) => {
@@ -161,14 +176,7 @@ const TopologyMap = forwardRef<any, TopologyMapProps>(({
           };
         })
       },
-      layout: {
-        name: layout,
-        rankDir: 'LR',
-        nodeSep: 80,
-        rankSep: 120,
-        animate: true,
-        animationDuration: 500
-      } as any,
+      layout: layoutOptions(),
       style: [
         {
           selector: 'node',
@@ -197,6 +205,21 @@ const TopologyMap = forwardRef<any, TopologyMapProps>(({
             'shape': 'ellipse'
           } as any
         },
+        {
+          // Expanded cluster drawn around its member segments
+          selector: ':parent',
+          style: {
+            'background-image': 'none',
+            'background-color': 'data(color)',
+            'background-opacity': 0.12,
+            'border-width': 2,
+            'border-style': 'dashed',
+            'border-color': 'data(color)',
+            'border-opacity': 0.8,
+            'text-valign': 'top',
+            'shape': 'roundrectangle'
+          } as any
+        },
         {
           selector: 'node:hover',
           style: {
@@ -1,4 +1,5 @@
 import {
+  GraphLevel,
   TopologyGraph,
   NetworkSegment,
   Firewall,
@@ -10,8 +11,17 @@ import {
 
 const API_BASE = '/api';
 
-export async function fetchTopologyGraph(): Promise<TopologyGraph> {
-  const res = await fetch(`${API_BASE}/topology/graph`);
+export async function fetchTopologyGraph(
+  options: { level?: GraphLevel; expand?: string | null; prefixLength?: number } = {}
+): Promise<TopologyGraph> {
+  const params = new URLSearchParams();
+  if (options.level && options.level !== 'segment') {
+    params.set('level', options.level);
+    if (options.prefixLength) params.set('prefix_length', String(options.prefixLength));
+    if (options.expand) params.set('expand', options.expand);
+  }
+  const query = params.toString();
+  const res = await fetch(`${API_BASE}/topology/graph${query ? `?${query}` : ''}`);
   if (!res.ok) throw new Error('Failed to fetch topology graph');
   return res.json();
 }
@@ -5,6 +5,22 @@ export interface TopologyNode {
   zone_type: 'DMZ' | 'Internal' | 'External' | 'Management';
   color: string;
   description?: string;
+  // Position computed by the server (null for segments not laid out yet)
+  x?: number | null;
+  y?: number | null;
+  // Set on zone / supernet nodes of a clustered graph (level=zone | cidr-supernet)
+  kind?: 'cluster';
+  expanded?: boolean;
+  metadata?: ClusterMetadata;
+  // Cluster id of a segment shown inside an expanded cluster
+  parent?: string;
+}
+
+export interface ClusterMetadata {
+  segment_count: number;
+  zone_counts: Record<string, number>;
+  internal_rule_count: number;
+  internal_connection_count: number;
 }
 
 export interface TopologyEdge {
@@ -13,14 +29,22 @@ export interface TopologyEdge {
   to: string;
   label: string;
   metadata: {
-    rule_ids: number[];
     protocols: string[];
-    ports: string[];
     actions: string[];
-    descriptions: string[];
+    // Segment-level edges
+    rule_ids?: number[];
+    ports?: string[];
+    descriptions?: string[];
+    // Aggregated edges of a clustered graph
+    rule_count?: number;
+    allow_count?: number;
+    deny_count?: number;
+    connection_count?: number;
   };
 }
 
+export type GraphLevel = 'segment' | 'zone' | 'cidr-supernet';
+
 export interface TopologyGraph {
   nodes: TopologyNode[];
   edges: TopologyEdge[];
@@ -111,4 +135,5 @@ export interface SearchResult {
     protocol: string;
     action: string;
   }>;
+  next_cursor: string | null;
 }